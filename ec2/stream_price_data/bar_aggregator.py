@@ -0,0 +1,151 @@
+import json
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+NY_TZ = ZoneInfo("America/New_York")
+
+# Interval name -> bucket width in ms. Intraday widths divide an hour, so
+# epoch-aligned buckets line up with New York wall-clock boundaries too.
+INTRADAY_INTERVALS = {
+    "1s": 1_000,
+    "1m": 60_000,
+    "5m": 300_000,
+}
+DAILY_INTERVAL = "1d"
+INTERVALS = (*INTRADAY_INTERVALS, DAILY_INTERVAL)
+
+
+def bar_topic(symbol: str, interval: str) -> str:
+    """Subscription topic for one symbol's bars at one interval, e.g. ``AAPL@1m``."""
+    return f"{symbol}@{interval}"
+
+
+class Bar:
+    __slots__ = ("time", "open", "high", "low", "close", "volume")
+
+    def __init__(self, bar_time: int, price: float, volume: float):
+        self.time = bar_time  # bucket start; unix seconds
+        self.open = self.high = self.low = self.close = price
+        self.volume = volume
+
+    def apply(self, price: float, volume: float) -> None:
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += volume
+
+
+class EncodedBar:
+    """
+    A bar update serialized once for every subscriber.
+
+    Bars keep mutating after they are published, so the JSON is captured
+    eagerly rather than lazily like ``EncodedTick``.
+    """
+
+    __slots__ = ("json", "final")
+
+    def __init__(self, symbol: str, interval: str, bar: Bar, final: bool):
+        self.final = final
+        self.json = json.dumps({
+            "event": "bar",
+            "symbol": symbol,
+            "interval": interval,
+            "time": bar.time,
+            "open": bar.open,
+            "high": bar.high,
+            "low": bar.low,
+            "close": bar.close,
+            "volume": bar.volume,
+            "final": final,
+        })
+
+
+class BarAggregator:
+    """
+    Folds normalized ticks into 1s/1m/5m/1d OHLCV bars per symbol.
+
+    Daily bars are bucketed by New York calendar day and stamped with that
+    date's UTC midnight, matching the candles the frontend builds from
+    historical data. Ticks older than a symbol's current bar are ignored.
+    Volume is the sum of per-tick ``volume`` values. Feeds that only report
+    a cumulative session total send it as ``day_volume`` instead, and each
+    tick then contributes the increase since the previous one.
+    """
+
+    def __init__(self):
+        self.bars: dict[tuple[str, str], Bar] = {}
+        # Last cumulative day_volume seen per symbol.
+        self._day_volumes: dict[str, float] = {}
+        # Cached bounds of the current New York day, in epoch ms.
+        self._day_start = 0
+        self._day_end = 0
+        self._day_time = 0
+
+    def _daily_bucket(self, ts_ms: int) -> int:
+        if not (self._day_start <= ts_ms < self._day_end):
+            ny_date = datetime.fromtimestamp(ts_ms / 1000, NY_TZ).date()
+            start = datetime.combine(ny_date, time(), NY_TZ)
+            end = datetime.combine(ny_date + timedelta(days=1), time(), NY_TZ)
+            self._day_start = int(start.timestamp() * 1000)
+            self._day_end = int(end.timestamp() * 1000)
+            self._day_time = int(datetime.combine(ny_date, time(), timezone.utc).timestamp())
+        return self._day_time
+
+    def on_tick(self, update: dict) -> list[tuple[str, Bar, bool]]:
+        """
+        Apply a tick to every interval for its symbol.
+
+        Returns ``(interval, bar, final)`` for each bar that changed: when a
+        tick opens a new bucket the previous bar is reported once with
+        ``final=True`` before the new in-progress bar.
+        """
+        symbol = update.get("symbol")
+        price = update.get("price")
+        ts_ms = update.get("timestamp")
+        if not symbol or price is None or not ts_ms:
+            return []
+
+        price = float(price)
+        volume = self._tick_volume(symbol, update)
+        changed = []
+        for interval in INTERVALS:
+            width = INTRADAY_INTERVALS.get(interval)
+            bar_time = (ts_ms - ts_ms % width) // 1000 if width else self._daily_bucket(ts_ms)
+
+            key = (symbol, interval)
+            bar = self.bars.get(key)
+            if bar is None or bar_time > bar.time:
+                if bar is not None:
+                    changed.append((interval, bar, True))
+                bar = self.bars[key] = Bar(bar_time, price, volume)
+            elif bar_time < bar.time:
+                continue
+            else:
+                bar.apply(price, volume)
+            changed.append((interval, bar, False))
+        return changed
+
+    def _tick_volume(self, symbol: str, update: dict) -> float:
+        day_volume = update.get("day_volume")
+        if day_volume is None:
+            return float(update.get("volume") or 0)
+
+        day_volume = float(day_volume)
+        last = self._day_volumes.get(symbol)
+        self._day_volumes[symbol] = day_volume
+        if last is None:
+            # No baseline yet; the session total so far isn't this tick's volume.
+            return 0.0
+        # A smaller total means the provider started a new session.
+        return day_volume - last if day_volume >= last else day_volume
+
+    def current(self, symbol: str, interval: str) -> Bar | None:
+        return self.bars.get((symbol, interval))
+
+    def discard(self, symbol: str) -> None:
+        for interval in INTERVALS:
+            self.bars.pop((symbol, interval), None)
+        self._day_volumes.pop(symbol, None)
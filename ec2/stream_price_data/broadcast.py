@@ -0,0 +1,181 @@
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+
+import metrics
+from bar_aggregator import EncodedBar
+from indicators import EncodedSignals
+from wire_protocol import BINARY, JSON, EncodedTick, SymbolTable, encode_tick_frame
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on distinct keys (symbols) waiting to be written to one client.
+DEFAULT_MAX_PENDING = int(os.environ.get("STREAM_OUTBOX_MAX_PENDING", "256"))
+# Binary frames carry several ticks; cap how many go into one frame.
+MAX_TICKS_PER_FRAME = 512
+
+_client_numbers = itertools.count(1)
+
+
+def observe_sent(tick: EncodedTick | EncodedBar | EncodedSignals) -> None:
+    """Record send latency for a tick whose upstream message was sampled."""
+    trace = getattr(tick, "trace", None)
+    if trace is not None:
+        now = time.perf_counter_ns()
+        metrics.TICK_LATENCY_SECONDS.observe((now - trace[0]) / 1e9)
+        metrics.SEND_SECONDS.observe((now - trace[1]) / 1e9)
+
+
+def is_final(message: EncodedTick | EncodedBar | EncodedSignals) -> bool:
+    """Whether ``message`` is a finished bar or signal, which no later update replaces."""
+    return getattr(message, "final", False)
+
+
+class ClientOutbox:
+    """
+    Bounded, conflating outbound queue for a single client websocket.
+
+    Ticks are pushed as shared ``EncodedTick`` objects (each serialized at
+    most once per wire format across all clients) and written by a
+    dedicated writer task, so a slow client never blocks the provider's
+    receive loop.
+
+    Pending ticks are keyed by symbol. If a client falls behind and a
+    newer tick arrives for a symbol that is still queued, the queued one is
+    replaced with the latest price (conflation). If the number of distinct
+    pending symbols exceeds ``max_pending`` the oldest entry that a later
+    update will replace (a tick, or an in-progress bar or signal) is
+    dropped. Finished bars and signals are never evicted, since the client
+    cannot get them back; when only those are queued, a new replaceable
+    update is dropped instead and a finished one is queued past the limit.
+
+    In the default JSON format each tick is its own text frame. In the
+    binary format pending ticks are packed into as few frames as possible
+    (bar and signal updates stay JSON text). Control messages such as symbol id
+    assignments always go out before any ticks that depend on them.
+    """
+
+    def __init__(self, websocket, max_pending: int = DEFAULT_MAX_PENDING, name: str | None = None):
+        self.websocket = websocket
+        # Identifies the client in logs and per-client metrics.
+        self.name = name or f"client-{next(_client_numbers)}"
+        self.max_pending = max_pending
+        self.format = JSON
+        self.symbols = SymbolTable()
+        self.pending: OrderedDict[str, EncodedTick | EncodedBar | EncodedSignals] = OrderedDict()
+        self.control: deque[str] = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+
+        # Counters for spotting slow consumers.
+        self.sent = 0
+        self.conflated = 0
+        self.dropped = 0
+
+    def push(self, key: str, tick: EncodedTick | EncodedBar | EncodedSignals) -> None:
+        """Queue a tick, bar or signal update without blocking the caller."""
+        if self._closed:
+            return
+
+        if key in self.pending:
+            self.pending[key] = tick
+            self.conflated += 1
+            metrics.CONFLATED.inc()
+        else:
+            if len(self.pending) >= self.max_pending and not self._evict() and not is_final(tick):
+                self._count_drop()
+                return
+            self.pending[key] = tick
+
+        self._ready.set()
+
+    def _evict(self) -> bool:
+        """Drop the oldest queued update that isn't a finished bar or signal."""
+        for key, queued in self.pending.items():
+            if not is_final(queued):
+                del self.pending[key]
+                self._count_drop()
+                return True
+        return False
+
+    def _count_drop(self) -> None:
+        self.dropped += 1
+        metrics.DROPPED.inc()
+
+    def send_control(self, message: str) -> None:
+        """Queue a text message that must reach the client ahead of pending ticks."""
+        if self._closed:
+            return
+        self.control.append(message)
+        self._ready.set()
+
+    async def run(self) -> None:
+        """Writer loop: drain pending payloads to the websocket until closed."""
+        try:
+            while not self._closed:
+                await self._ready.wait()
+                self._ready.clear()
+                while self.control and not self._closed:
+                    await self.websocket.send(self.control.popleft())
+                if self.format == BINARY:
+                    await self._drain_binary()
+                else:
+                    await self._drain_json()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to send update to client: {e}")
+        finally:
+            self.close()
+
+    async def _drain_json(self) -> None:
+        while self.pending and not self._closed:
+            _, tick = self.pending.popitem(last=False)
+            await self.websocket.send(tick.json)
+            self.sent += 1
+            metrics.MESSAGES_SENT.inc()
+            observe_sent(tick)
+
+    async def _drain_binary(self) -> None:
+        ids = self.symbols.ids
+        while self.pending and not self._closed:
+            batch = []
+            while self.pending and len(batch) < MAX_TICKS_PER_FRAME:
+                key, tick = self.pending.popitem(last=False)
+                symbol_id = ids.get(key)
+                if symbol_id is not None:
+                    batch.append((symbol_id, tick))
+                elif isinstance(tick, (EncodedBar, EncodedSignals)):
+                    # Bars and signals have no binary encoding; they go out as JSON text.
+                    await self.websocket.send(tick.json)
+                    self.sent += 1
+                    metrics.MESSAGES_SENT.inc()
+            if batch:
+                await self.websocket.send(encode_tick_frame(batch))
+                self.sent += len(batch)
+                metrics.MESSAGES_SENT.inc(len(batch))
+                for _, tick in batch:
+                    observe_sent(tick)
+
+    def close(self) -> None:
+        self._closed = True
+        self.pending.clear()
+        self.control.clear()
+        self._ready.set()
+
+    @property
+    def depth(self) -> int:
+        return len(self.pending)
+
+    def stats(self) -> dict:
+        return {
+            "client": self.name,
+            "format": self.format,
+            "sent": self.sent,
+            "conflated": self.conflated,
+            "dropped": self.dropped,
+            "depth": self.depth,
+        }
@@ -1,16 +1,44 @@
+import asyncio
 import json
 import logging
-from providers.base_provider import BasePriceStreamer
+
+import metrics
+from bar_aggregator import INTERVALS, bar_topic
+from broadcast import ClientOutbox
+from indicators import signals_topic
+from subscription_hub import SubscriptionHub
+from wire_protocol import BINARY, FORMATS, symbol_ids_message
 
 logger = logging.getLogger(__name__)
 
+def parse_symbols(raw) -> list[str]:
+    """Normalize a comma-separated string or list of symbols, preserving order."""
+    if not raw:
+        return []
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    symbols = (str(s).strip().upper() for s in raw)
+    return list(dict.fromkeys(s for s in symbols if s))
+
+def client_name(websocket) -> str | None:
+    """``host:port`` of the client, if the connection knows it."""
+    address = getattr(websocket, "remote_address", None)
+    if not address:
+        return None
+    return f"{address[0]}:{address[1]}"
+
 class ClientConnectionHandler:
-    def __init__(self, websocket, streamer: BasePriceStreamer):
+    def __init__(self, websocket, hub: SubscriptionHub):
         self.websocket = websocket
-        self.streamer = streamer
+        self.hub = hub
+        self.outbox = ClientOutbox(websocket, name=client_name(websocket))
         self.subscribed_symbols: set[str] = set()
+        # Channel topics, e.g. "AAPL@1m" or "AAPL@signals"
+        self.subscribed_channels: set[str] = set()
 
     async def handle(self):
+        writer = asyncio.create_task(self.outbox.run())
+        metrics.CLIENTS.inc()
         try:
             async for message in self.websocket:
                 if isinstance(message, bytes):
@@ -20,6 +48,8 @@ class ClientConnectionHandler:
         except Exception as e:
             logger.error(f"Error handling client: {e}")
         finally:
+            metrics.CLIENTS.dec()
+            writer.cancel()
             await self.cleanup()
 
     async def process_message(self, message: str):
@@ -27,41 +57,89 @@ class ClientConnectionHandler:
             data = json.loads(message)
             action = data.get("action")
 
-            if action == "subscribe":
-                symbols = data.get("symbols", "").split(",")
-                for symbol in symbols:
-                    symbol = symbol.strip().upper()
-                    if symbol:
-                        self.subscribed_symbols.add(symbol)
-                        await self.streamer.subscribe(symbol, self.send_update)
+            if action in ("subscribe", "unsubscribe") and data.get("channel") == "bars":
+                await self.process_channel_message(action, self.bar_topics(data))
+
+            elif action in ("subscribe", "unsubscribe") and data.get("channel") == "signals":
+                topics = [signals_topic(s) for s in parse_symbols(data.get("symbols"))]
+                await self.process_channel_message(action, topics)
+
+            elif action == "subscribe":
+                self.negotiate_format(data.get("format"))
+                symbols = [s for s in parse_symbols(data.get("symbols")) if s not in self.subscribed_symbols]
+                if symbols:
+                    self.subscribed_symbols.update(symbols)
+                    self.announce_symbol_ids(symbols)
+                    await self.hub.subscribe(symbols, self.outbox)
 
             elif action == "unsubscribe":
-                params = data.get("params", {})
-                symbols = params.get("symbols", "").split(",")
-                for symbol in symbols:
-                    symbol = symbol.strip().upper()
-                    if symbol in self.subscribed_symbols:
-                        self.subscribed_symbols.remove(symbol)
-                        await self.streamer.unsubscribe(symbol)
+                # Accept both the top-level form the frontend sends and the
+                # Twelve Data style {"params": {"symbols": ...}}.
+                raw = data.get("symbols") or data.get("params", {}).get("symbols")
+                symbols = [s for s in parse_symbols(raw) if s in self.subscribed_symbols]
+                if symbols:
+                    self.subscribed_symbols.difference_update(symbols)
+                    await self.hub.unsubscribe(symbols, self.outbox)
 
         except json.JSONDecodeError:
             logger.warning(f"Invalid JSON received: {message}")
 
-    async def send_update(self, update: dict):
-        try:
-            await self.websocket.send(json.dumps(update))
-        except Exception as e:
-            logger.warning(f"Failed to send update to client: {e}")
+    def bar_topics(self, data: dict) -> list[str]:
+        """
+        Topics for a bar channel message, e.g.
+        {"action": "subscribe", "channel": "bars", "symbols": "AAPL,MSFT", "intervals": "1m,1d"}
+        """
+        intervals = [i.lower() for i in parse_symbols(data.get("intervals") or "1m")]
+        unsupported = [i for i in intervals if i not in INTERVALS]
+        if unsupported:
+            logger.warning(f"Unsupported bar intervals requested: {unsupported}")
+        return [
+            bar_topic(symbol, interval)
+            for symbol in parse_symbols(data.get("symbols"))
+            for interval in intervals
+            if interval in INTERVALS
+        ]
+
+    async def process_channel_message(self, action: str, topics: list[str]):
+        if action == "subscribe":
+            topics = [t for t in topics if t not in self.subscribed_channels]
+            if topics:
+                self.subscribed_channels.update(topics)
+                await self.hub.subscribe(topics, self.outbox)
+        else:
+            topics = [t for t in topics if t in self.subscribed_channels]
+            if topics:
+                self.subscribed_channels.difference_update(topics)
+                await self.hub.unsubscribe(topics, self.outbox)
+
+    def negotiate_format(self, requested: str | None) -> None:
+        """Switch the connection's wire format if the client asked for a different one."""
+        if not requested or requested == self.outbox.format:
+            return
+        if requested not in FORMATS:
+            logger.warning(f"Unsupported format requested: {requested}")
+            return
+
+        self.outbox.format = requested
+        # Symbols subscribed before the switch need ids too.
+        self.announce_symbol_ids(list(self.subscribed_symbols))
+
+    def announce_symbol_ids(self, symbols: list[str]) -> None:
+        if self.outbox.format != BINARY:
+            return
+        assigned = self.outbox.symbols.assign(symbols)
+        if assigned:
+            self.outbox.send_control(symbol_ids_message(assigned))
 
     async def cleanup(self):
-        logger.info("Cleaning up client subscriptions")
-        for symbol in self.subscribed_symbols:
-            # logger.info(f"Streamer instance: {self.streamer}")
-            # logger.info(f"Streamer class: {type(self.streamer)}")
-            # logger.info(f"unsubscribe is method: {callable(getattr(self.streamer, 'unsubscribe', None))}")
-            await self.streamer.unsubscribe(symbol)
+        logger.info(f"Cleaning up client subscriptions (outbox: {self.outbox.stats()})")
+        self.outbox.close()
+        topics = [*self.subscribed_symbols, *self.subscribed_channels]
+        if topics:
+            await self.hub.unsubscribe(topics, self.outbox)
         self.subscribed_symbols.clear()
+        self.subscribed_channels.clear()
 
-async def handle_client_connection(websocket, streamer: BasePriceStreamer) -> None:
-    handler = ClientConnectionHandler(websocket, streamer)
+async def handle_client_connection(websocket, hub: SubscriptionHub) -> None:
+    handler = ClientConnectionHandler(websocket, hub)
     await handler.handle()
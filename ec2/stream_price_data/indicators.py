@@ -0,0 +1,252 @@
+import json
+import math
+import os
+from array import array
+
+from bar_aggregator import Bar
+
+# Bar interval the indicators are computed on. "1d" matches the Lambda
+# strategies but needs SMA_SLOW days of streaming to warm up.
+INDICATOR_INTERVAL = os.environ.get("STREAM_INDICATOR_INTERVAL", "1m")
+
+SIGNALS_CHANNEL = "signals"
+
+RSI_PERIOD = 14
+RSI_BUY_THRESHOLD = 30
+SMA_FAST = 50
+SMA_SLOW = 200
+EMA_PERIOD = 20
+
+
+def signals_topic(symbol: str) -> str:
+    """Subscription topic for one symbol's live strategy signals, e.g. ``AAPL@signals``."""
+    return f"{symbol}@{SIGNALS_CHANNEL}"
+
+
+class SMA:
+    """Simple moving average over a fixed-size ring buffer; O(1) per update."""
+
+    __slots__ = ("period", "_values", "_next", "_count", "_sum")
+
+    def __init__(self, period: int):
+        self.period = period
+        self._values = array("d", [0.0] * period)
+        self._next = 0
+        self._count = 0
+        self._sum = 0.0
+
+    def _sum_with(self, x: float) -> tuple[float, int]:
+        if self._count == self.period:
+            return self._sum - self._values[self._next] + x, self.period
+        return self._sum + x, self._count + 1
+
+    def update(self, x: float) -> None:
+        self._sum, self._count = self._sum_with(x)
+        self._values[self._next] = x
+        self._next = (self._next + 1) % self.period
+
+    def peek(self, x: float) -> float | None:
+        """Value the average would have if ``x`` were the next sample."""
+        total, count = self._sum_with(x)
+        return total / count if count == self.period else None
+
+    @property
+    def value(self) -> float | None:
+        return self._sum / self.period if self._count == self.period else None
+
+
+class EMA:
+    """Exponential moving average seeded with the SMA of the first ``period`` samples."""
+
+    __slots__ = ("period", "alpha", "_seed", "_value")
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self._seed = SMA(period)
+        self._value: float | None = None
+
+    def peek(self, x: float) -> float | None:
+        if self._value is None:
+            return self._seed.peek(x)
+        return self._value + self.alpha * (x - self._value)
+
+    def update(self, x: float) -> None:
+        if self._value is None:
+            self._seed.update(x)
+            self._value = self._seed.value
+        else:
+            self._value += self.alpha * (x - self._value)
+
+    @property
+    def value(self) -> float | None:
+        return self._value
+
+
+class WilderRSI:
+    """
+    Relative Strength Index with Wilder smoothing.
+
+    The first ``period`` price changes are averaged plainly; after that
+    each average is ``(prev * (period - 1) + current) / period``.
+    """
+
+    __slots__ = ("period", "_prev", "_count", "_avg_gain", "_avg_loss")
+
+    def __init__(self, period: int = RSI_PERIOD):
+        self.period = period
+        self._prev: float | None = None
+        self._count = 0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+
+    def _step(self, close: float) -> tuple[int, float, float]:
+        if self._prev is None:
+            return 0, 0.0, 0.0
+        change = close - self._prev
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        if self._count < self.period:
+            # Running plain mean until the first full window.
+            n = self._count + 1
+            return n, self._avg_gain + (gain - self._avg_gain) / n, self._avg_loss + (loss - self._avg_loss) / n
+        p = self.period
+        return self._count + 1, (self._avg_gain * (p - 1) + gain) / p, (self._avg_loss * (p - 1) + loss) / p
+
+    def _rsi(self, count: int, avg_gain: float, avg_loss: float) -> float | None:
+        if count < self.period:
+            return None
+        if avg_loss == 0:
+            return 100.0 if avg_gain > 0 else 50.0
+        return 100 - 100 / (1 + avg_gain / avg_loss)
+
+    def update(self, close: float) -> None:
+        self._count, self._avg_gain, self._avg_loss = self._step(close)
+        self._prev = close
+
+    def peek(self, close: float) -> float | None:
+        return self._rsi(*self._step(close))
+
+    @property
+    def value(self) -> float | None:
+        return self._rsi(self._count, self._avg_gain, self._avg_loss)
+
+
+class IndicatorState:
+    """Per-symbol indicators, committed on finished bars and previewed on in-progress ones."""
+
+    __slots__ = ("rsi", "sma_fast", "sma_slow", "ema", "_last_spread")
+
+    def __init__(self):
+        self.rsi = WilderRSI(RSI_PERIOD)
+        self.sma_fast = SMA(SMA_FAST)
+        self.sma_slow = SMA(SMA_SLOW)
+        self.ema = EMA(EMA_PERIOD)
+        # sma_fast - sma_slow as of the last finished bar, for crossover detection.
+        self._last_spread: float | None = None
+
+    def commit(self, close: float) -> None:
+        self.rsi.update(close)
+        self.sma_fast.update(close)
+        self.sma_slow.update(close)
+        self.ema.update(close)
+        fast, slow = self.sma_fast.value, self.sma_slow.value
+        if fast is not None and slow is not None:
+            self._last_spread = fast - slow
+
+    def evaluate(self, close: float) -> list[dict]:
+        """
+        Strategy results for a bar closing at ``close``, in the same shape as
+        the Lambda ``STRATEGY_MAP`` evaluators. Strategies whose indicators
+        are still warming up are left out.
+        """
+        results = []
+
+        rsi = self.rsi.peek(close)
+        if rsi is not None:
+            buy = rsi < RSI_BUY_THRESHOLD
+            results.append({
+                "strategy": "RSI_DIP",
+                "signal": "BUY" if buy else "HOLD",
+                "confidence": round(max(0.5, (RSI_BUY_THRESHOLD - rsi) / RSI_BUY_THRESHOLD), 2) if buy else 0.5,
+                "indicators": {"rsi": round(rsi, 2)},
+            })
+
+        fast, slow = self.sma_fast.peek(close), self.sma_slow.peek(close)
+        if fast is not None and slow is not None:
+            spread = fast - slow
+            signal = "HOLD"
+            confidence = 0.5
+            previous = self._last_spread
+            if previous is not None and math.copysign(1, previous) != math.copysign(1, spread):
+                signal = "BUY" if spread > 0 else "SELL"
+                confidence = round(min(1.0, 0.5 + abs(spread) / slow * 10), 2)
+            ema = self.ema.peek(close)
+            results.append({
+                "strategy": "SMA_CROSSOVER",
+                "signal": signal,
+                "confidence": confidence,
+                "indicators": {
+                    f"sma_{SMA_FAST}": round(fast, 4),
+                    f"sma_{SMA_SLOW}": round(slow, 4),
+                    f"ema_{EMA_PERIOD}": None if ema is None else round(ema, 4),
+                },
+            })
+
+        return results
+
+
+class IndicatorEngine:
+    """
+    Streaming RSI/SMA/EMA per symbol on top of the bar aggregator.
+
+    Finished bars of ``interval`` advance the indicators; in-progress bars
+    only preview them, so every update is O(1) regardless of history.
+    """
+
+    def __init__(self, interval: str = INDICATOR_INTERVAL):
+        self.interval = interval
+        self.states: dict[str, IndicatorState] = {}
+        self.latest: dict[str, list[dict]] = {}
+
+    def on_bar(self, symbol: str, interval: str, bar: Bar, final: bool, preview: bool = True) -> list[dict]:
+        """Advance (final bars) or preview (in-progress bars) one symbol's indicators."""
+        if interval != self.interval:
+            return []
+
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = IndicatorState()
+
+        if final:
+            results = state.evaluate(bar.close)
+            state.commit(bar.close)
+        elif preview:
+            results = state.evaluate(bar.close)
+        else:
+            return []
+
+        if results:
+            self.latest[symbol] = results
+        return results
+
+    def discard(self, symbol: str) -> None:
+        self.states.pop(symbol, None)
+        self.latest.pop(symbol, None)
+
+
+class EncodedSignals:
+    """Signal update for one symbol, serialized once for every subscriber."""
+
+    __slots__ = ("json", "final")
+
+    def __init__(self, symbol: str, interval: str, bar_time: int, results: list[dict], final: bool):
+        self.final = final
+        self.json = json.dumps({
+            "event": "signals",
+            "symbol": symbol,
+            "interval": interval,
+            "time": bar_time,
+            "evaluations": results,
+            "final": final,
+        })
@@ -0,0 +1,67 @@
+import math
+from array import array
+
+
+class LastValueCache:
+    """
+    Most recent tick per symbol, stored column-wise in typed arrays.
+
+    Each symbol gets a fixed slot index; price/volume/timestamp live in
+    parallel ``array`` columns instead of one dict per symbol, so thousands
+    of symbols cost a few dozen bytes each. A missing volume is stored as
+    NaN and returned as ``None``.
+    """
+
+    __slots__ = ("_index", "_symbols", "_prices", "_volumes", "_timestamps")
+
+    def __init__(self):
+        self._index: dict[str, int] = {}
+        self._symbols: list[str] = []
+        self._prices = array("d")
+        self._volumes = array("d")
+        self._timestamps = array("q")
+
+    def update(self, tick: dict) -> None:
+        symbol = tick.get("symbol")
+        price = tick.get("price")
+        if not symbol or price is None:
+            return
+
+        volume = tick.get("volume")
+        volume = math.nan if volume is None else float(volume)
+        timestamp = int(tick.get("timestamp") or 0)
+
+        slot = self._index.get(symbol)
+        if slot is None:
+            self._index[symbol] = len(self._symbols)
+            self._symbols.append(symbol)
+            self._prices.append(float(price))
+            self._volumes.append(volume)
+            self._timestamps.append(timestamp)
+            return
+
+        # Out-of-order ticks must not overwrite a newer value.
+        if timestamp < self._timestamps[slot]:
+            return
+        self._prices[slot] = float(price)
+        self._volumes[slot] = volume
+        self._timestamps[slot] = timestamp
+
+    def get(self, symbol: str) -> dict | None:
+        slot = self._index.get(symbol)
+        if slot is None:
+            return None
+
+        volume = self._volumes[slot]
+        return {
+            "symbol": symbol,
+            "price": self._prices[slot],
+            "volume": None if math.isnan(volume) else volume,
+            "timestamp": self._timestamps[slot],
+        }
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._index
+
+    def __len__(self) -> int:
+        return len(self._symbols)
@@ -0,0 +1,280 @@
+"""
+In-process counters, gauges and latency histograms for the streaming
+service, served as Prometheus text on a local HTTP endpoint.
+
+Counters are plain integer increments and are updated for every tick.
+Latency is only measured for every ``SAMPLE_EVERY``-th upstream message:
+``trace.received()`` marks the receive time, and the same timestamp is
+followed through parsing, fan-out and the client socket write, so the
+stages of one message add up to its end-to-end latency.
+"""
+import asyncio
+import logging
+import os
+import time
+from bisect import bisect_left
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Local port for GET /metrics; 0 disables the endpoint. Workers use PORT + slot.
+METRICS_PORT = int(os.environ.get("STREAM_METRICS_PORT", "9108"))
+METRICS_HOST = os.environ.get("STREAM_METRICS_HOST", "127.0.0.1")
+# Time one upstream message in this many; 1 times all of them.
+SAMPLE_EVERY = max(1, int(os.environ.get("STREAM_METRICS_SAMPLE_EVERY", "64")))
+# Latency bucket upper bounds in seconds (10 µs to 1 s).
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+REQUEST_TIMEOUT_SECONDS = 5
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+    def samples(self) -> list[str]:
+        return [f"{self.name} {self.value}"]
+
+
+class LabeledCounter:
+    """A counter family with one label, e.g. ticks per ``symbol``."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, label: str):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.values: dict[str, int] = {}
+
+    def inc(self, label_value: str, amount: int = 1) -> None:
+        values = self.values
+        values[label_value] = values.get(label_value, 0) + amount
+
+    def samples(self) -> list[str]:
+        return [
+            f'{self.name}{{{self.label}="{escape_label(str(value))}"}} {count}'
+            for value, count in sorted(self.values.items())
+        ]
+
+
+class Gauge:
+    """A value that goes up and down, either set directly or read from ``fn`` on scrape."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float] | None = None):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: int = 1) -> None:
+        self.value -= amount
+
+    def samples(self) -> list[str]:
+        value = self.value
+        if self.fn is not None:
+            try:
+                value = self.fn()
+            except Exception as e:
+                logger.warning(f"Gauge {self.name} failed: {e}")
+                return []
+        return [f"{self.name} {value}"]
+
+
+class LabeledGauge:
+    """A gauge family with one label, read from ``fn`` (``{label value: value}``) on scrape."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, label: str, fn: Callable[[], dict[str, float]]):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.fn = fn
+
+    def samples(self) -> list[str]:
+        try:
+            values = self.fn()
+        except Exception as e:
+            logger.warning(f"Gauge {self.name} failed: {e}")
+            return []
+        return [
+            f'{self.name}{{{self.label}="{escape_label(str(value))}"}} {amount}'
+            for value, amount in sorted(values.items())
+        ]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; cumulated when rendered.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def observe_since(self, start_ns: int) -> None:
+        self.observe((time.perf_counter_ns() - start_ns) / 1e9)
+
+    def samples(self) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {self.sum}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, Counter | LabeledCounter | Gauge | LabeledGauge | Histogram] = {}
+
+    def _add(self, metric):
+        # Registering a name twice returns the first, so gauges can be re-bound
+        # to a new hub (e.g. in tests) without duplicate series.
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            if isinstance(existing, (Gauge, LabeledGauge)) and type(metric) is type(existing):
+                existing.fn = metric.fn
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._add(Counter(name, help))
+
+    def labeled_counter(self, name: str, help: str, label: str) -> LabeledCounter:
+        return self._add(LabeledCounter(name, help, label))
+
+    def gauge(self, name: str, help: str, fn: Callable[[], float] | None = None) -> Gauge:
+        return self._add(Gauge(name, help, fn))
+
+    def labeled_gauge(self, name: str, help: str, label: str, fn: Callable[[], dict[str, float]]) -> LabeledGauge:
+        return self._add(LabeledGauge(name, help, label, fn))
+
+    def histogram(self, name: str, help: str, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+UPSTREAM_MESSAGES = registry.counter("stream_upstream_messages_total", "Messages received from the provider")
+UPSTREAM_ERRORS = registry.labeled_counter(
+    "stream_upstream_errors_total", "Provider messages or connections that failed", "provider"
+)
+TICKS = registry.counter("stream_ticks_total", "Normalized ticks dispatched to the hub")
+SYMBOL_TICKS = registry.labeled_counter("stream_symbol_ticks_total", "Ticks dispatched per symbol", "symbol")
+MESSAGES_SENT = registry.counter("stream_messages_sent_total", "Ticks, bars and signals written to clients")
+CONFLATED = registry.counter("stream_outbox_conflated_total", "Queued updates replaced by a newer one")
+DROPPED = registry.counter("stream_outbox_dropped_total", "Queued updates dropped because an outbox was full")
+CLIENTS = registry.gauge("stream_clients", "Connected websocket clients")
+
+PARSE_SECONDS = registry.histogram(
+    "stream_parse_seconds", "Upstream receive to normalized tick (sampled)"
+)
+FANOUT_SECONDS = registry.histogram(
+    "stream_fanout_seconds", "Hub dispatch of one tick to every outbox, including bars and signals (sampled)"
+)
+SEND_SECONDS = registry.histogram(
+    "stream_send_seconds", "Hub dispatch to a client socket write completing, per client, including queueing (sampled)"
+)
+TICK_LATENCY_SECONDS = registry.histogram(
+    "stream_tick_latency_seconds", "Upstream receive to a client socket write completing, per client (sampled)"
+)
+
+
+class TickTrace:
+    """
+    Picks which upstream messages are timed and carries the receive time of
+    the current one. Providers call ``received()`` once per message before
+    parsing it; everything dispatched while handling that message reads
+    ``received_ns``, which is ``None`` for unsampled messages.
+    """
+
+    def __init__(self, every: int = SAMPLE_EVERY):
+        self.every = every
+        self.received_ns: int | None = None
+        self._countdown = every
+
+    def received(self) -> None:
+        UPSTREAM_MESSAGES.inc()
+        self._countdown -= 1
+        if self._countdown:
+            self.received_ns = None
+        else:
+            self._countdown = self.every
+            self.received_ns = time.perf_counter_ns()
+
+    def parsed(self) -> None:
+        if self.received_ns is not None:
+            PARSE_SECONDS.observe_since(self.received_ns)
+
+
+trace = TickTrace()
+
+
+async def _handle_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), REQUEST_TIMEOUT_SECONDS)
+        method, path, *_ = request.split(b"\r\n", 1)[0].decode("latin-1").split(" ")
+        if method == "GET" and path.split("?", 1)[0] == "/metrics":
+            status, body = "200 OK", registry.render().encode()
+        else:
+            status, body = "404 Not Found", b"Not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {CONTENT_TYPE}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_metrics(port: int = METRICS_PORT, host: str = METRICS_HOST) -> asyncio.AbstractServer | None:
+    """Start the /metrics endpoint; returns ``None`` when disabled or the port is taken."""
+    if not port:
+        return None
+    try:
+        server = await asyncio.start_server(_handle_request, host, port)
+    except OSError as e:
+        # Metrics are never worth refusing to stream over.
+        logger.warning(f"Metrics endpoint not started on {host}:{port}: {e}")
+        return None
+    logger.info(f"Metrics on http://{host}:{port}/metrics")
+    return server
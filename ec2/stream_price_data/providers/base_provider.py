@@ -1,5 +1,7 @@
+import importlib
+import random
 from abc import ABC, abstractmethod
-from typing import Protocol, Callable, Awaitable
+from typing import Protocol, Callable, Awaitable, Type
 
 
 class WebSocketLike(Protocol):
@@ -21,6 +23,15 @@ class BasePriceStreamer(ABC):
     remains consistent and decoupled from the provider's API structure.
     """
 
+    # Set by whatever owns the provider (the hub, a hedge or a pool). Providers
+    # call it when their upstream connection drops on its own, so the owner
+    # can disconnect, reconnect and resubscribe.
+    on_connection_lost: Callable[[BaseException], None] | None = None
+
+    def connection_lost(self, error: BaseException) -> None:
+        if self.on_connection_lost is not None:
+            self.on_connection_lost(error)
+
     # @abstractmethod
     # async def stream(self, symbol: str, websocket: WebSocketLike) -> None:
     #     """
@@ -52,11 +63,28 @@ class BasePriceStreamer(ABC):
         pass
 
     @abstractmethod
-    async def subscribe(self, symbol: str, callback: Callable[[dict], Awaitable[None]]) -> None:
-        """Subscribe to price updates for a given symbol."""
+    async def subscribe(self, symbols: list[str], callback: Callable[[dict], Awaitable[None]]) -> None:
+        """
+        Subscribe to price updates for a batch of symbols.
+
+        Providers that accept symbol lists should send the whole batch
+        upstream in as few frames as their API allows.
+        """
         pass
 
     @abstractmethod
-    async def unsubscribe(self, symbol: str) -> None:
-        """Unsubscribe from price updates for a given symbol."""
-        pass
\ No newline at end of file
+    async def unsubscribe(self, symbols: list[str]) -> None:
+        """Unsubscribe from price updates for a batch of symbols."""
+        pass
+
+
+def jittered_backoff(attempt: int, base: float, cap: float) -> float:
+    """Reconnect delay doubling from ``base`` up to ``cap``, jittered to 50-100% so processes don't retry in lockstep."""
+    delay = min(cap, base * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
+
+
+def load_provider_class(provider_name: str) -> Type[BasePriceStreamer]:
+    """Import ``<Name>Streamer`` from ``providers.<name>_streamer``, e.g. "Finnhub"."""
+    module = importlib.import_module(f"providers.{provider_name.lower()}_streamer")
+    return getattr(module, f"{provider_name}Streamer")
@@ -1,69 +1,107 @@
 import asyncio
 import json
 import logging
-import os
-import boto3
 from typing import Callable, Awaitable, cast
 from websockets import connect
 # from websockets.client import ClientConnection
 
+import metrics
+import ssm_config
 from providers.base_provider import BasePriceStreamer, WebSocketLike
 
-AWS_REGION = os.environ.get("AWS_REGION", "us-east-1")
+logger = logging.getLogger(__name__)
 
 class FinnhubStreamer(BasePriceStreamer):
     def __init__(self):
-        self.api_key = self._get_api_key()
-        self.ws_url = f"wss://ws.finnhub.io?token={self.api_key}"
+        self._get_api_key()  # fail fast if the key is missing
         # self.connection: ClientConnection | None = None
         self.connection: WebSocketLike | None = None
-        self.callback = None
-        
+        # symbol -> callbacks; one reader task routes each trade by symbol.
+        self.subscribers: dict[str, list[Callable[[dict], Awaitable[None]]]] = {}
+        self._listener: asyncio.Task | None = None
+
     async def _listen(self):
         if self.connection is None:
             return
-        
+
         try:
             while True:
                 message = await self.connection.recv()
-                data = json.loads(message)
-                if data.get("type") == "trade":
-                    for trade in data.get("data", []):
-                        update = {
-                            "symbol": trade.get("s"),
-                            "price": trade.get("p"),
-                            "timestamp": trade.get("t") // 1_000_000,  # nanoseconds to ms
-                            "volume": trade.get("v")
-                        }
-                        if self.callback:
-                            await self.callback(update)
+                metrics.trace.received()
+                try:
+                    await self._handle_message(message)
+                except Exception:
+                    # One malformed message (or a failing subscriber) must not
+                    # stop the stream for every other symbol.
+                    metrics.UPSTREAM_ERRORS.inc("finnhub")
+                    logger.exception(f"Failed to handle Finnhub message: {message[:200]!r}")
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            # Log errors here
-            pass
-        
+            metrics.UPSTREAM_ERRORS.inc("finnhub")
+            logger.error(f"Finnhub listener stopped: {e!r}")
+            self.connection_lost(e)
+        finally:
+            self._listener = None
+
+    async def _handle_message(self, message: str) -> None:
+        data = json.loads(message)
+        if data.get("type") != "trade":
+            return
+
+        updates = []
+        for trade in data.get("data", []):
+            callbacks = self.subscribers.get(trade.get("s"))
+            if not callbacks:
+                continue
+
+            updates.append((callbacks, {
+                "symbol": trade.get("s"),
+                "price": trade.get("p"),
+                "timestamp": int(trade.get("t")),  # already in ms
+                "volume": trade.get("v")
+            }))
+        metrics.trace.parsed()
+
+        for callbacks, update in updates:
+            for callback in callbacks:
+                await callback(update)
+
     async def connect(self):
         self.connection = cast(WebSocketLike, await connect(self.ws_url))
 
-    async def subscribe(self, symbol: str, callback: Callable[[dict], Awaitable[None]]) -> None:
+    async def subscribe(self, symbols: list[str], callback: Callable[[dict], Awaitable[None]]) -> None:
         if self.connection is None:
             await self.connect()
 
         assert self.connection is not None
-        self.callback = callback
-        await self.connection.send(json.dumps({
-            "type": "subscribe",
-            "symbol": symbol
-        }))
-        asyncio.create_task(self._listen())
-        
+        for symbol in symbols:
+            callbacks = self.subscribers.get(symbol)
+            if callbacks is not None:
+                if callback not in callbacks:
+                    callbacks.append(callback)
+                continue
+
+            # Finnhub only accepts one symbol per subscribe frame. A symbol is
+            # registered once its frame is sent, so a failed one is sent again on retry.
+            await self.connection.send(json.dumps({
+                "type": "subscribe",
+                "symbol": symbol
+            }))
+            self.subscribers[symbol] = [callback]
+
+        # Exactly one reader per connection, started lazily on first subscribe.
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    @property
+    def ws_url(self) -> str:
+        # Built on each connect from the cached key, so a rotated key takes effect on reconnect.
+        return f"wss://ws.finnhub.io?token={self._get_api_key()}"
+
     def _get_api_key(self) -> str:
-        ssm = boto3.client("ssm", region_name=AWS_REGION)
         try:
-            response = ssm.get_parameter(
-                Name="FINNHUB_API_KEY",
-                WithDecryption=True
-            )
-            return response["Parameter"]["Value"]
+            return ssm_config.get_parameter("FINNHUB_API_KEY")
         except Exception as e:
             logging.error("Failed to retrieve Finnhub API key: %s", e)
             raise
@@ -92,16 +130,23 @@ class FinnhubStreamer(BasePriceStreamer):
             except Exception as e:
                 logging.error(f"Streaming error for {symbol} on Finnhub: {e}")
 
-    async def unsubscribe(self, symbol: str) -> None:
-        if self.connection is None:
-            return
+    async def unsubscribe(self, symbols: list[str]) -> None:
+        for symbol in symbols:
+            if symbol not in self.subscribers:
+                continue
 
-        await self.connection.send(json.dumps({
-            "type": "unsubscribe",
-            "symbol": symbol
-        }))
+            if self.connection is not None:
+                await self.connection.send(json.dumps({
+                    "type": "unsubscribe",
+                    "symbol": symbol
+                }))
+            del self.subscribers[symbol]
 
     async def disconnect(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        self.subscribers.clear()
         if self.connection:
             await self.connection.close()
             self.connection = None
@@ -0,0 +1,313 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Callable, Awaitable
+
+import metrics
+from providers.base_provider import BasePriceStreamer, jittered_backoff, load_provider_class
+
+logger = logging.getLogger(__name__)
+
+# Providers kept connected side by side, in order of preference.
+HEDGE_PROVIDERS = os.environ.get("STREAM_HEDGE_PROVIDERS", "Finnhub,TwelveData")
+# A provider is considered stalled after this long without a tick while
+# another provider is still delivering, and is reconnected.
+HEARTBEAT_TIMEOUT_SECONDS = float(os.environ.get("STREAM_HEDGE_HEARTBEAT_SECONDS", "30"))
+# Reconnect delays double from BASE up to MAX; each is jittered to 50-100%
+# so workers don't reconnect in lockstep.
+BACKOFF_BASE_SECONDS = float(os.environ.get("STREAM_HEDGE_BACKOFF_BASE_SECONDS", "1"))
+BACKOFF_MAX_SECONDS = float(os.environ.get("STREAM_HEDGE_BACKOFF_MAX_SECONDS", "60"))
+# Providers stamp trades at different precisions (Finnhub in ms, Twelve Data
+# in whole seconds), so copies of one trade match within this window.
+DEDUPE_WINDOW_MS = int(os.environ.get("STREAM_HEDGE_DEDUPE_WINDOW_MS", "1000"))
+# Forwarded ticks remembered per symbol for matching copies.
+DEDUPE_HISTORY = 64
+
+HEDGE_TICKS = metrics.registry.labeled_counter(
+    "stream_hedge_ticks_total", "Ticks forwarded from each hedged provider (first to arrive)", "provider"
+)
+HEDGE_DUPLICATES = metrics.registry.counter(
+    "stream_hedge_duplicates_total", "Hedged ticks dropped as duplicate or older than one already forwarded"
+)
+HEDGE_RECONNECTS = metrics.registry.labeled_counter(
+    "stream_hedge_reconnects_total", "Hedged provider reconnect attempts", "provider"
+)
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE_SECONDS, cap: float = BACKOFF_MAX_SECONDS) -> float:
+    return jittered_backoff(attempt, base, cap)
+
+
+class HedgeLeg:
+    """One underlying provider connection and the symbols subscribed on it."""
+
+    def __init__(self, name: str, streamer: BasePriceStreamer, hedge: "HedgedStreamer"):
+        self.name = name
+        self.streamer = streamer
+        self.hedge = hedge
+        self.symbols: set[str] = set()
+        self.up = False
+        # Monotonic times of the last tick and of the last (re)connect.
+        self.last_tick: float | None = None
+        self.up_since = 0.0
+        self.attempts = 0
+        self.reconnecting: asyncio.Task | None = None
+        # The provider reports its listener exiting, even when every leg is quiet.
+        streamer.on_connection_lost = self.connection_lost
+
+    async def on_tick(self, update: dict) -> None:
+        await self.hedge._on_tick(self, update)
+
+    def connection_lost(self, error: BaseException) -> None:
+        self.hedge._leg_lost(self, error)
+
+    def mark_up(self) -> None:
+        self.up = True
+        self.up_since = time.monotonic()
+
+    def ticked_within(self, seconds: float, now: float) -> bool:
+        return self.last_tick is not None and now - self.last_tick < seconds
+
+    def quiet_for(self, now: float) -> float:
+        """Seconds since the last tick, counting a fresh connection as a tick."""
+        return now - max(self.last_tick or 0.0, self.up_since)
+
+
+class HedgedStreamer(BasePriceStreamer):
+    """
+    Keeps several providers (by default Finnhub and Twelve Data) connected
+    at once and subscribes every symbol on all of them, so one stalling
+    provider doesn't stop the stream.
+
+    For each symbol the first provider to deliver a tick wins. A tick from
+    one provider is a copy of a tick already forwarded from another if it
+    has the same price and a timestamp within ``dedupe_window_ms``, which
+    absorbs the providers' different timestamp precision; the copy is
+    dropped and each forwarded tick absorbs at most one copy, so genuine
+    repeat trades at the same price still go out. Ticks older than the
+    newest forwarded one by more than the window are dropped as stale.
+
+    A provider that fails to connect or subscribe, loses its connection,
+    or goes ``heartbeat_timeout`` seconds without a tick while another
+    provider is still delivering, is disconnected and brought back with
+    jittered exponential backoff, then resubscribed to the current symbol
+    set. The other providers keep streaming in the meantime. When every
+    provider is quiet (e.g. outside market hours) only dropped connections
+    are reconnected.
+
+    Selected by setting the stream provider (SSM or STREAM_PROVIDER) to
+    ``Hedged``; the underlying providers come from STREAM_HEDGE_PROVIDERS.
+    """
+
+    def __init__(
+        self,
+        providers: list[str] | None = None,
+        heartbeat_timeout: float = HEARTBEAT_TIMEOUT_SECONDS,
+        dedupe_window_ms: int = DEDUPE_WINDOW_MS,
+    ):
+        names = providers or [p.strip() for p in HEDGE_PROVIDERS.split(",") if p.strip()]
+        self.heartbeat_timeout = heartbeat_timeout
+        self.dedupe_window_ms = dedupe_window_ms
+        self.subscribers: dict[str, list[Callable[[dict], Awaitable[None]]]] = {}
+        # symbol -> recent forwarded (timestamp, price, leg) not yet matched by a copy
+        self._recent: dict[str, deque] = {}
+        # symbol -> newest timestamp forwarded
+        self._newest: dict[str, int] = {}
+        self.legs: list[HedgeLeg] = []
+        for name in names:
+            try:
+                self.legs.append(HedgeLeg(name, load_provider_class(name)(), self))
+            except Exception as e:
+                # e.g. a missing API key; hedge with whatever is available.
+                logger.error(f"Hedged provider {name} unavailable: {e}")
+        if not self.legs:
+            raise ValueError(f"No usable providers in {names}")
+        self._watchdog: asyncio.Task | None = None
+        self._connected = False
+
+    async def connect(self) -> None:
+        if self._connected:
+            return
+        self._connected = True
+        results = await asyncio.gather(*(leg.streamer.connect() for leg in self.legs), return_exceptions=True)
+        for leg, result in zip(self.legs, results):
+            if isinstance(result, BaseException):
+                self._leg_failed(leg, result)
+            else:
+                leg.mark_up()
+        self._watchdog = asyncio.create_task(self._watch())
+
+    async def _on_tick(self, leg: HedgeLeg, update: dict) -> None:
+        leg.last_tick = time.monotonic()
+        leg.attempts = 0
+
+        symbol = update.get("symbol")
+        if self._is_duplicate(leg, symbol, update.get("timestamp") or 0, update.get("price")):
+            HEDGE_DUPLICATES.inc()
+            return
+
+        HEDGE_TICKS.inc(leg.name)
+        for callback in self.subscribers.get(symbol, ()):
+            await callback(update)
+
+    def _is_duplicate(self, leg: HedgeLeg, symbol: str, timestamp: int, price) -> bool:
+        """Whether a tick is stale or another provider's copy of one already forwarded; records it if not."""
+        window = self.dedupe_window_ms
+        newest = self._newest.get(symbol)
+        if newest is not None and timestamp < newest - window:
+            return True
+
+        recent = self._recent.get(symbol)
+        if recent is None:
+            recent = self._recent[symbol] = deque(maxlen=DEDUPE_HISTORY)
+        for i, (seen_at, seen_price, source) in enumerate(recent):
+            if source is not leg and seen_price == price and abs(seen_at - timestamp) <= window:
+                # Each forwarded tick absorbs one copy per arrival.
+                del recent[i]
+                return True
+
+        recent.append((timestamp, price, leg))
+        if newest is None or timestamp > newest:
+            self._newest[symbol] = timestamp
+        return False
+
+    async def subscribe(self, symbols: list[str], callback: Callable[[dict], Awaitable[None]]) -> None:
+        await self.connect()
+
+        new_symbols = []
+        for symbol in symbols:
+            callbacks = self.subscribers.get(symbol)
+            if callbacks is not None:
+                if callback not in callbacks:
+                    callbacks.append(callback)
+                continue
+            self.subscribers[symbol] = [callback]
+            new_symbols.append(symbol)
+
+        if new_symbols:
+            # Legs that are down pick the symbols up when they resync.
+            await asyncio.gather(*(self._subscribe_leg(leg, new_symbols) for leg in self.legs if leg.up))
+
+    async def _subscribe_leg(self, leg: HedgeLeg, symbols: list[str]) -> None:
+        try:
+            await leg.streamer.subscribe(symbols, leg.on_tick)
+            leg.symbols.update(symbols)
+        except Exception as e:
+            self._leg_failed(leg, e)
+
+    async def unsubscribe(self, symbols: list[str]) -> None:
+        removed = [s for s in symbols if self.subscribers.pop(s, None) is not None]
+        for symbol in removed:
+            self._recent.pop(symbol, None)
+            self._newest.pop(symbol, None)
+        if removed:
+            await asyncio.gather(*(self._unsubscribe_leg(leg, removed) for leg in self.legs if leg.up))
+
+    async def _unsubscribe_leg(self, leg: HedgeLeg, symbols: list[str]) -> None:
+        symbols = [s for s in symbols if s in leg.symbols]
+        if not symbols:
+            return
+        leg.symbols.difference_update(symbols)
+        try:
+            await leg.streamer.unsubscribe(symbols)
+        except Exception as e:
+            self._leg_failed(leg, e)
+
+    def _leg_failed(self, leg: HedgeLeg, error: BaseException) -> None:
+        logger.warning(f"Hedged provider {leg.name} failed: {error!r}")
+        metrics.UPSTREAM_ERRORS.inc(leg.name.lower())
+        self._restart(leg)
+
+    def _leg_lost(self, leg: HedgeLeg, error: BaseException) -> None:
+        # Legs already down are being reconnected, or were disconnected on purpose.
+        if leg.up:
+            self._leg_failed(leg, error)
+
+    def _restart(self, leg: HedgeLeg) -> None:
+        leg.up = False
+        if leg.reconnecting is None:
+            leg.reconnecting = asyncio.create_task(self._reconnect(leg))
+
+    async def _reconnect(self, leg: HedgeLeg) -> None:
+        try:
+            while True:
+                delay = backoff_delay(leg.attempts)
+                leg.attempts += 1
+                logger.info(f"Reconnecting {leg.name} in {delay:.1f}s (attempt {leg.attempts})")
+                await asyncio.sleep(delay)
+                HEDGE_RECONNECTS.inc(leg.name)
+                try:
+                    await leg.streamer.disconnect()
+                except Exception as e:
+                    logger.warning(f"Error closing {leg.name}: {e!r}")
+                leg.symbols.clear()
+                try:
+                    await leg.streamer.connect()
+                    await self._resync(leg)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Reconnecting {leg.name} failed: {e!r}")
+                    continue
+
+                leg.mark_up()
+                logger.info(f"{leg.name} reconnected with {len(leg.symbols)} symbols")
+                return
+        finally:
+            leg.reconnecting = None
+
+    async def _resync(self, leg: HedgeLeg) -> None:
+        """Bring a reconnecting leg's subscriptions in line with the current symbol set."""
+        # Subscriptions may change while we await the provider, so repeat until
+        # nothing is left to do; the leg goes live without another await.
+        while True:
+            wanted = set(self.subscribers)
+            missing = sorted(wanted - leg.symbols)
+            extra = sorted(leg.symbols - wanted)
+            if not (missing or extra):
+                return
+            if extra:
+                leg.symbols.difference_update(extra)
+                await leg.streamer.unsubscribe(extra)
+            if missing:
+                await leg.streamer.subscribe(missing, leg.on_tick)
+                leg.symbols.update(missing)
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_timeout / 2)
+            self.check_heartbeats(time.monotonic())
+
+    def check_heartbeats(self, now: float) -> None:
+        """Restart legs that went quiet while another leg kept ticking."""
+        if not self.subscribers:
+            return
+        live = [leg for leg in self.legs if leg.up and leg.ticked_within(self.heartbeat_timeout, now)]
+        if not live:
+            return
+        for leg in self.legs:
+            if leg.up and leg.quiet_for(now) >= self.heartbeat_timeout:
+                logger.warning(
+                    f"{leg.name} sent no ticks for {leg.quiet_for(now):.0f}s while "
+                    f"{', '.join(l.name for l in live)} did; failing over"
+                )
+                metrics.UPSTREAM_ERRORS.inc(leg.name.lower())
+                self._restart(leg)
+
+    async def disconnect(self) -> None:
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            self._watchdog = None
+        for leg in self.legs:
+            if leg.reconnecting is not None:
+                leg.reconnecting.cancel()
+                leg.reconnecting = None
+            leg.up = False
+            leg.symbols.clear()
+        await asyncio.gather(*(leg.streamer.disconnect() for leg in self.legs), return_exceptions=True)
+        self.subscribers.clear()
+        self._recent.clear()
+        self._newest.clear()
+        self._connected = False
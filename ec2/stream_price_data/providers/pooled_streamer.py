@@ -0,0 +1,289 @@
+import asyncio
+import itertools
+import logging
+import math
+import os
+from typing import Callable, Awaitable
+
+import metrics
+from providers.base_provider import BasePriceStreamer, jittered_backoff, load_provider_class
+
+logger = logging.getLogger(__name__)
+
+# Provider whose connections are pooled.
+POOL_PROVIDER = os.environ.get("STREAM_POOL_PROVIDER", "TwelveData")
+# Symbols per upstream connection. Limits depend on the provider plan, so
+# these are conservative defaults; STREAM_POOL_SYMBOLS_PER_CONNECTION overrides.
+DEFAULT_SYMBOLS_PER_CONNECTION = {"Finnhub": 50, "TwelveData": 100}
+POOL_SYMBOLS_PER_CONNECTION = os.environ.get("STREAM_POOL_SYMBOLS_PER_CONNECTION")
+POOL_MAX_CONNECTIONS = int(os.environ.get("STREAM_POOL_MAX_CONNECTIONS", "20"))
+# Only merge connections once the rest would be at most this full, so
+# subscriptions hovering around a boundary don't move symbols back and forth.
+CONSOLIDATE_BELOW_FILL = 0.8
+# Retry delays for a dropped connection's symbols that could not be placed again.
+RECONNECT_BASE_SECONDS = 1.0
+RECONNECT_MAX_SECONDS = 60.0
+
+
+class PoolConnection:
+    """One provider instance, i.e. one upstream socket with its own reader task."""
+
+    def __init__(self, number: int, streamer: BasePriceStreamer, pool: "PooledStreamer"):
+        self.number = number
+        self.streamer = streamer
+        self.pool = pool
+        self.symbols: set[str] = set()
+        # The provider reports its reader exiting, so the pool can replace the connection.
+        streamer.on_connection_lost = self.connection_lost
+
+    @property
+    def name(self) -> str:
+        return f"{self.pool.provider}#{self.number}"
+
+    async def on_tick(self, update: dict) -> None:
+        await self.pool._on_tick(self, update)
+
+    def connection_lost(self, error: BaseException) -> None:
+        self.pool._connection_lost(self, error)
+
+
+class PooledStreamer(BasePriceStreamer):
+    """
+    Spreads subscribed symbols over several connections to one provider,
+    at most ``symbols_per_connection`` each, so the service is not bound by
+    a provider's per-socket symbol or message limits.
+
+    Every connection is a separate provider instance (``FinnhubStreamer``,
+    ``TwelveDataStreamer``, ...) with its own websocket and reader task.
+    New symbols go to the least-loaded connections, opening just enough
+    new ones for the total; symbols that don't fit under
+    ``max_connections`` wait and are placed when capacity frees up. As
+    symbols are unsubscribed, empty connections are closed and, once the
+    rest have comfortable room, the least-loaded connection is merged into
+    the others. Symbols are subscribed on their new connection before the
+    old one is closed, and ticks are only forwarded from a symbol's current
+    connection, so a move neither drops nor duplicates ticks.
+
+    A connection whose socket closes, or whose subscribe or unsubscribe
+    fails, is closed and its symbols are placed again on the others (or a
+    new one). After a dropped socket, symbols that still can't be placed
+    are retried with jittered exponential backoff.
+
+    Selected by setting the stream provider to ``Pooled``; the pooled
+    provider comes from STREAM_POOL_PROVIDER.
+    """
+
+    def __init__(
+        self,
+        provider: str | None = None,
+        symbols_per_connection: int | None = None,
+        max_connections: int = POOL_MAX_CONNECTIONS,
+    ):
+        self.provider = provider or POOL_PROVIDER
+        self.provider_class = load_provider_class(self.provider)
+        self.symbols_per_connection = symbols_per_connection or int(
+            POOL_SYMBOLS_PER_CONNECTION or DEFAULT_SYMBOLS_PER_CONNECTION.get(self.provider, 50)
+        )
+        self.max_connections = max_connections
+        self.subscribers: dict[str, list[Callable[[dict], Awaitable[None]]]] = {}
+        self.owner: dict[str, PoolConnection] = {}
+        self.connections: list[PoolConnection] = []
+        # Symbols not on any connection yet, in subscription order.
+        self.pending: dict[str, None] = {}
+        self._numbers = itertools.count(1)
+        self._lock = asyncio.Lock()
+        self._replacing: set[asyncio.Task] = set()
+        # Fail fast (e.g. on a missing API key); the instance becomes the first connection.
+        self.connections.append(PoolConnection(next(self._numbers), self.provider_class(), self))
+
+        registry = metrics.registry
+        registry.gauge("stream_pool_connections", "Open pooled upstream connections", lambda: len(self.connections))
+        registry.gauge("stream_pool_pending_symbols", "Symbols waiting for room on a pooled connection",
+                       lambda: len(self.pending))
+
+    async def connect(self) -> None:
+        # Connections open on demand as symbols are placed on them.
+        return
+
+    async def _on_tick(self, connection: PoolConnection, update: dict) -> None:
+        symbol = update.get("symbol")
+        if self.owner.get(symbol) is not connection:
+            # Left over from a connection the symbol is moving off.
+            return
+        for callback in self.subscribers.get(symbol, ()):
+            await callback(update)
+
+    async def subscribe(self, symbols: list[str], callback: Callable[[dict], Awaitable[None]]) -> None:
+        async with self._lock:
+            for symbol in symbols:
+                callbacks = self.subscribers.get(symbol)
+                if callbacks is not None:
+                    if callback not in callbacks:
+                        callbacks.append(callback)
+                    continue
+                self.subscribers[symbol] = [callback]
+                self.pending[symbol] = None
+            await self._place_pending()
+
+    async def unsubscribe(self, symbols: list[str]) -> None:
+        async with self._lock:
+            by_connection: dict[PoolConnection, list[str]] = {}
+            for symbol in symbols:
+                if self.subscribers.pop(symbol, None) is None:
+                    continue
+                self.pending.pop(symbol, None)
+                connection = self.owner.pop(symbol, None)
+                if connection is not None:
+                    connection.symbols.discard(symbol)
+                    by_connection.setdefault(connection, []).append(symbol)
+
+            await asyncio.gather(*(
+                self._unsubscribe_on(connection, removed) for connection, removed in by_connection.items()
+            ))
+            await self._rebalance()
+
+    def _with_room(
+        self, planned: dict[PoolConnection, list[str]], exclude: PoolConnection | None = None
+    ) -> PoolConnection | None:
+        """Least-loaded connection below the limit, counting symbols already planned for it."""
+        def load(connection: PoolConnection) -> int:
+            return len(connection.symbols) + len(planned.get(connection, ()))
+
+        candidates = [c for c in self.connections if c is not exclude and load(c) < self.symbols_per_connection]
+        return min(candidates, key=load) if candidates else None
+
+    def _open_connections(self, count: int) -> None:
+        """Grow the pool to ``count`` connections (capped at ``max_connections``)."""
+        while len(self.connections) < min(count, self.max_connections):
+            self.connections.append(PoolConnection(next(self._numbers), self.provider_class(), self))
+
+    async def _place_pending(self) -> None:
+        # One retry covers symbols pushed back by a connection that failed on the first pass.
+        for _ in range(2):
+            if not self.pending:
+                return
+            self._open_connections(math.ceil((len(self.owner) + len(self.pending)) / self.symbols_per_connection))
+
+            planned: dict[PoolConnection, list[str]] = {}
+            for symbol in list(self.pending):
+                connection = self._with_room(planned)
+                if connection is None:
+                    break
+                planned.setdefault(connection, []).append(symbol)
+                del self.pending[symbol]
+
+            await asyncio.gather(*(
+                self._subscribe_on(connection, placed) for connection, placed in planned.items()
+            ))
+
+        if self.pending:
+            logger.warning(
+                f"{len(self.pending)} symbols waiting for room on {self.provider} connections "
+                f"({len(self.connections)} x {self.symbols_per_connection} symbols)"
+            )
+
+    async def _subscribe_on(self, connection: PoolConnection, symbols: list[str]) -> bool:
+        try:
+            await connection.streamer.subscribe(symbols, connection.on_tick)
+        except Exception as e:
+            # Symbols being moved stay on the connection that still owns them.
+            self.pending.update(dict.fromkeys(s for s in symbols if s not in self.owner))
+            await self._drop(connection, e)
+            return False
+
+        connection.symbols.update(symbols)
+        for symbol in symbols:
+            previous = self.owner.get(symbol)
+            if previous is not None and previous is not connection:
+                previous.symbols.discard(symbol)
+            self.owner[symbol] = connection
+        return True
+
+    async def _unsubscribe_on(self, connection: PoolConnection, symbols: list[str]) -> None:
+        try:
+            await connection.streamer.unsubscribe(symbols)
+        except Exception as e:
+            await self._drop(connection, e)
+
+    async def _drop(self, connection: PoolConnection, error: BaseException) -> None:
+        """Close a failed connection and queue its symbols to be placed again."""
+        logger.error(f"{connection.name} failed with {len(connection.symbols)} symbols: {error!r}")
+        metrics.UPSTREAM_ERRORS.inc(self.provider.lower())
+        for symbol in connection.symbols:
+            if self.owner.get(symbol) is connection:
+                del self.owner[symbol]
+                self.pending[symbol] = None
+        connection.symbols.clear()
+        await self._close(connection)
+
+    def _connection_lost(self, connection: PoolConnection, error: BaseException) -> None:
+        task = asyncio.create_task(self._replace(connection, error))
+        self._replacing.add(task)
+        task.add_done_callback(self._replacing.discard)
+
+    async def _replace(self, connection: PoolConnection, error: BaseException) -> None:
+        """Drop a connection whose socket closed and place its symbols again until they fit."""
+        attempt = 0
+        while True:
+            async with self._lock:
+                if attempt == 0:
+                    if connection not in self.connections:
+                        # Already dropped or closed.
+                        return
+                    await self._drop(connection, error)
+                await self._place_pending()
+                # With room for another connection, anything still pending failed to connect.
+                if not self.pending or len(self.connections) >= self.max_connections:
+                    return
+            await asyncio.sleep(jittered_backoff(attempt, RECONNECT_BASE_SECONDS, RECONNECT_MAX_SECONDS))
+            attempt += 1
+
+    async def _close(self, connection: PoolConnection) -> None:
+        if connection in self.connections:
+            self.connections.remove(connection)
+        try:
+            await connection.streamer.disconnect()
+        except Exception as e:
+            logger.warning(f"Error closing {connection.name}: {e!r}")
+
+    async def _rebalance(self) -> None:
+        for connection in [c for c in self.connections if not c.symbols]:
+            await self._close(connection)
+
+        await self._place_pending()
+
+        # Merge the least-loaded connection into the others while they'd stay comfortably below the limit.
+        while len(self.connections) > 1 and not self.pending:
+            spare = (len(self.connections) - 1) * self.symbols_per_connection * CONSOLIDATE_BELOW_FILL
+            if len(self.owner) > spare:
+                return
+
+            source = min(self.connections, key=lambda c: len(c.symbols))
+            planned: dict[PoolConnection, list[str]] = {}
+            for symbol in sorted(source.symbols):
+                target = self._with_room(planned, exclude=source)
+                assert target is not None  # guaranteed by the fill check above
+                planned.setdefault(target, []).append(symbol)
+            count = len(source.symbols)
+
+            results = await asyncio.gather(*(
+                self._subscribe_on(target, symbols) for target, symbols in planned.items()
+            ))
+            if not all(results):
+                # Symbols that failed to move are still owned by the source, which
+                # stays open; only the failed target's own symbols are pending.
+                await self._place_pending()
+                return
+
+            logger.info(f"Merged {count} symbols from {source.name} into other connections")
+            await self._close(source)
+
+    async def disconnect(self) -> None:
+        for task in list(self._replacing):
+            task.cancel()
+        async with self._lock:
+            await asyncio.gather(*(self._close(c) for c in list(self.connections)))
+            self.connections.clear()
+            self.subscribers.clear()
+            self.owner.clear()
+            self.pending.clear()
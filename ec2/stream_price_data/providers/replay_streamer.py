@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Awaitable
+
+import metrics
+from providers.base_provider import BasePriceStreamer
+from tick_recorder import read_ticks, recording_files
+
+logger = logging.getLogger(__name__)
+
+# Recording file or directory to replay.
+REPLAY_PATH = os.environ.get("STREAM_REPLAY_PATH", "recordings")
+# Playback rate: "1" for real time, "10" for ten times faster, "max" for no waiting.
+REPLAY_SPEED = os.environ.get("STREAM_REPLAY_SPEED", "1")
+# Start over at the end of the recording instead of going quiet.
+REPLAY_LOOP = os.environ.get("STREAM_REPLAY_LOOP", "0") == "1"
+# At max speed, hand control back to the event loop every this many ticks.
+MAX_SPEED_YIELD_EVERY = 256
+
+
+def parse_speed(value: str | float) -> float:
+    """Speed multiplier; ``"max"`` (or 0) means replay without waiting."""
+    if str(value).lower() == "max":
+        return 0.0
+    speed = float(value)
+    if speed < 0:
+        raise ValueError("replay speed must be positive or 'max'")
+    return speed
+
+
+class ReplayStreamer(BasePriceStreamer):
+    """
+    Plays back recordings made by ``TickRecorder`` as if they came from a
+    live provider, so load and latency problems can be reproduced offline
+    without SSM or network access.
+
+    Ticks keep their original inter-arrival times scaled by ``speed``;
+    each day's file starts playing immediately after the previous one.
+    Only subscribed symbols are delivered. When looping, timestamps are
+    shifted forward each pass so they keep increasing.
+    """
+
+    def __init__(self, path: str | None = None, speed: str | float | None = None, loop: bool | None = None):
+        self.path = path or REPLAY_PATH
+        self.speed = parse_speed(REPLAY_SPEED if speed is None else speed)
+        self.loop = REPLAY_LOOP if loop is None else loop
+        self.subscribers: dict[str, list[Callable[[dict], Awaitable[None]]]] = {}
+        self._player: asyncio.Task | None = None
+        self._files: list[str] = []
+        self._first_timestamp = 0
+
+    async def connect(self) -> None:
+        self._files = recording_files(self.path)
+        if not self._files:
+            raise FileNotFoundError(f"No tick recordings under {self.path}")
+        self._first_timestamp = next((t["timestamp"] for t in read_ticks(self._files[0])), 0)
+
+    async def _play(self) -> None:
+        offset = 0
+        try:
+            while True:
+                last = None
+                for path in self._files:
+                    last = await self._play_file(path, offset) or last
+                if not self.loop or last is None:
+                    break
+                # Next pass continues 1 ms after the last tick.
+                offset = last + 1 - self._first_timestamp
+            logger.info("Replay finished")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Replay stopped: {e}")
+
+    async def _play_file(self, path: str, offset: int) -> int | None:
+        """Replay one file; returns the last (shifted) timestamp played."""
+        start_wall = time.monotonic()
+        start_tick = None
+        last = None
+        for n, tick in enumerate(read_ticks(path)):
+            if start_tick is None:
+                start_tick = tick["timestamp"]
+
+            if self.speed:
+                due = start_wall + (tick["timestamp"] - start_tick) / 1000 / self.speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif n % MAX_SPEED_YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+
+            metrics.trace.received()
+            tick["timestamp"] += offset
+            last = tick["timestamp"]
+            for callback in self.subscribers.get(tick["symbol"], ()):
+                await callback(tick)
+        return last
+
+    async def subscribe(self, symbols: list[str], callback: Callable[[dict], Awaitable[None]]) -> None:
+        if not self._files:
+            await self.connect()
+
+        for symbol in symbols:
+            callbacks = self.subscribers.setdefault(symbol, [])
+            if callback not in callbacks:
+                callbacks.append(callback)
+
+        # Playback starts with the first subscription and runs once for every symbol.
+        if self._player is None:
+            self._player = asyncio.create_task(self._play())
+
+    async def unsubscribe(self, symbols: list[str]) -> None:
+        for symbol in symbols:
+            self.subscribers.pop(symbol, None)
+
+    async def disconnect(self) -> None:
+        if self._player is not None:
+            self._player.cancel()
+            self._player = None
+        self.subscribers.clear()
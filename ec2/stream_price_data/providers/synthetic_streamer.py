@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Callable, Awaitable
+
+import metrics
+from providers.base_provider import BasePriceStreamer
+
+logger = logging.getLogger(__name__)
+
+# Total ticks per second across all subscribed symbols.
+SYNTHETIC_RATE = float(os.environ.get("STREAM_SYNTHETIC_RATE", "1000"))
+# Generator wake-up interval; ticks due since the last wake-up go out together.
+SYNTHETIC_STEP_SECONDS = 0.001
+SYNTHETIC_SEED = int(os.environ.get("STREAM_SYNTHETIC_SEED", "1"))
+
+
+class SyntheticStreamer(BasePriceStreamer):
+    """
+    Generates random-walk ticks for subscribed symbols at a fixed total
+    rate, for benchmarks and local testing without a provider account.
+
+    Besides the normal fields each tick carries ``sent_us`` (wall-clock
+    microseconds at generation), so a benchmark client can measure
+    tick-to-client latency.
+    """
+
+    def __init__(self, rate: float | None = None, seed: int = SYNTHETIC_SEED):
+        self.rate = SYNTHETIC_RATE if rate is None else rate
+        self.subscribers: dict[str, list[Callable[[dict], Awaitable[None]]]] = {}
+        self.prices: dict[str, float] = {}
+        self._symbols: list[str] = []
+        self._random = random.Random(seed)
+        self._generator: asyncio.Task | None = None
+
+    async def connect(self) -> None:
+        if self._generator is None:
+            self._generator = asyncio.create_task(self._generate())
+
+    async def _generate(self) -> None:
+        started = time.monotonic()
+        emitted = 0
+        try:
+            while True:
+                await asyncio.sleep(SYNTHETIC_STEP_SECONDS)
+                due = int((time.monotonic() - started) * self.rate)
+                if not self._symbols:
+                    # Don't build up a backlog while nobody is subscribed.
+                    emitted = due
+                    continue
+                while emitted < due:
+                    emitted += 1
+                    await self._emit(self._random.choice(self._symbols))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Synthetic generator stopped: {e}")
+
+    async def _emit(self, symbol: str) -> None:
+        metrics.trace.received()
+        price = self.prices[symbol] = round(self.prices[symbol] * (1 + self._random.gauss(0, 0.0005)), 4)
+        now_us = time.time_ns() // 1000
+        update = {
+            "symbol": symbol,
+            "price": price,
+            "volume": self._random.randint(1, 500),
+            "timestamp": now_us // 1000,
+            "sent_us": now_us,
+        }
+        metrics.trace.parsed()
+        for callback in self.subscribers.get(symbol, ()):
+            await callback(update)
+
+    async def subscribe(self, symbols: list[str], callback: Callable[[dict], Awaitable[None]]) -> None:
+        await self.connect()
+        for symbol in symbols:
+            callbacks = self.subscribers.get(symbol)
+            if callbacks is None:
+                self.subscribers[symbol] = [callback]
+                self.prices.setdefault(symbol, self._random.uniform(20, 500))
+            elif callback not in callbacks:
+                callbacks.append(callback)
+        self._symbols = list(self.subscribers)
+
+    async def unsubscribe(self, symbols: list[str]) -> None:
+        for symbol in symbols:
+            self.subscribers.pop(symbol, None)
+        self._symbols = list(self.subscribers)
+
+    async def disconnect(self) -> None:
+        if self._generator is not None:
+            self._generator.cancel()
+            self._generator = None
+        self.subscribers.clear()
+        self._symbols = []
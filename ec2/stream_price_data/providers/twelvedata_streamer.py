@@ -1,30 +1,127 @@
+import asyncio
 import json
 import logging
-import os
-import boto3
+from typing import Callable, Awaitable, cast
 from websockets import connect
 
-from providers.base_provider import BasePriceStreamer
+import metrics
+import ssm_config
+from providers.base_provider import BasePriceStreamer, WebSocketLike
 
-AWS_REGION = os.environ.get("AWS_REGION", "us-east-1")
+logger = logging.getLogger(__name__)
 
 class TwelveDataStreamer(BasePriceStreamer):
     def __init__(self):
-        self.api_key = self._get_api_key()
-        self.ws_url = f"wss://ws.twelvedata.com/v1/quotes/price?apikey={self.api_key}"
+        self._get_api_key()  # fail fast if the key is missing
+        self.connection: WebSocketLike | None = None
+        # symbol -> callbacks; one reader task routes each price event by symbol.
+        self.subscribers: dict[str, list[Callable[[dict], Awaitable[None]]]] = {}
+        self._listener: asyncio.Task | None = None
+
+    @property
+    def ws_url(self) -> str:
+        # Built on each connect from the cached key, so a rotated key takes effect on reconnect.
+        return f"wss://ws.twelvedata.com/v1/quotes/price?apikey={self._get_api_key()}"
 
     def _get_api_key(self) -> str:
-        ssm = boto3.client("ssm", region_name=AWS_REGION)
         try:
-            response = ssm.get_parameter(
-                Name="TWELVE_DATA_API_KEY",
-                WithDecryption=True
-            )
-            return response["Parameter"]["Value"]
+            return ssm_config.get_parameter("TWELVE_DATA_API_KEY")
         except Exception as e:
             logging.error("Failed to retrieve Twelve Data API key: %s", e)
             raise
 
+    async def _listen(self):
+        if self.connection is None:
+            return
+
+        try:
+            while True:
+                message = await self.connection.recv()
+                metrics.trace.received()
+                try:
+                    await self._handle_message(message)
+                except Exception:
+                    metrics.UPSTREAM_ERRORS.inc("twelvedata")
+                    logger.exception(f"Failed to handle Twelve Data message: {message[:200]!r}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            metrics.UPSTREAM_ERRORS.inc("twelvedata")
+            logger.error(f"Twelve Data listener stopped: {e!r}")
+            self.connection_lost(e)
+        finally:
+            self._listener = None
+
+    async def _handle_message(self, message: str) -> None:
+        data = json.loads(message)
+        if data.get("event") != "price":
+            return
+
+        callbacks = self.subscribers.get(data.get("symbol"))
+        if not callbacks:
+            return
+
+        # Normalize to a fixed frontend format (timestamp in ms). Price events
+        # carry no trade size, only the running session total.
+        update = {
+            "symbol": data["symbol"],
+            "price": data["price"],
+            "volume": None,
+            "day_volume": data.get("day_volume"),
+            "timestamp": data["timestamp"] * 1000,
+        }
+        metrics.trace.parsed()
+        for callback in callbacks:
+            await callback(update)
+
+    async def connect(self) -> None:
+        self.connection = cast(WebSocketLike, await connect(self.ws_url))
+
+    async def subscribe(self, symbols: list[str], callback: Callable[[dict], Awaitable[None]]) -> None:
+        if self.connection is None:
+            await self.connect()
+
+        assert self.connection is not None
+        new_symbols = [s for s in dict.fromkeys(symbols) if s not in self.subscribers]
+        if new_symbols:
+            # Twelve Data accepts a comma-separated list, so a whole batch is one frame.
+            await self.connection.send(json.dumps({
+                "action": "subscribe",
+                "params": { "symbols": ",".join(new_symbols) }
+            }))
+            logger.info(f"Subscribed to {len(new_symbols)} symbols on Twelve Data")
+
+        # Registered only once the frame is sent, so a failed batch is sent again in full on retry.
+        for symbol in symbols:
+            callbacks = self.subscribers.setdefault(symbol, [])
+            if callback not in callbacks:
+                callbacks.append(callback)
+
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def unsubscribe(self, symbols: list[str]) -> None:
+        removed = [s for s in dict.fromkeys(symbols) if s in self.subscribers]
+        if not removed:
+            return
+
+        if self.connection is not None:
+            await self.connection.send(json.dumps({
+                "action": "unsubscribe",
+                "params": { "symbols": ",".join(removed) }
+            }))
+        for symbol in removed:
+            del self.subscribers[symbol]
+
+    async def disconnect(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        self.subscribers.clear()
+        if self.connection:
+            await self.connection.close()
+            self.connection = None
+
     async def stream_price(self, symbol: str, websocket) -> None:
         async with connect(self.ws_url) as provider_ws:
             await provider_ws.send(json.dumps({
@@ -0,0 +1 @@
+../../lambda_code/ssm_config.py
\ No newline at end of file
@@ -1,14 +1,21 @@
+import argparse
 import asyncio
 import logging
+import multiprocessing
 import os
-import importlib
-from typing import Type
-from providers.base_provider import BasePriceStreamer
+import signal
+import time
+from multiprocessing.connection import wait
+from typing import Callable, Type
+from providers.base_provider import BasePriceStreamer, load_provider_class
 
-import boto3
 from websockets import serve
 
+import metrics
+import ssm_config
 from client_handler import handle_client_connection
+from subscription_hub import SubscriptionHub
+from tick_recorder import TickRecorder
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -17,38 +24,154 @@ logger = logging.getLogger(__name__)
 # AWS SSM parameter name for selecting provider
 SSM_PROVIDER_PARAM = "/tickerquote/stream_provider"
 DEFAULT_PROVIDER = "TwelveData"  # fallback
+# Everything the server may read from SSM, loaded in one GetParameters call at startup.
+SSM_PARAMS = [SSM_PROVIDER_PARAM, "TWELVE_DATA_API_KEY", "FINNHUB_API_KEY"]
 
-def get_stream_provider_class() -> Type[BasePriceStreamer]:
-    """Fetch the provider name from AWS SSM and dynamically import the provider class."""
-    ssm = boto3.client("ssm", region_name=os.environ.get("AWS_REGION", "us-east-1"))
-    try:
-        response = ssm.get_parameter(Name=SSM_PROVIDER_PARAM)
-        provider_name = response["Parameter"]["Value"]
-    except Exception as e:
-        logger.warning(f"Could not fetch provider from SSM: {e}. Using default '{DEFAULT_PROVIDER}'")
-        provider_name = DEFAULT_PROVIDER
+# Provider name that bypasses SSM, e.g. "Replay" to serve a recording offline.
+PROVIDER_OVERRIDE = os.environ.get("STREAM_PROVIDER")
+# Providers that need no API keys, so startup skips SSM entirely.
+OFFLINE_PROVIDERS = {"Replay", "Synthetic"}
+# Directory to record upstream ticks into; unset disables recording.
+RECORD_DIR = os.environ.get("STREAM_RECORD_DIR")
 
-    module_path = f"providers.{provider_name.lower()}_streamer"
-    class_name = f"{provider_name}Streamer"
+PORT = int(os.environ.get("STREAM_PORT", "8080"))
+# Number of worker processes; >1 runs a supervisor with SO_REUSEPORT workers.
+WORKERS = int(os.environ.get("STREAM_WORKERS", "1"))
+RESTART_DELAY_SECONDS = 1.0
+
+def get_stream_provider_class() -> Type[BasePriceStreamer]:
+    """Fetch the provider name from STREAM_PROVIDER or AWS SSM and dynamically import the provider class."""
+    if PROVIDER_OVERRIDE:
+        provider_name = PROVIDER_OVERRIDE
+    else:
+        try:
+            provider_name = ssm_config.get_parameter(SSM_PROVIDER_PARAM)
+        except Exception as e:
+            logger.warning(f"Could not fetch provider from SSM: {e}. Using default '{DEFAULT_PROVIDER}'")
+            provider_name = DEFAULT_PROVIDER
 
     try:
-        module = importlib.import_module(module_path)
-        provider_class = getattr(module, class_name)
+        provider_class = load_provider_class(provider_name)
         logger.info(f"Using provider: {provider_name}")
         return provider_class
     except (ModuleNotFoundError, AttributeError) as e:
         logger.error(f"Failed to load provider '{provider_name}': {e}")
         raise ValueError(f"Invalid provider name: {provider_name}") from e
 
-async def main():
+def prefetch_config() -> None:
+    if PROVIDER_OVERRIDE in OFFLINE_PROVIDERS:
+        return
+    ssm_config.register(*SSM_PARAMS)
+    try:
+        ssm_config.prefetch()
+    except Exception as e:
+        # Individual lookups will retry and report their own failures.
+        logger.warning(f"SSM prefetch failed: {e}")
+
+def metrics_port(worker: int) -> int:
+    """Each worker has its own registry, so each gets its own metrics port (0 keeps it disabled)."""
+    return metrics.METRICS_PORT + worker if metrics.METRICS_PORT else 0
+
+async def main(provider_class: Type[BasePriceStreamer] | None = None, reuse_port: bool = False, worker: int = 0):
+    if provider_class is None:
+        prefetch_config()
+        provider_class = get_stream_provider_class()
+    # Picks up rotated API keys; provider reconnects read the refreshed value.
+    ssm_config.parameters.start_refresh()
+    recorder = None
+    if RECORD_DIR:
+        # Workers record into their own directories so files are never shared.
+        recorder = TickRecorder(os.path.join(RECORD_DIR, f"worker-{os.getpid()}") if reuse_port else RECORD_DIR)
+    # One provider connection for the whole process; clients share it via the hub.
+    hub = SubscriptionHub(provider_class(), recorder=recorder)
+    metrics_server = await metrics.serve_metrics(metrics_port(worker))
+    try:
+        async with serve(
+            lambda ws: handle_client_connection(ws, hub),
+            "0.0.0.0",
+            PORT,
+            reuse_port=reuse_port,
+        ):
+            logger.info(f"Server started on port {PORT} (pid {os.getpid()})")
+            await asyncio.Future()  # Run forever
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
+
+def run_worker(provider_class: Type[BasePriceStreamer], slot: int) -> None:
+    """Worker process entry point: a full server bound with SO_REUSEPORT."""
+    # Forked workers inherit the supervisor's handlers; the supervisor owns
+    # shutdown, so ignore Ctrl-C and die normally on its SIGTERM.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # The SSM client was created by the supervisor's prefetch; boto3 clients
+    # must not be shared across a fork, so the worker makes its own.
+    ssm_config.parameters.reset_client()
+    asyncio.run(main(provider_class, reuse_port=True, worker=slot))
+
+def supervise(workers: int) -> None:
+    """
+    Run ``workers`` server processes sharing PORT via SO_REUSEPORT.
+
+    The kernel spreads incoming connections across the workers, so JSON
+    parsing and fan-out use one core each. Every worker has its own hub and
+    upstream connection. Workers that exit are restarted.
+    """
+    # Loaded before forking so workers start with a warm config cache.
+    prefetch_config()
     provider_class = get_stream_provider_class()
-    async with serve(
-        lambda ws: handle_client_connection(ws, provider_class()),
-        "0.0.0.0",
-        8080,
-    ):
-        logger.info("Server started on port 8080")
-        await asyncio.Future()  # Run forever
+    processes: dict[int, multiprocessing.Process] = {}
+
+    def start(slot: int) -> None:
+        start_worker(processes, slot, provider_class)
+
+    def shutdown(signum, frame) -> None:
+        logger.info("Stopping workers")
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.join(timeout=5)
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for slot in range(workers):
+        start(slot)
+
+    while True:
+        restart_exited(processes, start)
+
+def start_worker(
+    processes: dict[int, multiprocessing.Process],
+    slot: int,
+    provider_class: Type[BasePriceStreamer],
+    target: Callable[[Type[BasePriceStreamer], int], None] = run_worker,
+) -> None:
+    process = multiprocessing.Process(
+        target=target, args=(provider_class, slot), name=f"streamer-worker-{slot}", daemon=True
+    )
+    process.start()
+    processes[slot] = process
+    logger.info(f"Started worker {slot} (pid {process.pid})")
+
+def restart_exited(processes: dict[int, multiprocessing.Process], start: Callable[[int], None]) -> None:
+    """Block until a worker exits, then start a replacement in its slot."""
+    exited = wait([process.sentinel for process in processes.values()])
+    for slot, process in list(processes.items()):
+        if process.sentinel in exited:
+            # The sentinel fires as the worker exits, possibly before it can be reaped.
+            process.join()
+            logger.warning(f"Worker {slot} exited with code {process.exitcode}; restarting")
+            time.sleep(RESTART_DELAY_SECONDS)  # avoid a hot loop if workers crash on start
+            start(slot)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="TickerQuote price streaming server")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="worker processes (default: STREAM_WORKERS or 1)")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        supervise(args.workers)
+    else:
+        asyncio.run(main())
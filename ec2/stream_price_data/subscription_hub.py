@@ -0,0 +1,385 @@
+import asyncio
+import logging
+import os
+import time
+
+import metrics
+
+from bar_aggregator import BarAggregator, EncodedBar, bar_topic
+from broadcast import ClientOutbox
+from indicators import SIGNALS_CHANNEL, EncodedSignals, IndicatorEngine, signals_topic
+from last_value_cache import LastValueCache
+from providers.base_provider import BasePriceStreamer, jittered_backoff
+from tick_recorder import TickRecorder
+from wire_protocol import EncodedTick
+
+logger = logging.getLogger(__name__)
+
+# How long to hold upstream (un)subscribes so bursts from many clients go out
+# as one batch. 0 sends each client's batch immediately.
+SUBSCRIBE_COALESCE_MS = float(os.environ.get("STREAM_SUBSCRIBE_COALESCE_MS", "0"))
+# A failed upstream (un)subscribe batch is retried after this delay, doubling up to the max.
+FLUSH_RETRY_SECONDS = 1.0
+FLUSH_RETRY_MAX_SECONDS = 30.0
+# After the upstream connection drops, reconnects back off from BASE up to MAX (jittered).
+RECONNECT_BASE_SECONDS = 1.0
+RECONNECT_MAX_SECONDS = 60.0
+# Per-client outbox gauges cover only the clients with the highest counts, to bound label cardinality.
+SLOW_CLIENTS_REPORTED = int(os.environ.get("STREAM_SLOW_CLIENTS_REPORTED", "10"))
+
+
+def topic_symbol(topic: str) -> str:
+    """Upstream symbol behind a topic: ``AAPL``, ``AAPL@1m`` and ``AAPL@signals`` all map to ``AAPL``."""
+    return topic.split("@", 1)[0]
+
+
+class SubscriptionHub:
+    """
+    Process-wide owner of the upstream provider connection.
+
+    Every client connection shares a single provider instance. Clients
+    subscribe to topics: a bare symbol for raw ticks, ``SYMBOL@interval``
+    for bars or ``SYMBOL@signals`` for live strategy signals. Topics are reference-counted across clients and symbols are
+    reference-counted across topics, so the provider only sees one
+    subscribe per symbol (on the first interested topic) and one
+    unsubscribe (when the last one goes). Each parsed tick is wrapped once,
+    serialized at most once per wire format, and pushed onto the outbox of
+    every client subscribed to its symbol.
+
+    Upstream changes are sent as symbol batches. With a non-zero
+    ``coalesce_ms`` they are held for that window so that, for example,
+    several clients loading watchlists at once produce a single upstream
+    subscribe; a subscribe and unsubscribe of the same symbol inside the
+    window cancel out. A batch the provider rejects goes back into pending
+    and is retried with backoff, so refcounts never claim a symbol is
+    subscribed upstream when it isn't. If the upstream connection itself
+    drops, the provider is reconnected with jittered backoff and every
+    symbol still referenced is subscribed again.
+
+    The last tick seen for every symbol is kept in a ``LastValueCache`` and
+    sent to a client as soon as it subscribes, flagged ``"snapshot": true``,
+    so quiet symbols don't show up empty until the next trade. Likewise a
+    new bar subscriber immediately gets the in-progress bar.
+
+    Bars at the indicator interval also drive an ``IndicatorEngine``, whose
+    RSI_DIP / SMA_CROSSOVER evaluations are published on ``SYMBOL@signals``.
+
+    With a ``recorder``, every upstream tick is also appended to a
+    recording that ``ReplayStreamer`` can play back later.
+
+    Tick counts, subscription gauges, per-client outbox drops and
+    conflation (for the worst clients) and sampled fan-out latency are
+    reported through ``metrics``.
+    """
+
+    def __init__(
+        self,
+        streamer: BasePriceStreamer,
+        coalesce_ms: float = SUBSCRIBE_COALESCE_MS,
+        recorder: TickRecorder | None = None,
+    ):
+        self.streamer = streamer
+        self.coalesce_ms = coalesce_ms
+        self.recorder = recorder
+        self.subscribers: dict[str, set[ClientOutbox]] = {}
+        self.symbol_refs: dict[str, int] = {}
+        self.last_values = LastValueCache()
+        self.bars = BarAggregator()
+        self.indicators = IndicatorEngine()
+        self._pending_subscribe: set[str] = set()
+        self._pending_unsubscribe: set[str] = set()
+        self._flush_task: asyncio.Task | None = None
+        self._retry_task: asyncio.Task | None = None
+        self._retry_delay = FLUSH_RETRY_SECONDS
+        self._reconnect_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        streamer.on_connection_lost = self._connection_lost
+        self._register_metrics()
+
+    def _register_metrics(self) -> None:
+        registry = metrics.registry
+        registry.gauge("stream_topics", "Topics with at least one subscriber", lambda: len(self.subscribers))
+        registry.gauge(
+            "stream_subscriptions", "Client subscriptions across all topics",
+            lambda: sum(len(outboxes) for outboxes in self.subscribers.values()),
+        )
+        registry.gauge("stream_upstream_symbols", "Symbols subscribed upstream", lambda: len(self.symbol_refs))
+        registry.gauge(
+            "stream_outbox_pending", "Updates queued in client outboxes",
+            lambda: sum(stats["depth"] for stats in self.outbox_stats()),
+        )
+        for stat, help in [
+            ("dropped", "Updates dropped from the outbox, for the connected clients with the most"),
+            ("conflated", "Queued updates replaced by a newer one, for the connected clients with the most"),
+            ("depth", "Updates queued in the outbox, for the connected clients with the most"),
+        ]:
+            registry.labeled_gauge(
+                f"stream_client_outbox_{stat}", help, "client", lambda stat=stat: self.top_clients(stat)
+            )
+
+    async def subscribe(self, topics: list[str], outbox: ClientOutbox) -> None:
+        for topic in topics:
+            self._send_snapshot(topic, outbox)
+            outboxes = self.subscribers.get(topic)
+            if outboxes is not None:
+                outboxes.add(outbox)
+                continue
+
+            self.subscribers[topic] = {outbox}
+            self._acquire(topic_symbol(topic))
+
+        await self._schedule_flush()
+
+    async def unsubscribe(self, topics: list[str], outbox: ClientOutbox) -> None:
+        for topic in topics:
+            outboxes = self.subscribers.get(topic)
+            if outboxes is None:
+                continue
+
+            outboxes.discard(outbox)
+            if outboxes:
+                continue
+
+            del self.subscribers[topic]
+            self._release(topic_symbol(topic))
+
+        await self._schedule_flush()
+
+    def _acquire(self, symbol: str) -> None:
+        refs = self.symbol_refs.get(symbol, 0) + 1
+        self.symbol_refs[symbol] = refs
+        if refs > 1:
+            return
+
+        if symbol in self._pending_unsubscribe:
+            # Still subscribed upstream; just cancel the pending unsubscribe.
+            self._pending_unsubscribe.discard(symbol)
+        else:
+            self._pending_subscribe.add(symbol)
+
+    def _release(self, symbol: str) -> None:
+        refs = self.symbol_refs.get(symbol, 0) - 1
+        if refs > 0:
+            self.symbol_refs[symbol] = refs
+            return
+
+        self.symbol_refs.pop(symbol, None)
+        if symbol in self._pending_subscribe:
+            # Never reached the provider; nothing to undo upstream.
+            self._pending_subscribe.discard(symbol)
+        else:
+            self._pending_unsubscribe.add(symbol)
+
+    async def _schedule_flush(self) -> None:
+        if not (self._pending_subscribe or self._pending_unsubscribe):
+            return
+
+        if self.coalesce_ms <= 0:
+            await self._flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        try:
+            await asyncio.sleep(self.coalesce_ms / 1000)
+        finally:
+            self._flush_task = None
+        await self._flush()
+
+    async def _flush(self) -> None:
+        # Each batch is sent on its own: a failed unsubscribe must not hold
+        # back the subscribe, and either one failing is put back for a retry.
+        async with self._lock:
+            unsubscribe = sorted(self._pending_unsubscribe)
+            self._pending_unsubscribe.clear()
+            failed = False
+
+            if unsubscribe:
+                try:
+                    await self.streamer.unsubscribe(unsubscribe)
+                except Exception as e:
+                    logger.error(f"Upstream unsubscribe for {len(unsubscribe)} symbols failed: {e}")
+                    # Symbols re-acquired meanwhile are still wanted upstream.
+                    self._pending_unsubscribe.update(s for s in unsubscribe if s not in self.symbol_refs)
+                    failed = True
+                else:
+                    for symbol in unsubscribe:
+                        self.bars.discard(symbol)
+                        self.indicators.discard(symbol)
+                    logger.info(f"Upstream unsubscribe for {len(unsubscribe)} symbols")
+
+            subscribe = sorted(self._pending_subscribe)
+            self._pending_subscribe.clear()
+            if subscribe:
+                try:
+                    await self.streamer.subscribe(subscribe, self.dispatch)
+                except Exception as e:
+                    logger.error(f"Upstream subscribe for {len(subscribe)} symbols failed: {e}")
+                    # Symbols released meanwhile no longer need subscribing.
+                    self._pending_subscribe.update(s for s in subscribe if s in self.symbol_refs)
+                    failed = True
+                else:
+                    logger.info(f"Upstream subscribe for {len(subscribe)} symbols")
+
+        if failed:
+            self._schedule_retry()
+        else:
+            self._retry_delay = FLUSH_RETRY_SECONDS
+
+    def _schedule_retry(self) -> None:
+        if self._retry_task is None:
+            self._retry_task = asyncio.create_task(self._retry_flush(self._retry_delay))
+            self._retry_delay = min(self._retry_delay * 2, FLUSH_RETRY_MAX_SECONDS)
+
+    async def _retry_flush(self, delay: float) -> None:
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._retry_task = None
+        await self._flush()
+
+    def _connection_lost(self, error: BaseException) -> None:
+        logger.warning(f"Upstream connection lost with {len(self.symbol_refs)} symbols: {error!r}")
+        if self._reconnect_task is None:
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        attempt = 0
+        try:
+            while True:
+                await asyncio.sleep(jittered_backoff(attempt, RECONNECT_BASE_SECONDS, RECONNECT_MAX_SECONDS))
+                attempt += 1
+                async with self._lock:
+                    try:
+                        await self._resubscribe()
+                    except Exception as e:
+                        logger.warning(f"Upstream reconnect attempt {attempt} failed: {e!r}")
+                        continue
+                logger.info(f"Upstream reconnected with {len(self.symbol_refs)} symbols")
+                return
+        finally:
+            self._reconnect_task = None
+
+    async def _resubscribe(self) -> None:
+        """Replace the upstream connection and subscribe every referenced symbol on it."""
+        try:
+            await self.streamer.disconnect()
+        except Exception as e:
+            logger.warning(f"Error closing the upstream connection: {e!r}")
+        # The new connection starts empty, so pending batches are covered by the full resubscribe.
+        for symbol in self._pending_unsubscribe:
+            self.bars.discard(symbol)
+            self.indicators.discard(symbol)
+        self._pending_unsubscribe.clear()
+        self._pending_subscribe.clear()
+
+        await self.streamer.connect()
+        if self.symbol_refs:
+            await self.streamer.subscribe(sorted(self.symbol_refs), self.dispatch)
+
+    def _send_snapshot(self, topic: str, outbox: ClientOutbox) -> None:
+        symbol = topic_symbol(topic)
+        if topic == symbol:
+            last = self.last_values.get(symbol)
+            if last is None:
+                return
+            last["snapshot"] = True
+            # Same key as live ticks, so a newer trade simply conflates over it.
+            outbox.push(symbol, EncodedTick(last))
+            return
+
+        channel = topic[len(symbol) + 1:]
+        if channel == SIGNALS_CHANNEL:
+            results = self.indicators.latest.get(symbol)
+            bar = self.bars.current(symbol, self.indicators.interval)
+            if results and bar is not None:
+                outbox.push(f"{topic}@{bar.time}", EncodedSignals(symbol, self.indicators.interval, bar.time, results, final=False))
+            return
+
+        interval = channel
+        bar = self.bars.current(symbol, interval)
+        if bar is not None:
+            outbox.push(f"{topic}@{bar.time}", EncodedBar(symbol, interval, bar, final=False))
+
+    async def dispatch(self, update: dict) -> None:
+        """Wrap a normalized tick for shared encoding and fan it out to its subscribers."""
+        symbol = update.get("symbol")
+        received_ns = metrics.trace.received_ns
+        dispatched_ns = time.perf_counter_ns() if received_ns is not None else 0
+        metrics.TICKS.inc()
+        metrics.SYMBOL_TICKS.inc(symbol)
+        self.last_values.update(update)
+        if self.recorder is not None:
+            self.recorder.record(update)
+
+        outboxes = self.subscribers.get(symbol)
+        if outboxes:
+            tick = EncodedTick(update)
+            if received_ns is not None:
+                tick.trace = (received_ns, dispatched_ns)
+            for outbox in outboxes:
+                outbox.push(symbol, tick)
+
+        for interval, bar, final in self.bars.on_tick(update):
+            if interval == self.indicators.interval:
+                self._publish_signals(symbol, interval, bar, final)
+
+            topic = bar_topic(symbol, interval)
+            outboxes = self.subscribers.get(topic)
+            if not outboxes:
+                continue
+            # Keyed per bar, so in-progress updates conflate but a finished
+            # bar is never overwritten by the next one.
+            key = f"{topic}@{bar.time}"
+            message = EncodedBar(symbol, interval, bar, final)
+            for outbox in outboxes:
+                outbox.push(key, message)
+
+        if received_ns is not None:
+            metrics.FANOUT_SECONDS.observe_since(dispatched_ns)
+
+    def _publish_signals(self, symbol: str, interval: str, bar, final: bool) -> None:
+        topic = signals_topic(symbol)
+        outboxes = self.subscribers.get(topic)
+        # Finished bars always advance the indicators; previews are only
+        # computed when someone is listening.
+        results = self.indicators.on_bar(symbol, interval, bar, final, preview=bool(outboxes))
+        if not (results and outboxes):
+            return
+
+        key = f"{topic}@{bar.time}"
+        message = EncodedSignals(symbol, interval, bar.time, results, final)
+        for outbox in outboxes:
+            outbox.push(key, message)
+
+    def subscriber_count(self, symbol: str) -> int:
+        return len(self.subscribers.get(symbol, ()))
+
+    def outbox_stats(self) -> list[dict]:
+        """Per-client send/conflation/drop counters, for spotting slow consumers."""
+        outboxes = set().union(*self.subscribers.values()) if self.subscribers else set()
+        return [outbox.stats() for outbox in outboxes]
+
+    def top_clients(self, stat: str, limit: int | None = None) -> dict[str, int]:
+        """``{client: value}`` of one outbox stat for the connected clients with the highest non-zero values."""
+        stats = sorted(self.outbox_stats(), key=lambda s: s[stat], reverse=True)
+        return {s["client"]: s[stat] for s in stats[:limit or SLOW_CLIENTS_REPORTED] if s[stat]}
+
+    async def close(self) -> None:
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self._retry_task:
+            self._retry_task.cancel()
+            self._retry_task = None
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        async with self._lock:
+            self.subscribers.clear()
+            self.symbol_refs.clear()
+            self._pending_subscribe.clear()
+            self._pending_unsubscribe.clear()
+            await self.streamer.disconnect()
+            if self.recorder is not None:
+                self.recorder.close()
@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+import pytest
+
+import ssm_config
+from providers import finnhub_streamer, twelvedata_streamer
+
+
+class FakeWebSocket:
+    """Upstream provider socket: records sent frames and replays pushed messages."""
+
+    def __init__(self):
+        self.sent = []
+        self.fail_sends = 0
+        self.closed = False
+        self._incoming = asyncio.Queue()
+
+    async def send(self, data):
+        if self.closed:
+            raise ConnectionError("socket closed")
+        if self.fail_sends:
+            self.fail_sends -= 1
+            raise ConnectionError("send failed")
+        self.sent.append(json.loads(data))
+
+    async def recv(self):
+        message = await self._incoming.get()
+        if isinstance(message, BaseException):
+            raise message
+        return message
+
+    def push(self, message: dict) -> None:
+        self._incoming.put_nowait(json.dumps(message))
+
+    def drop(self) -> None:
+        """Simulate the provider closing the connection."""
+        self.closed = True
+        self._incoming.put_nowait(ConnectionError("connection dropped"))
+
+    async def close(self):
+        if not self.closed:
+            self.drop()
+
+
+class FakeUpstream:
+    def __init__(self):
+        self.sockets: list[FakeWebSocket] = []
+
+    async def connect(self, url):
+        socket = FakeWebSocket()
+        self.sockets.append(socket)
+        return socket
+
+    @property
+    def latest(self) -> FakeWebSocket:
+        return self.sockets[-1]
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Routes the Finnhub and Twelve Data providers' websocket connects to fake sockets."""
+    fake = FakeUpstream()
+    monkeypatch.setattr(ssm_config, "get_parameter", lambda name: "test-key")
+    monkeypatch.setattr(twelvedata_streamer, "connect", fake.connect)
+    monkeypatch.setattr(finnhub_streamer, "connect", fake.connect)
+    return fake
@@ -0,0 +1,41 @@
+from bar_aggregator import BarAggregator
+
+# 2024-01-02 15:00:00 UTC (10:00 New York), on a minute boundary.
+T0 = 1_704_207_600_000
+
+
+def tick(ts, price, **volume):
+    return {"symbol": "AAPL", "price": price, "timestamp": ts, **volume}
+
+
+def test_ticks_bucket_into_ohlc_bars():
+    bars = BarAggregator()
+    bars.on_tick(tick(T0 + 1_000, 10.0, volume=5))
+    bars.on_tick(tick(T0 + 20_000, 12.0, volume=1))
+    bars.on_tick(tick(T0 + 40_000, 9.0, volume=2))
+
+    bar = bars.current("AAPL", "1m")
+    assert (bar.time, bar.open, bar.high, bar.low, bar.close, bar.volume) == (T0 // 1000, 10.0, 12.0, 9.0, 9.0, 8.0)
+    # The daily bar is stamped with the New York date's UTC midnight.
+    assert bars.current("AAPL", "1d").time == 1_704_153_600
+
+
+def test_new_bucket_finalizes_previous_bar():
+    bars = BarAggregator()
+    bars.on_tick(tick(T0, 10.0, volume=1))
+    changed = bars.on_tick(tick(T0 + 60_000, 11.0, volume=1))
+
+    minute = [(bar.time, final) for interval, bar, final in changed if interval == "1m"]
+    assert minute == [(T0 // 1000, True), (T0 // 1000 + 60, False)]
+    # Late ticks for a finished bar are ignored.
+    assert all(interval != "1m" for interval, _, _ in bars.on_tick(tick(T0 + 30_000, 99.0, volume=1)))
+
+
+def test_cumulative_day_volume_adds_per_tick_increase():
+    bars = BarAggregator()
+    bars.on_tick(tick(T0, 10.0, volume=None, day_volume=1_000_000))
+    bars.on_tick(tick(T0 + 10_000, 10.1, volume=None, day_volume=1_000_300))
+    bars.on_tick(tick(T0 + 20_000, 10.2, volume=None, day_volume=1_000_500))
+
+    assert bars.current("AAPL", "1m").volume == 500
+    assert bars.current("AAPL", "1d").volume == 500
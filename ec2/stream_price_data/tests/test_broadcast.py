@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+from bar_aggregator import Bar, EncodedBar
+from broadcast import ClientOutbox
+from wire_protocol import BINARY, FRAME_HEADER, EncodedTick
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+
+def tick(symbol, price):
+    return EncodedTick({"symbol": symbol, "price": price, "volume": 1, "timestamp": 1_700_000_000_000})
+
+
+def test_newer_tick_replaces_a_queued_one():
+    outbox = ClientOutbox(None)
+    outbox.push("AAPL", tick("AAPL", 1.0))
+    outbox.push("MSFT", tick("MSFT", 2.0))
+    outbox.push("AAPL", tick("AAPL", 3.0))
+
+    assert outbox.conflated == 1 and outbox.dropped == 0
+    assert [(key, t.update["price"]) for key, t in outbox.pending.items()] == [("AAPL", 3.0), ("MSFT", 2.0)]
+
+
+def test_full_outbox_drops_the_oldest_symbol():
+    outbox = ClientOutbox(None, max_pending=2)
+    for symbol in ["AAPL", "MSFT", "TSLA"]:
+        outbox.push(symbol, tick(symbol, 1.0))
+
+    assert outbox.dropped == 1
+    assert list(outbox.pending) == ["MSFT", "TSLA"]
+
+
+def test_full_outbox_never_evicts_finished_bars():
+    outbox = ClientOutbox(None, max_pending=2)
+    outbox.push("AAPL@1m@0", EncodedBar("AAPL", "1m", Bar(0, 1.0, 1.0), final=True))
+    outbox.push("AAPL", tick("AAPL", 1.0))
+    outbox.push("MSFT", tick("MSFT", 2.0))
+    assert list(outbox.pending) == ["AAPL@1m@0", "MSFT"]
+
+    # Only a finished bar left to evict: a new tick is dropped, a finished bar still queues.
+    outbox.push("MSFT@1m@0", EncodedBar("MSFT", "1m", Bar(0, 2.0, 1.0), final=True))
+    outbox.push("TSLA", tick("TSLA", 3.0))
+    assert list(outbox.pending) == ["AAPL@1m@0", "MSFT@1m@0"]
+    outbox.push("TSLA@1m@0", EncodedBar("TSLA", "1m", Bar(0, 3.0, 1.0), final=True))
+    assert list(outbox.pending) == ["AAPL@1m@0", "MSFT@1m@0", "TSLA@1m@0"]
+    assert outbox.dropped == 3
+
+
+def test_writer_sends_control_messages_before_ticks():
+    async def run():
+        websocket = FakeWebSocket()
+        outbox = ClientOutbox(websocket)
+        writer = asyncio.create_task(outbox.run())
+        outbox.push("AAPL", tick("AAPL", 1.0))
+        outbox.send_control('{"event": "hello"}')
+        await asyncio.sleep(0)
+        outbox.close()
+        await writer
+        return websocket.sent
+
+    sent = asyncio.run(run())
+    assert sent[0] == '{"event": "hello"}'
+    assert json.loads(sent[1])["price"] == 1.0
+
+
+def test_binary_outbox_packs_pending_ticks_into_one_frame():
+    async def run():
+        websocket = FakeWebSocket()
+        outbox = ClientOutbox(websocket)
+        outbox.format = BINARY
+        outbox.symbols.assign(["AAPL", "MSFT"])
+        writer = asyncio.create_task(outbox.run())
+        outbox.push("AAPL", tick("AAPL", 1.0))
+        outbox.push("MSFT", tick("MSFT", 2.0))
+        await asyncio.sleep(0)
+        outbox.close()
+        await writer
+        return websocket.sent, outbox.sent
+
+    sent, count = asyncio.run(run())
+    assert len(sent) == 1 and count == 2
+    assert FRAME_HEADER.unpack_from(sent[0]) == (1, 2)
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from providers.finnhub_streamer import FinnhubStreamer
+
+
+def trades(*items):
+    return {"type": "trade", "data": [{"s": s, "p": p, "t": t, "v": v} for s, p, t, v in items]}
+
+
+def test_one_message_dispatches_trades_for_several_symbols(upstream):
+    async def run():
+        streamer = FinnhubStreamer()
+        aapl, msft = [], []
+
+        async def on_aapl(update):
+            aapl.append(update)
+
+        async def on_msft(update):
+            msft.append(update)
+
+        await streamer.subscribe(["AAPL"], on_aapl)
+        await streamer.subscribe(["MSFT"], on_msft)
+        upstream.latest.push(trades(
+            ("AAPL", 190.0, 1_700_000_000_100, 5),
+            ("MSFT", 410.0, 1_700_000_000_200, 7),
+            ("TSLA", 250.0, 1_700_000_000_300, 1),  # not subscribed
+            ("AAPL", 190.5, 1_700_000_000_400, 2),
+        ))
+        upstream.latest.push({"type": "ping"})
+        await asyncio.sleep(0.01)
+        await streamer.disconnect()
+        return aapl, msft
+
+    aapl, msft = asyncio.run(run())
+    assert [u["price"] for u in aapl] == [190.0, 190.5]
+    assert msft == [{"symbol": "MSFT", "price": 410.0, "timestamp": 1_700_000_000_200, "volume": 7}]
+
+
+def test_one_reader_task_per_connection(upstream):
+    async def run():
+        streamer = FinnhubStreamer()
+        received = []
+
+        async def callback(update):
+            received.append(update["price"])
+
+        await streamer.subscribe(["AAPL"], callback)
+        listener = streamer._listener
+        await streamer.subscribe(["MSFT"], callback)
+        await streamer.subscribe(["AAPL"], callback)
+        assert streamer._listener is listener
+        assert len(upstream.sockets) == 1
+
+        upstream.latest.push(trades(("AAPL", 1.0, 1, 1)))
+        upstream.latest.push(trades(("MSFT", 2.0, 2, 1)))
+        await asyncio.sleep(0.01)
+        await streamer.disconnect()
+        return received
+
+    # Each message is read, and delivered, exactly once.
+    assert asyncio.run(run()) == [1.0, 2.0]
+
+
+def test_subscribe_and_unsubscribe_send_one_frame_per_new_symbol(upstream):
+    async def run():
+        async def callback(update):
+            pass
+
+        streamer = FinnhubStreamer()
+        await streamer.subscribe(["AAPL", "MSFT"], callback)
+        await streamer.subscribe(["MSFT", "TSLA"], callback)
+        await streamer.unsubscribe(["AAPL", "NVDA"])
+        await streamer.disconnect()
+
+    asyncio.run(run())
+    assert upstream.latest.sent == [
+        {"type": "subscribe", "symbol": "AAPL"},
+        {"type": "subscribe", "symbol": "MSFT"},
+        {"type": "subscribe", "symbol": "TSLA"},
+        {"type": "unsubscribe", "symbol": "AAPL"},
+    ]
+
+
+def test_failed_subscribe_keeps_only_the_symbols_that_were_sent(upstream):
+    async def run():
+        async def callback(update):
+            pass
+
+        streamer = FinnhubStreamer()
+        await streamer.connect()
+        socket = upstream.latest
+        await streamer.subscribe(["AAPL"], callback)
+        socket.fail_sends = 1
+
+        with pytest.raises(ConnectionError):
+            await streamer.subscribe(["MSFT", "TSLA"], callback)
+        assert set(streamer.subscribers) == {"AAPL"}
+
+        await streamer.subscribe(["MSFT", "TSLA"], callback)
+        assert set(streamer.subscribers) == {"AAPL", "MSFT", "TSLA"}
+        await streamer.disconnect()
+
+    asyncio.run(run())
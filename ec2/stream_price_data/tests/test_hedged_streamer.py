@@ -0,0 +1,204 @@
+import asyncio
+
+import pytest
+
+import providers.hedged_streamer as hedged_streamer
+from providers.base_provider import BasePriceStreamer
+from providers.hedged_streamer import HedgedStreamer, backoff_delay
+
+
+class FakeStreamer(BasePriceStreamer):
+    def __init__(self):
+        self.subscribers = {}
+        self.calls = []
+        self.fail_connect = 0
+
+    async def connect(self):
+        self.calls.append("connect")
+        if self.fail_connect:
+            self.fail_connect -= 1
+            raise ConnectionError("refused")
+
+    async def disconnect(self):
+        self.calls.append("disconnect")
+        self.subscribers.clear()
+
+    async def subscribe(self, symbols, callback):
+        self.calls.append(("subscribe", sorted(symbols)))
+        for symbol in symbols:
+            self.subscribers[symbol] = callback
+
+    async def unsubscribe(self, symbols):
+        self.calls.append(("unsubscribe", sorted(symbols)))
+        for symbol in symbols:
+            self.subscribers.pop(symbol, None)
+
+    async def emit(self, symbol, timestamp, price):
+        await self.subscribers[symbol]({"symbol": symbol, "price": price, "timestamp": timestamp, "volume": 1})
+
+
+@pytest.fixture
+def hedge(monkeypatch):
+    monkeypatch.setattr(hedged_streamer, "load_provider_class", lambda name: FakeStreamer)
+    return HedgedStreamer(["Finnhub", "TwelveData"], heartbeat_timeout=30, dedupe_window_ms=1000)
+
+
+def test_dedupes_copies_across_timestamp_precisions(hedge):
+    async def run():
+        received = []
+
+        async def callback(update):
+            received.append((update["timestamp"], update["price"]))
+
+        await hedge.subscribe(["AAPL"], callback)
+        finnhub, twelvedata = (leg.streamer for leg in hedge.legs)
+
+        await finnhub.emit("AAPL", 1_700_000_000_500, 190.0)
+        await twelvedata.emit("AAPL", 1_700_000_000_000, 190.0)  # same trade, second precision
+        await twelvedata.emit("AAPL", 1_700_000_000_000, 190.5)  # a new trade in that second
+        await finnhub.emit("AAPL", 1_700_000_000_700, 190.5)     # Finnhub's copy of it
+        await finnhub.emit("AAPL", 1_700_000_000_800, 190.5)     # genuine repeat at the same price
+        await twelvedata.emit("AAPL", 1_699_999_998_000, 189.0)  # stale
+        await hedge.disconnect()
+        return received
+
+    assert asyncio.run(run()) == [
+        (1_700_000_000_500, 190.0),
+        (1_700_000_000_000, 190.5),
+        (1_700_000_000_800, 190.5),
+    ]
+
+
+def test_slower_provider_first_is_still_deduped(hedge):
+    async def run():
+        received = []
+
+        async def callback(update):
+            received.append(update["price"])
+
+        await hedge.subscribe(["AAPL"], callback)
+        finnhub, twelvedata = (leg.streamer for leg in hedge.legs)
+        await twelvedata.emit("AAPL", 1_700_000_000_000, 190.0)
+        await finnhub.emit("AAPL", 1_700_000_000_400, 190.0)
+        await finnhub.emit("AAPL", 1_700_000_000_600, 190.25)
+        await hedge.disconnect()
+        return received
+
+    assert asyncio.run(run()) == [190.0, 190.25]
+
+
+def test_backoff_doubles_with_jitter_and_caps():
+    for attempt, low, high in [(0, 0.5, 1), (3, 4, 8), (20, 30, 60)]:
+        for _ in range(50):
+            assert low <= backoff_delay(attempt, base=1, cap=60) <= high
+
+
+def test_quiet_leg_fails_over_while_the_other_ticks(hedge, monkeypatch):
+    monkeypatch.setattr(hedged_streamer, "backoff_delay", lambda attempt: 0)
+
+    async def run():
+        async def callback(update):
+            pass
+
+        await hedge.subscribe(["AAPL", "MSFT"], callback)
+        finnhub, twelvedata = hedge.legs
+        now = finnhub.up_since + 60
+        finnhub.last_tick = now - 1
+        hedge.check_heartbeats(now)
+        assert not twelvedata.up and finnhub.up
+
+        await twelvedata.reconnecting
+        assert twelvedata.up
+        assert twelvedata.streamer.calls[-3:] == ["disconnect", "connect", ("subscribe", ["AAPL", "MSFT"])]
+        await hedge.disconnect()
+
+    asyncio.run(run())
+
+
+def test_all_quiet_does_not_reconnect(hedge):
+    async def run():
+        async def callback(update):
+            pass
+
+        await hedge.subscribe(["AAPL"], callback)
+        hedge.check_heartbeats(hedge.legs[0].up_since + 3600)
+        assert all(leg.up and leg.reconnecting is None for leg in hedge.legs)
+        await hedge.disconnect()
+
+    asyncio.run(run())
+
+
+def test_every_leg_reconnects_when_all_sockets_drop_at_once(upstream, monkeypatch):
+    monkeypatch.setattr(hedged_streamer, "backoff_delay", lambda attempt: 0)
+
+    async def run():
+        received = []
+
+        async def callback(update):
+            received.append(update["price"])
+
+        hedge = HedgedStreamer(["Finnhub", "TwelveData"])
+        await hedge.subscribe(["AAPL"], callback)
+        finnhub, twelvedata = upstream.sockets
+        # Both providers go away together, so no leg is left ticking.
+        finnhub.drop()
+        twelvedata.drop()
+        await asyncio.sleep(0.01)
+
+        assert all(leg.up and leg.reconnecting is None for leg in hedge.legs)
+        finnhub, twelvedata = upstream.sockets[2:]
+        assert finnhub.sent == [{"type": "subscribe", "symbol": "AAPL"}]
+        assert twelvedata.sent == [{"action": "subscribe", "params": {"symbols": "AAPL"}}]
+
+        finnhub.push({"type": "trade", "data": [{"s": "AAPL", "p": 191.0, "t": 1_700_000_001_000, "v": 5}]})
+        await asyncio.sleep(0.01)
+        await hedge.disconnect()
+        return received
+
+    assert asyncio.run(run()) == [191.0]
+
+
+def test_failed_connect_retries_with_growing_attempts(hedge, monkeypatch):
+    attempts = []
+    monkeypatch.setattr(hedged_streamer, "backoff_delay", lambda attempt: attempts.append(attempt) or 0)
+
+    async def run():
+        async def callback(update):
+            pass
+
+        twelvedata = hedge.legs[1]
+        twelvedata.streamer.fail_connect = 3
+        await hedge.subscribe(["AAPL"], callback)
+        assert not twelvedata.up
+        await twelvedata.reconnecting
+        assert twelvedata.up and twelvedata.symbols == {"AAPL"}
+        await hedge.disconnect()
+
+    asyncio.run(run())
+    # The initial connect failed, then two reconnects before one succeeded.
+    assert attempts == [0, 1, 2]
+
+
+def test_resync_follows_subscription_changes(hedge):
+    async def run():
+        async def callback(update):
+            pass
+
+        leg = hedge.legs[0]
+        leg.symbols = {"AAPL", "MSFT"}
+        hedge.subscribers = {"MSFT": [callback], "TSLA": [callback]}
+
+        subscribe = leg.streamer.subscribe
+
+        async def subscribe_and_change(symbols, cb):
+            await subscribe(symbols, cb)
+            # A client subscribes while the leg is still resyncing.
+            hedge.subscribers.setdefault("NVDA", [callback])
+
+        leg.streamer.subscribe = subscribe_and_change
+        await hedge._resync(leg)
+        return leg
+
+    leg = asyncio.run(run())
+    assert leg.symbols == {"MSFT", "TSLA", "NVDA"}
+    assert leg.streamer.calls == [("unsubscribe", ["AAPL"]), ("subscribe", ["TSLA"]), ("subscribe", ["NVDA"])]
@@ -0,0 +1,61 @@
+import pytest
+
+from bar_aggregator import Bar
+from indicators import EMA, SMA, IndicatorEngine, WilderRSI
+
+
+def test_sma_averages_the_last_period_values():
+    sma = SMA(3)
+    for x in [1, 2]:
+        sma.update(x)
+    assert sma.value is None
+    assert sma.peek(3) == pytest.approx(2)
+
+    for x in [3, 4, 5]:
+        sma.update(x)
+    assert sma.value == pytest.approx(4)
+
+
+def test_ema_is_seeded_with_the_sma():
+    ema = EMA(3)
+    for x in [1, 2, 3]:
+        ema.update(x)
+    assert ema.value == pytest.approx(2)
+
+    ema.update(6)
+    assert ema.value == pytest.approx(2 + 0.5 * (6 - 2))
+
+
+def test_wilder_rsi_matches_reference_values():
+    closes = [44.34, 44.09, 44.15, 43.61, 44.33, 44.83, 45.10, 45.42,
+              45.84, 46.08, 45.89, 46.03, 45.61, 46.28, 46.28, 46.00]
+    rsi = WilderRSI(14)
+    for close in closes[:14]:
+        rsi.update(close)
+    assert rsi.value is None
+
+    rsi.update(closes[14])
+    assert rsi.value == pytest.approx(70.46, abs=0.01)
+    # Peeking matches updating without changing the state.
+    assert rsi.peek(closes[15]) == pytest.approx(66.25, abs=0.01)
+    assert rsi.value == pytest.approx(70.46, abs=0.01)
+
+
+def bar(time, close):
+    return Bar(time, close, 0.0)
+
+
+def test_engine_only_advances_on_finished_bars():
+    engine = IndicatorEngine(interval="1m")
+    assert engine.on_bar("AAPL", "1d", bar(0, 1.0), final=True) == []
+
+    # Steady declines push RSI to 0 once the first 14 changes are in.
+    for i in range(14):
+        engine.on_bar("AAPL", "1m", bar(i * 60, 100.0 - i), final=True)
+    assert engine.on_bar("AAPL", "1m", bar(14 * 60, 80.0), final=False, preview=False) == []
+
+    (rsi,) = engine.on_bar("AAPL", "1m", bar(14 * 60, 80.0), final=False)
+    assert rsi["strategy"] == "RSI_DIP" and rsi["signal"] == "BUY" and rsi["indicators"]["rsi"] == 0.0
+    # The preview didn't commit the bar.
+    assert engine.states["AAPL"].rsi.value is None
+    assert engine.latest["AAPL"] == [rsi]
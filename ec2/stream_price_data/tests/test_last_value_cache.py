@@ -0,0 +1,30 @@
+from last_value_cache import LastValueCache
+
+
+def test_keeps_the_newest_tick_per_symbol():
+    cache = LastValueCache()
+    cache.update({"symbol": "AAPL", "price": 1.0, "volume": 5, "timestamp": 2_000})
+    cache.update({"symbol": "MSFT", "price": 2.0, "volume": None, "timestamp": 1_000})
+    cache.update({"symbol": "AAPL", "price": 3.0, "volume": 6, "timestamp": 1_500})  # out of order
+
+    assert cache.get("AAPL") == {"symbol": "AAPL", "price": 1.0, "volume": 5.0, "timestamp": 2_000}
+    assert cache.get("MSFT") == {"symbol": "MSFT", "price": 2.0, "volume": None, "timestamp": 1_000}
+    assert len(cache) == 2 and "AAPL" in cache
+
+
+def test_snapshots_are_independent_copies():
+    cache = LastValueCache()
+    cache.update({"symbol": "AAPL", "price": 1.0, "volume": 5, "timestamp": 1_000})
+    snapshot = cache.get("AAPL")
+    snapshot["snapshot"] = True
+    cache.update({"symbol": "AAPL", "price": 2.0, "volume": 5, "timestamp": 2_000})
+
+    assert snapshot["price"] == 1.0
+    assert "snapshot" not in cache.get("AAPL")
+
+
+def test_ignores_ticks_without_symbol_or_price():
+    cache = LastValueCache()
+    cache.update({"symbol": "AAPL", "price": None, "timestamp": 1})
+    cache.update({"price": 1.0, "timestamp": 1})
+    assert len(cache) == 0 and cache.get("AAPL") is None
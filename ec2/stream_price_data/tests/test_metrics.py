@@ -0,0 +1,107 @@
+import asyncio
+import re
+import socket
+
+import metrics
+import ssm_config
+import stream_price_data_app
+from providers.synthetic_streamer import SyntheticStreamer
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*"\})? (-?[0-9.e+-]+|\+Inf|NaN)$')
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def get(port: int, path: str) -> tuple[str, dict[str, str], str]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    response = (await reader.read()).decode()
+    writer.close()
+    head, body = response.split("\r\n\r\n", 1)
+    status, *header_lines = head.split("\r\n")
+    headers = dict(line.split(": ", 1) for line in header_lines)
+    return status, headers, body
+
+
+def test_scraped_metrics_are_well_formed(monkeypatch):
+    registry = metrics.Registry()
+    registry.counter("test_ticks_total", "Ticks").inc(3)
+    registry.labeled_counter("test_symbol_ticks_total", "Ticks per symbol", "symbol").inc('A"B')
+    registry.gauge("test_clients", "Clients", lambda: 2)
+    registry.labeled_gauge("test_depth", "Depth per client", "client", lambda: {"1.2.3.4:5": 7})
+    latency = registry.histogram("test_latency_seconds", "Latency", buckets=(0.001, 0.01))
+    for value in (0.0005, 0.005, 0.5):
+        latency.observe(value)
+    monkeypatch.setattr(metrics, "registry", registry)
+    port = free_port()
+
+    async def run():
+        server = await metrics.serve_metrics(port, "127.0.0.1")
+        try:
+            return await get(port, "/metrics"), await get(port, "/other")
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    (status, headers, body), (missing, _, _) = asyncio.run(run())
+    assert status == "HTTP/1.1 200 OK"
+    assert headers["Content-Type"] == metrics.CONTENT_TYPE
+    assert int(headers["Content-Length"]) == len(body.encode())
+    assert missing == "HTTP/1.1 404 Not Found"
+
+    types, samples = {}, {}
+    for line in body.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            types[name] = kind
+        elif not line.startswith("# HELP "):
+            match = SAMPLE.match(line)
+            assert match, line
+            name, labels, value = match.groups()
+            family = re.sub(r"_(bucket|sum|count)$", "", name) if name not in types else name
+            assert family in types, line
+            samples[name + (labels or "")] = float(value)
+
+    assert types == {
+        "test_ticks_total": "counter",
+        "test_symbol_ticks_total": "counter",
+        "test_clients": "gauge",
+        "test_depth": "gauge",
+        "test_latency_seconds": "histogram",
+    }
+    assert samples["test_ticks_total"] == 3
+    assert samples['test_symbol_ticks_total{symbol="A\\"B"}'] == 1
+    assert samples["test_clients"] == 2
+    assert samples['test_depth{client="1.2.3.4:5"}'] == 7
+    assert [samples[f'test_latency_seconds_bucket{{le="{le}"}}'] for le in ("0.001", "0.01", "+Inf")] == [1, 2, 3]
+    assert samples["test_latency_seconds_count"] == 3
+
+
+def test_metrics_endpoint_closes_with_the_server(monkeypatch):
+    metrics_port = free_port()
+    monkeypatch.setattr(metrics, "METRICS_PORT", metrics_port)
+    monkeypatch.setattr(stream_price_data_app, "PORT", free_port())
+    monkeypatch.setattr(ssm_config.parameters, "start_refresh", lambda: None)
+
+    async def run():
+        server = asyncio.create_task(stream_price_data_app.main(SyntheticStreamer))
+        for _ in range(100):
+            try:
+                status, _, _ = await get(metrics_port, "/metrics")
+                break
+            except OSError:
+                await asyncio.sleep(0.02)
+        server.cancel()
+        await asyncio.gather(server, return_exceptions=True)
+        # Checked while the loop still runs, which would otherwise keep the listener open.
+        try:
+            await get(metrics_port, "/metrics")
+        except OSError:
+            return status, "refused"
+        return status, "open"
+
+    assert asyncio.run(run()) == ("HTTP/1.1 200 OK", "refused")
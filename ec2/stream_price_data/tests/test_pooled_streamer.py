@@ -0,0 +1,172 @@
+import asyncio
+
+import pytest
+
+import providers.pooled_streamer as pooled_streamer
+from providers.pooled_streamer import PooledStreamer
+
+
+class FakeStreamer:
+    instances = []
+
+    def __init__(self):
+        self.subscribers = {}
+        self.subscribed = []
+        self.fail_subscribe = False
+        self.closed = False
+        FakeStreamer.instances.append(self)
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        self.closed = True
+        self.subscribers.clear()
+
+    async def subscribe(self, symbols, callback):
+        if self.fail_subscribe:
+            raise ConnectionError("subscribe rejected")
+        self.subscribed.append(sorted(symbols))
+        for symbol in symbols:
+            self.subscribers[symbol] = callback
+
+    async def unsubscribe(self, symbols):
+        for symbol in symbols:
+            self.subscribers.pop(symbol, None)
+
+    async def emit(self, symbol, price):
+        await self.subscribers[symbol]({"symbol": symbol, "price": price, "timestamp": 0, "volume": 1})
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeStreamer.instances = []
+    monkeypatch.setattr(pooled_streamer, "load_provider_class", lambda name: FakeStreamer)
+    return PooledStreamer("Fake", symbols_per_connection=2, max_connections=3)
+
+
+async def noop(update):
+    pass
+
+
+def owners(pool):
+    return {symbol: connection.number for symbol, connection in pool.owner.items()}
+
+
+def test_symbols_spread_over_least_loaded_connections(pool):
+    async def run():
+        await pool.subscribe(["A", "B", "C"], noop)
+        assert owners(pool) == {"A": 1, "B": 2, "C": 1}
+        assert [sorted(c.symbols) for c in pool.connections] == [["A", "C"], ["B"]]
+
+        # Only three connections are allowed, so the seventh symbol waits.
+        await pool.subscribe(["D", "E", "F", "G"], noop)
+        assert len(pool.connections) == 3 and list(pool.pending) == ["G"]
+
+        await pool.unsubscribe(["A"])
+        assert "G" in pool.owner and not pool.pending
+
+    asyncio.run(run())
+
+
+def test_underused_connections_are_merged(pool):
+    async def run():
+        await pool.subscribe(["A", "B", "C", "D"], noop)
+        assert len(pool.connections) == 2
+
+        await pool.unsubscribe(["B", "D"])
+        assert len(pool.connections) == 1
+        connection = pool.connections[0]
+        assert connection.symbols == {"A", "C"}
+        assert set(connection.streamer.subscribers) == {"A", "C"}
+        assert all(streamer.closed for streamer in FakeStreamer.instances if streamer is not connection.streamer)
+
+    asyncio.run(run())
+
+
+def test_failed_connection_requeues_its_symbols(pool):
+    async def run():
+        await pool.subscribe(["A", "B", "C"], noop)
+        first, second = pool.connections
+        second.streamer.fail_subscribe = True
+
+        # D goes to the second connection, which fails and takes B down with it.
+        await pool.subscribe(["D"], noop)
+        assert second.streamer.closed and second not in pool.connections
+        assert not pool.pending
+        third = pool.connections[-1]
+        assert owners(pool) == {"A": first.number, "C": first.number, "B": third.number, "D": third.number}
+        assert third.symbols == {"B", "D"}
+
+    asyncio.run(run())
+
+
+def test_failed_merge_leaves_symbols_on_their_source(pool):
+    pool.symbols_per_connection = 4
+
+    async def run():
+        await pool.subscribe(["A", "B", "C", "D", "E"], noop)
+        first, second = pool.connections
+        assert first.symbols == {"A", "C", "E"}
+        second.streamer.fail_subscribe = True
+        first.streamer.subscribed.clear()
+
+        # Merging E onto the second connection fails: E stays on the first,
+        # and the second's own symbols are placed on the first as well.
+        await pool.unsubscribe(["A", "C"])
+        assert pool.connections == [first] and second.streamer.closed
+        assert owners(pool) == {"B": first.number, "D": first.number, "E": first.number}
+        assert first.symbols == {"B", "D", "E"} and not pool.pending
+        # E was never requeued, so it isn't subscribed on the first twice.
+        assert first.streamer.subscribed == [["B", "D"]]
+
+    asyncio.run(run())
+
+
+def test_ticks_are_only_forwarded_from_the_owning_connection(pool):
+    async def run():
+        received = []
+
+        async def callback(update):
+            received.append(update["price"])
+
+        await pool.subscribe(["A", "B", "C"], callback)
+        first, second = pool.connections
+        await first.streamer.emit("A", 1.0)
+        # A stale subscription for A on a connection that no longer owns it.
+        second.streamer.subscribers["A"] = second.on_tick
+        await second.streamer.emit("A", 2.0)
+        await second.streamer.emit("B", 3.0)
+        return received
+
+    assert asyncio.run(run()) == [1.0, 3.0]
+
+
+def test_dead_connection_is_replaced_and_resubscribed(upstream):
+    async def run():
+        received = []
+
+        async def callback(update):
+            received.append((update["symbol"], update["price"]))
+
+        pool = PooledStreamer("TwelveData", symbols_per_connection=2)
+        await pool.subscribe(["AAPL", "MSFT", "TSLA"], callback)
+        first, second = pool.connections
+        sockets = {frozenset(socket.sent[0]["params"]["symbols"].split(",")): socket for socket in upstream.sockets}
+        dead, alive = sockets[frozenset(second.symbols)], sockets[frozenset(first.symbols)]
+
+        dead.drop()
+        await asyncio.sleep(0.01)
+        replacement = upstream.latest
+        assert len(upstream.sockets) == 3 and second not in pool.connections
+        assert replacement.sent == [{"action": "subscribe", "params": {"symbols": "MSFT"}}]
+        # The healthy connection and its symbols are untouched.
+        assert first in pool.connections and first.symbols == {"AAPL", "TSLA"} and len(alive.sent) == 1
+
+        replacement.push({"event": "price", "symbol": "MSFT", "price": 410.0, "timestamp": 1_700_000_001})
+        alive.push({"event": "price", "symbol": "AAPL", "price": 190.0, "timestamp": 1_700_000_001})
+        await asyncio.sleep(0.01)
+        await pool.disconnect()
+        return received
+
+    assert asyncio.run(run()) == [("MSFT", 410.0), ("AAPL", 190.0)]
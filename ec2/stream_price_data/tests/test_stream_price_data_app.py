@@ -0,0 +1,55 @@
+import os
+import time
+
+import metrics
+import ssm_config
+import stream_price_data_app
+from stream_price_data_app import metrics_port, restart_exited, run_worker, start_worker
+
+
+def crash(provider_class, slot):
+    os._exit(3)
+
+
+def idle(provider_class, slot):
+    time.sleep(30)
+
+
+def test_crashed_worker_is_restarted_in_its_slot(monkeypatch):
+    monkeypatch.setattr(stream_price_data_app, "RESTART_DELAY_SECONDS", 0)
+    processes = {}
+    start_worker(processes, 0, None, target=idle)
+    start_worker(processes, 1, None, target=crash)
+    healthy, crashed = processes[0], processes[1]
+
+    try:
+        restart_exited(processes, lambda slot: start_worker(processes, slot, None, target=idle))
+        assert crashed.exitcode == 3
+        assert processes[0] is healthy
+        assert processes[1] is not crashed and processes[1].is_alive()
+    finally:
+        for process in processes.values():
+            process.terminate()
+            process.join()
+
+
+def test_each_worker_gets_its_own_metrics_port(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_PORT", 9108)
+    assert [metrics_port(worker) for worker in range(3)] == [9108, 9109, 9110]
+    monkeypatch.setattr(metrics, "METRICS_PORT", 0)
+    assert metrics_port(2) == 0
+
+
+def test_worker_creates_its_own_ssm_client(monkeypatch):
+    inherited = object()
+    monkeypatch.setattr(ssm_config.parameters, "_client", inherited)
+    monkeypatch.setattr(stream_price_data_app.signal, "signal", lambda *args: None)
+    started = []
+
+    def fake_run(coroutine):
+        coroutine.close()
+        started.append(ssm_config.parameters._client)
+
+    monkeypatch.setattr(stream_price_data_app.asyncio, "run", fake_run)
+    run_worker(None, 0)
+    assert started == [None]
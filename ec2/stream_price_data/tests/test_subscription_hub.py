@@ -0,0 +1,182 @@
+import asyncio
+
+import metrics
+import subscription_hub
+from broadcast import ClientOutbox
+from providers.twelvedata_streamer import TwelveDataStreamer
+from subscription_hub import SubscriptionHub
+
+
+class FakeStreamer:
+    def __init__(self):
+        self.calls = []
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    async def subscribe(self, symbols, callback):
+        self.calls.append(("subscribe", list(symbols)))
+
+    async def unsubscribe(self, symbols):
+        self.calls.append(("unsubscribe", list(symbols)))
+
+
+def test_failed_unsubscribe_still_sends_subscribe_and_is_retried(upstream, monkeypatch):
+    monkeypatch.setattr(subscription_hub, "FLUSH_RETRY_SECONDS", 0)
+
+    async def run():
+        hub = SubscriptionHub(TwelveDataStreamer(), coalesce_ms=50)
+        a, b = ClientOutbox(None), ClientOutbox(None)
+        await hub.subscribe(["AAPL"], a)
+        await asyncio.sleep(0.1)
+
+        socket = upstream.latest
+        socket.fail_sends = 1
+        await hub.unsubscribe(["AAPL"], a)
+        await hub.subscribe(["MSFT"], b)
+        await asyncio.sleep(0.1)
+
+        # The unsubscribe frame failed, the subscribe went out anyway, and the retry resent the unsubscribe.
+        assert socket.sent == [
+            {"action": "subscribe", "params": {"symbols": "AAPL"}},
+            {"action": "subscribe", "params": {"symbols": "MSFT"}},
+            {"action": "unsubscribe", "params": {"symbols": "AAPL"}},
+        ]
+        assert not hub._pending_unsubscribe
+        assert set(hub.streamer.subscribers) == {"MSFT"}
+        await hub.close()
+
+    asyncio.run(run())
+
+
+def test_failed_subscribe_is_requeued_until_it_succeeds(upstream, monkeypatch):
+    monkeypatch.setattr(subscription_hub, "FLUSH_RETRY_SECONDS", 0)
+
+    async def run():
+        streamer = TwelveDataStreamer()
+        await streamer.connect()
+        socket = upstream.latest
+        socket.fail_sends = 1
+        hub = SubscriptionHub(streamer)
+        await hub.subscribe(["AAPL"], ClientOutbox(None))
+        assert hub.symbol_refs == {"AAPL": 1}
+        assert hub._pending_subscribe == {"AAPL"}
+        assert "AAPL" not in streamer.subscribers
+
+        await asyncio.sleep(0.05)
+        assert socket.sent == [{"action": "subscribe", "params": {"symbols": "AAPL"}}]
+        assert not hub._pending_subscribe
+        assert "AAPL" in streamer.subscribers
+        await hub.close()
+
+    asyncio.run(run())
+
+
+def test_symbols_are_refcounted_across_clients_and_topics():
+    async def run():
+        streamer = FakeStreamer()
+        hub = SubscriptionHub(streamer)
+        a, b = ClientOutbox(None), ClientOutbox(None)
+
+        await hub.subscribe(["AAPL"], a)
+        await hub.subscribe(["AAPL", "AAPL@1m"], b)
+        assert streamer.calls == [("subscribe", ["AAPL"])]
+        assert hub.symbol_refs == {"AAPL": 2}
+        assert hub.subscriber_count("AAPL") == 2
+
+        await hub.unsubscribe(["AAPL"], a)
+        await hub.unsubscribe(["AAPL"], b)
+        assert streamer.calls == [("subscribe", ["AAPL"])]
+
+        await hub.unsubscribe(["AAPL@1m"], b)
+        assert streamer.calls[-1] == ("unsubscribe", ["AAPL"])
+        assert not hub.symbol_refs and not hub.subscribers
+        await hub.close()
+
+    asyncio.run(run())
+
+
+def test_coalescing_batches_clients_and_cancels_out_churn():
+    async def run():
+        streamer = FakeStreamer()
+        hub = SubscriptionHub(streamer, coalesce_ms=20)
+        a, b = ClientOutbox(None), ClientOutbox(None)
+
+        await hub.subscribe(["AAPL", "MSFT"], a)
+        await hub.subscribe(["TSLA"], b)
+        await hub.unsubscribe(["MSFT"], a)
+        assert streamer.calls == []
+
+        await asyncio.sleep(0.05)
+        assert streamer.calls == [("subscribe", ["AAPL", "TSLA"])]
+
+        # Unsubscribing and resubscribing inside the window leaves upstream alone.
+        await hub.unsubscribe(["AAPL"], a)
+        await hub.subscribe(["AAPL"], b)
+        await asyncio.sleep(0.05)
+        assert streamer.calls == [("subscribe", ["AAPL", "TSLA"])]
+        await hub.close()
+
+    asyncio.run(run())
+
+
+def test_new_subscriber_gets_the_last_tick_as_a_snapshot():
+    async def run():
+        hub = SubscriptionHub(FakeStreamer())
+        first = ClientOutbox(None)
+        await hub.subscribe(["AAPL"], first)
+        await hub.dispatch({"symbol": "AAPL", "price": 190.0, "volume": 10, "timestamp": 1_700_000_000_000})
+        assert first.pending["AAPL"].update["price"] == 190.0
+
+        late = ClientOutbox(None)
+        await hub.subscribe(["AAPL"], late)
+        snapshot = late.pending["AAPL"].update
+        assert snapshot["price"] == 190.0 and snapshot["snapshot"] is True
+        await hub.close()
+
+    asyncio.run(run())
+
+
+def test_ticks_resume_after_the_upstream_socket_drops(upstream, monkeypatch):
+    monkeypatch.setattr(subscription_hub, "RECONNECT_BASE_SECONDS", 0)
+
+    async def run():
+        hub = SubscriptionHub(TwelveDataStreamer())
+        outbox = ClientOutbox(None)
+        await hub.subscribe(["AAPL", "MSFT"], outbox)
+        first = upstream.latest
+
+        first.drop()
+        await asyncio.sleep(0.01)
+        assert len(upstream.sockets) == 2
+        second = upstream.latest
+        assert second.sent == [{"action": "subscribe", "params": {"symbols": "AAPL,MSFT"}}]
+
+        second.push({"event": "price", "symbol": "AAPL", "price": 191.0, "timestamp": 1_700_000_001})
+        await asyncio.sleep(0.01)
+        assert outbox.pending["AAPL"].update["price"] == 191.0
+        await hub.close()
+
+    asyncio.run(run())
+
+
+def test_slow_clients_are_reported_while_connected():
+    async def run():
+        hub = SubscriptionHub(FakeStreamer())
+        slow, fast = ClientOutbox(None, max_pending=1, name="10.0.0.1:5000"), ClientOutbox(None, name="10.0.0.2:5000")
+        await hub.subscribe(["AAPL", "MSFT"], slow)
+        await hub.subscribe(["AAPL"], fast)
+        for price in [1.0, 2.0]:
+            await hub.dispatch({"symbol": "AAPL", "price": price, "volume": 1, "timestamp": 1_700_000_000_000})
+            await hub.dispatch({"symbol": "MSFT", "price": price, "volume": 1, "timestamp": 1_700_000_000_000})
+
+        assert hub.top_clients("dropped") == {"10.0.0.1:5000": 3}
+        assert hub.top_clients("conflated") == {"10.0.0.2:5000": 1}
+        rendered = metrics.registry.render()
+        assert 'stream_client_outbox_dropped{client="10.0.0.1:5000"} 3' in rendered
+        await hub.close()
+
+    asyncio.run(run())
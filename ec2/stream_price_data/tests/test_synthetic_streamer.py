@@ -0,0 +1,79 @@
+import asyncio
+
+from providers.synthetic_streamer import SyntheticStreamer
+
+
+async def collect(streamer, symbols, count):
+    received = []
+    enough = asyncio.Event()
+
+    async def callback(update):
+        received.append(update)
+        if len(received) >= count:
+            enough.set()
+
+    await streamer.subscribe(symbols, callback)
+    await asyncio.wait_for(enough.wait(), 5)
+    return received
+
+
+def test_ticks_are_generated_for_subscribed_symbols_only():
+    async def run():
+        streamer = SyntheticStreamer(rate=5000)
+        try:
+            return await collect(streamer, ["AAPL", "MSFT"], 50)
+        finally:
+            await streamer.disconnect()
+
+    received = asyncio.run(run())
+    assert {tick["symbol"] for tick in received} == {"AAPL", "MSFT"}
+    tick = received[0]
+    assert set(tick) == {"symbol", "price", "volume", "timestamp", "sent_us"}
+    assert tick["timestamp"] == tick["sent_us"] // 1000
+    assert all(earlier["sent_us"] <= later["sent_us"] for earlier, later in zip(received, received[1:]))
+
+
+def test_unsubscribed_symbols_stop_ticking():
+    async def run():
+        streamer = SyntheticStreamer(rate=5000)
+        try:
+            await collect(streamer, ["AAPL", "MSFT"], 10)
+            await streamer.unsubscribe(["MSFT"])
+            return await collect(streamer, ["AAPL"], 20), streamer
+        finally:
+            await streamer.disconnect()
+
+    received, streamer = asyncio.run(run())
+    assert {tick["symbol"] for tick in received[-10:]} == {"AAPL"}
+    assert streamer.subscribers == {} and streamer._generator is None
+
+
+def test_same_seed_gives_the_same_walk():
+    async def walk(seed):
+        streamer = SyntheticStreamer(rate=5000, seed=seed)
+        try:
+            received = await collect(streamer, ["AAPL", "MSFT"], 30)
+        finally:
+            await streamer.disconnect()
+        return [(tick["symbol"], tick["price"]) for tick in received[:30]]
+
+    assert asyncio.run(walk(7)) == asyncio.run(walk(7))
+    assert asyncio.run(walk(7)) != asyncio.run(walk(8))
+
+
+def test_no_backlog_builds_up_before_the_first_subscription():
+    async def run():
+        streamer = SyntheticStreamer(rate=1000)
+        await streamer.connect()
+        await asyncio.sleep(0.2)  # ~200 ticks would be due by now
+        received = []
+
+        async def callback(update):
+            received.append(update)
+
+        await streamer.subscribe(["AAPL"], callback)
+        await asyncio.sleep(0.01)
+        await streamer.disconnect()
+        return received
+
+    assert len(asyncio.run(run())) < 100
@@ -0,0 +1,78 @@
+import asyncio
+import struct
+
+from bar_aggregator import BarAggregator
+from providers.replay_streamer import ReplayStreamer
+from tick_recorder import HEADER, MAGIC, TickRecorder, read_ticks, recording_files
+
+# 2024-01-02 15:00:00 UTC, 10:00 New York.
+T0 = 1_704_207_600_000
+NEXT_DAY = T0 + 86_400_000
+
+
+def test_recorded_ticks_replay_in_order(tmp_path):
+    ticks = [
+        {"symbol": "AAPL", "price": 190.5, "volume": 100.0, "day_volume": None, "timestamp": T0},
+        {"symbol": "MSFT", "price": 410.0, "volume": None, "day_volume": 5000.0, "timestamp": T0 + 5},
+        {"symbol": "AAPL", "price": 190.75, "volume": 50.0, "day_volume": None, "timestamp": T0 + 10},
+        {"symbol": "AAPL", "price": 191.0, "volume": 10.0, "day_volume": None, "timestamp": NEXT_DAY},
+    ]
+    recorder = TickRecorder(str(tmp_path))
+    for tick in ticks:
+        recorder.record(tick)
+    recorder.close()
+
+    files = recording_files(str(tmp_path))
+    assert [f.rsplit("/", 1)[1] for f in files] == ["2024-01-02.ticks", "2024-01-03.ticks"]
+
+    async def run():
+        received = []
+
+        async def callback(update):
+            received.append(update)
+
+        streamer = ReplayStreamer(str(tmp_path), speed="max", loop=False)
+        await streamer.subscribe(["AAPL", "MSFT"], callback)
+        await streamer._player
+        return received
+
+    assert asyncio.run(run()) == ticks
+
+
+def test_reopened_day_appends_to_the_recording(tmp_path):
+    recorder = TickRecorder(str(tmp_path))
+    recorder.record({"symbol": "AAPL", "price": 1.0, "volume": 1, "timestamp": T0})
+    recorder.close()
+
+    recorder = TickRecorder(str(tmp_path))
+    recorder.record({"symbol": "MSFT", "price": 2.0, "volume": 1, "timestamp": T0 + 1})
+    recorder.record({"symbol": "AAPL", "price": 3.0, "volume": 1, "timestamp": T0 + 2})
+    recorder.close()
+
+    (path,) = recording_files(str(tmp_path))
+    assert [(t["symbol"], t["price"]) for t in read_ticks(path)] == [("AAPL", 1.0), ("MSFT", 2.0), ("AAPL", 3.0)]
+
+
+def test_replayed_day_volume_builds_bar_volume(tmp_path):
+    # Twelve Data only reports a cumulative day_volume.
+    recorder = TickRecorder(str(tmp_path))
+    for n, day_volume in enumerate([1000, 1200, 1500]):
+        recorder.record({"symbol": "AAPL", "price": 190.0, "day_volume": day_volume, "timestamp": T0 + n})
+    recorder.close()
+
+    (path,) = recording_files(str(tmp_path))
+    bars = BarAggregator()
+    for tick in read_ticks(path):
+        bars.on_tick(tick)
+    assert bars.current("AAPL", "1m").volume == 500
+
+
+def test_version_1_recordings_are_still_readable(tmp_path):
+    (tmp_path / "2024-01-02.symbols").write_text("AAPL\n")
+    record = struct.Struct("<Hddq")
+    with open(tmp_path / "2024-01-02.ticks", "wb") as f:
+        f.write(HEADER.pack(MAGIC, 1, 1) + record.pack(0, 190.5, 100.0, T0))
+
+    assert list(read_ticks(str(tmp_path / "2024-01-02.ticks"))) == [
+        {"symbol": "AAPL", "price": 190.5, "volume": 100.0, "day_volume": None, "timestamp": T0},
+    ]
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from providers.twelvedata_streamer import TwelveDataStreamer
+
+
+def price(symbol, value, timestamp=1_700_000_000, day_volume=1_000):
+    return {"event": "price", "symbol": symbol, "price": value, "timestamp": timestamp, "day_volume": day_volume}
+
+
+def test_batch_subscribe_is_one_frame_and_ticks_route_by_symbol(upstream):
+    async def run():
+        streamer = TwelveDataStreamer()
+        received = []
+
+        async def callback(update):
+            received.append(update)
+
+        await streamer.subscribe(["AAPL", "MSFT", "AAPL"], callback)
+        await streamer.subscribe(["MSFT"], callback)
+        socket = upstream.latest
+        assert socket.sent == [{"action": "subscribe", "params": {"symbols": "AAPL,MSFT"}}]
+
+        socket.push(price("MSFT", 410.0))
+        socket.push(price("TSLA", 250.0))  # not subscribed
+        socket.push({"event": "heartbeat", "status": "ok"})
+        await asyncio.sleep(0.01)
+        await streamer.disconnect()
+        return received
+
+    assert asyncio.run(run()) == [
+        {"symbol": "MSFT", "price": 410.0, "volume": None, "day_volume": 1_000, "timestamp": 1_700_000_000_000}
+    ]
+
+
+def test_failed_subscribe_registers_nothing_so_a_retry_resends(upstream):
+    async def run():
+        streamer = TwelveDataStreamer()
+        await streamer.connect()
+        socket = upstream.latest
+        socket.fail_sends = 1
+
+        async def callback(update):
+            pass
+
+        with pytest.raises(ConnectionError):
+            await streamer.subscribe(["AAPL", "MSFT"], callback)
+        assert streamer.subscribers == {}
+
+        await streamer.subscribe(["AAPL", "MSFT"], callback)
+        assert socket.sent == [{"action": "subscribe", "params": {"symbols": "AAPL,MSFT"}}]
+        assert set(streamer.subscribers) == {"AAPL", "MSFT"}
+        await streamer.disconnect()
+
+    asyncio.run(run())
+
+
+def test_failed_unsubscribe_keeps_symbols_so_a_retry_resends(upstream):
+    async def run():
+        async def callback(update):
+            pass
+
+        streamer = TwelveDataStreamer()
+        await streamer.subscribe(["AAPL", "MSFT"], callback)
+        socket = upstream.latest
+        socket.fail_sends = 1
+
+        with pytest.raises(ConnectionError):
+            await streamer.unsubscribe(["AAPL", "MSFT"])
+        assert set(streamer.subscribers) == {"AAPL", "MSFT"}
+
+        await streamer.unsubscribe(["AAPL", "MSFT"])
+        assert socket.sent[-1] == {"action": "unsubscribe", "params": {"symbols": "AAPL,MSFT"}}
+        assert streamer.subscribers == {}
+        await streamer.disconnect()
+
+    asyncio.run(run())
+
+
+def test_dropped_socket_is_reported_once_per_drop(upstream):
+    async def run():
+        async def callback(update):
+            pass
+
+        streamer = TwelveDataStreamer()
+        lost = []
+        streamer.on_connection_lost = lost.append
+        await streamer.subscribe(["AAPL"], callback)
+
+        upstream.latest.drop()
+        await asyncio.sleep(0.01)
+        assert len(lost) == 1 and isinstance(lost[0], ConnectionError)
+        # A deliberate disconnect is not a lost connection.
+        await streamer.disconnect()
+        await asyncio.sleep(0.01)
+        assert len(lost) == 1
+
+    asyncio.run(run())
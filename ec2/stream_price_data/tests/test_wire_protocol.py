@@ -0,0 +1,56 @@
+import json
+import math
+
+import pytest
+
+from wire_protocol import (
+    FLAG_SNAPSHOT, FRAME_HEADER, FRAME_TICKS, TICK_BODY, TICK_HEADER,
+    EncodedTick, SymbolTable, encode_tick_frame, symbol_ids_message,
+)
+
+
+def decode_tick_frame(frame: bytes) -> list[tuple]:
+    frame_type, count = FRAME_HEADER.unpack_from(frame)
+    assert frame_type == FRAME_TICKS
+    ticks = []
+    offset = FRAME_HEADER.size
+    for _ in range(count):
+        symbol_id, flags = TICK_HEADER.unpack_from(frame, offset)
+        price, volume, timestamp = TICK_BODY.unpack_from(frame, offset + TICK_HEADER.size)
+        ticks.append((symbol_id, flags, price, volume, timestamp))
+        offset += TICK_HEADER.size + TICK_BODY.size
+    assert offset == len(frame)
+    return ticks
+
+
+def test_tick_frame_round_trips():
+    aapl = EncodedTick({"symbol": "AAPL", "price": 190.25, "volume": 300, "timestamp": 1_700_000_000_123})
+    msft = EncodedTick({"symbol": "MSFT", "price": 410, "volume": None, "timestamp": 1_700_000_000_456, "snapshot": True})
+
+    (a, m) = decode_tick_frame(encode_tick_frame([(0, aapl), (7, msft)]))
+    assert a == (0, 0, 190.25, 300.0, 1_700_000_000_123)
+    assert m[:3] == (7, FLAG_SNAPSHOT, 410.0) and math.isnan(m[3]) and m[4] == 1_700_000_000_456
+
+
+def test_encodings_are_computed_once():
+    tick = EncodedTick({"symbol": "AAPL", "price": 1.0, "volume": 1, "timestamp": 0})
+    assert tick.json is tick.json
+    assert tick.body is tick.body
+    assert json.loads(tick.json) == tick.update
+
+
+def test_symbol_table_assigns_new_ids_only():
+    table = SymbolTable()
+    assert table.assign(["AAPL", "MSFT"]) == {"AAPL": 0, "MSFT": 1}
+    assert table.assign(["MSFT", "TSLA"]) == {"TSLA": 2}
+    assert json.loads(symbol_ids_message(table.ids)) == {"event": "symbols", "ids": {"AAPL": 0, "MSFT": 1, "TSLA": 2}}
+
+
+def test_symbol_table_rejects_ids_beyond_uint16(monkeypatch):
+    import wire_protocol
+
+    monkeypatch.setattr(wire_protocol, "MAX_SYMBOL_ID", 1)
+    table = SymbolTable()
+    table.assign(["A", "B"])
+    with pytest.raises(ValueError):
+        table.assign(["C"])
@@ -0,0 +1,175 @@
+"""
+Append-only, memory-mapped tick recordings, one file pair per New York date.
+
+``<date>.ticks`` starts with a fixed header and holds fixed-size records,
+little-endian:
+    header  4s magic b"TQTK", uint16 version, 2 pad bytes, int64 record count
+    record  uint16 symbol id, float64 price, float64 volume (NaN if unknown),
+            float64 day_volume (NaN if unknown), int64 timestamp ms
+Version 1 records have no day_volume; they are still readable.
+``<date>.symbols`` lists the symbols, one per line; a symbol's id is its line number.
+
+The record count is updated in place after every tick, so a reader (or a
+restart after a crash) sees exactly the ticks that were fully written.
+"""
+import math
+import mmap
+import os
+import struct
+from datetime import datetime, time, timedelta
+from typing import Iterator
+
+from bar_aggregator import NY_TZ
+
+MAGIC = b"TQTK"
+VERSION = 2
+HEADER = struct.Struct("<4sHxxq")
+RECORD = struct.Struct("<Hdddq")
+# Readable record layouts by version.
+RECORDS = {1: struct.Struct("<Hddq"), VERSION: RECORD}
+TICKS_SUFFIX = ".ticks"
+SYMBOLS_SUFFIX = ".symbols"
+# Files grow in steps of this many records (about 2.2 MB), so remapping is rare.
+GROW_RECORDS = 64 * 1024
+
+
+def day_bounds(timestamp_ms: int) -> tuple[str, int, int]:
+    """The New York date of ``timestamp_ms`` and that day's start and end in epoch ms."""
+    ny_date = datetime.fromtimestamp(timestamp_ms / 1000, NY_TZ).date()
+    start = datetime.combine(ny_date, time(), NY_TZ)
+    end = datetime.combine(ny_date + timedelta(days=1), time(), NY_TZ)
+    return ny_date.isoformat(), int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+
+class DayFile:
+    """One day's recording opened for appending."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.symbols_path = path[:-len(TICKS_SUFFIX)] + SYMBOLS_SUFFIX
+        self.ids: dict[str, int] = {}
+        if os.path.exists(self.symbols_path):
+            with open(self.symbols_path) as f:
+                for line in f:
+                    self.ids[line.rstrip("\n")] = len(self.ids)
+        self._symbols_file = open(self.symbols_path, "a")
+
+        new = not os.path.exists(path) or os.path.getsize(path) < HEADER.size
+        self._file = open(path, "a+b" if new else "r+b")
+        if new:
+            self._file.truncate(HEADER.size + GROW_RECORDS * RECORD.size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        if new:
+            HEADER.pack_into(self._map, 0, MAGIC, VERSION, 0)
+            self.count = 0
+        else:
+            magic, version, self.count = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} tick recording")
+
+    def _symbol_id(self, symbol: str) -> int:
+        symbol_id = self.ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self.ids[symbol] = len(self.ids)
+            self._symbols_file.write(symbol + "\n")
+            # The symbol must be on disk before any record refers to it.
+            self._symbols_file.flush()
+        return symbol_id
+
+    def append(self, symbol: str, price: float, volume: float, day_volume: float, timestamp: int) -> None:
+        offset = HEADER.size + self.count * RECORD.size
+        if offset + RECORD.size > len(self._map):
+            self._map.resize(len(self._map) + GROW_RECORDS * RECORD.size)
+        RECORD.pack_into(self._map, offset, self._symbol_id(symbol), price, volume, day_volume, timestamp)
+        self.count += 1
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, self.count)
+
+    def close(self) -> None:
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+        self._symbols_file.close()
+
+
+class TickRecorder:
+    """
+    Records normalized ticks (``{"symbol", "price", "volume", "day_volume",
+    "timestamp"}``) into ``directory``, rolling to a new file when the New
+    York date changes.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._day: str | None = None
+        self._file: DayFile | None = None
+        # Cached bounds of the current New York day, in epoch ms.
+        self._day_start = 0
+        self._day_end = 0
+
+    def record(self, tick: dict) -> None:
+        symbol, price, timestamp = tick.get("symbol"), tick.get("price"), tick.get("timestamp")
+        if not symbol or price is None or timestamp is None:
+            return
+
+        timestamp = int(timestamp)
+        if not (self._day_start <= timestamp < self._day_end):
+            day, day_start, day_end = day_bounds(timestamp)
+            if day != self._day:
+                self.close()
+                self._file = DayFile(os.path.join(self.directory, day + TICKS_SUFFIX))
+                self._day = day
+            self._day_start, self._day_end = day_start, day_end
+
+        volume, day_volume = tick.get("volume"), tick.get("day_volume")
+        assert self._file is not None
+        self._file.append(
+            symbol,
+            float(price),
+            math.nan if volume is None else float(volume),
+            math.nan if day_volume is None else float(day_volume),
+            timestamp,
+        )
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._day = None
+            self._day_start = self._day_end = 0
+
+
+def recording_files(path: str) -> list[str]:
+    """``path`` itself if it is a recording, else every recording in the directory, oldest day first."""
+    if os.path.isfile(path):
+        return [path]
+    return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(TICKS_SUFFIX))
+
+
+def read_ticks(path: str) -> Iterator[dict]:
+    """Yield the ticks of one ``.ticks`` file in recorded order."""
+    with open(path[:-len(TICKS_SUFFIX)] + SYMBOLS_SUFFIX) as f:
+        symbols = [line.rstrip("\n") for line in f]
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        magic, version, count = HEADER.unpack_from(data, 0)
+        record = RECORDS.get(version)
+        if magic != MAGIC or record is None:
+            raise ValueError(f"{path} is not a tick recording this version can read")
+        view = memoryview(data)[HEADER.size:HEADER.size + count * record.size]
+        try:
+            for fields in record.iter_unpack(view):
+                if version == 1:
+                    symbol_id, price, volume, timestamp = fields
+                    day_volume = math.nan
+                else:
+                    symbol_id, price, volume, day_volume, timestamp = fields
+                yield {
+                    "symbol": symbols[symbol_id],
+                    "price": price,
+                    "volume": None if math.isnan(volume) else volume,
+                    "day_volume": None if math.isnan(day_volume) else day_volume,
+                    "timestamp": timestamp,
+                }
+        finally:
+            view.release()
@@ -0,0 +1,105 @@
+"""
+Outbound wire formats for price updates.
+
+JSON (default): one text frame per tick,
+    {"symbol": "AAPL", "price": 123.45, "volume": 100, "timestamp": 1700000000000}
+
+Binary (opt-in with ``"format": "binary"`` on a subscribe message):
+the server first sends a JSON text frame assigning per-connection ids,
+    {"event": "symbols", "ids": {"AAPL": 0, "MSFT": 1}}
+then binary frames carrying any number of ticks, little-endian:
+    header  uint8 frame type (1 = ticks), uint16 tick count
+    tick    uint16 symbol id, uint8 flags (bit 0 = snapshot),
+            float64 price, float64 volume (NaN if unknown), int64 timestamp ms
+"""
+import json
+import math
+import struct
+
+JSON = "json"
+BINARY = "binary"
+FORMATS = (JSON, BINARY)
+
+FRAME_TICKS = 1
+FRAME_HEADER = struct.Struct("<BH")
+TICK_HEADER = struct.Struct("<HB")
+TICK_BODY = struct.Struct("<ddq")
+FLAG_SNAPSHOT = 0x01
+
+MAX_SYMBOL_ID = 0xFFFF
+
+
+class EncodedTick:
+    """
+    A normalized tick shared by every subscriber.
+
+    Each encoding is produced lazily on first use and then reused, so a
+    tick is serialized at most once per wire format no matter how many
+    clients receive it.
+    """
+
+    __slots__ = ("update", "_json", "_body", "trace")
+
+    def __init__(self, update: dict):
+        self.update = update
+        # (upstream receive, dispatch) perf_counter_ns when latency is sampled.
+        self.trace: tuple[int, int] | None = None
+        self._json: str | None = None
+        self._body: bytes | None = None
+
+    @property
+    def symbol(self) -> str:
+        return self.update["symbol"]
+
+    @property
+    def json(self) -> str:
+        if self._json is None:
+            self._json = json.dumps(self.update)
+        return self._json
+
+    @property
+    def body(self) -> bytes:
+        """Fixed-width price/volume/timestamp part of the binary record."""
+        if self._body is None:
+            volume = self.update.get("volume")
+            self._body = TICK_BODY.pack(
+                float(self.update["price"]),
+                math.nan if volume is None else float(volume),
+                int(self.update.get("timestamp") or 0),
+            )
+        return self._body
+
+    @property
+    def flags(self) -> int:
+        return FLAG_SNAPSHOT if self.update.get("snapshot") else 0
+
+
+class SymbolTable:
+    """Per-connection symbol -> uint16 id assignments for the binary format."""
+
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+
+    def assign(self, symbols: list[str]) -> dict[str, int]:
+        """Assign ids to any symbols that don't have one yet; return the new ones."""
+        assigned = {}
+        for symbol in symbols:
+            if symbol in self.ids:
+                continue
+            if len(self.ids) > MAX_SYMBOL_ID:
+                raise ValueError("Too many symbols for one binary connection")
+            self.ids[symbol] = assigned[symbol] = len(self.ids)
+        return assigned
+
+
+def symbol_ids_message(ids: dict[str, int]) -> str:
+    return json.dumps({"event": "symbols", "ids": ids})
+
+
+def encode_tick_frame(ticks: list[tuple[int, EncodedTick]]) -> bytes:
+    """Pack (symbol id, tick) pairs into a single binary frame."""
+    parts = [FRAME_HEADER.pack(FRAME_TICKS, len(ticks))]
+    for symbol_id, tick in ticks:
+        parts.append(TICK_HEADER.pack(symbol_id, tick.flags))
+        parts.append(tick.body)
+    return b"".join(parts)
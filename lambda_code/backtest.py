@@ -0,0 +1,244 @@
+import argparse
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from strategy_engine import (
+    RSI_BUY_THRESHOLD,
+    SMA_FAST,
+    SMA_SLOW,
+    crossovers,
+    sma,
+    wilder_rsi,
+)
+
+TRADING_DAYS = 252
+# Charged on every entry and exit, in basis points of the traded value.
+DEFAULT_COST_BPS = 5.0
+# RSI_DIP only says when to buy; the backtest exits once RSI has recovered to neutral.
+RSI_EXIT_THRESHOLD = 50
+
+
+def rsi_dip_signals(close: np.ndarray) -> np.ndarray:
+    rsi = wilder_rsi(close)
+    return np.where(rsi < RSI_BUY_THRESHOLD, 1, np.where(rsi > RSI_EXIT_THRESHOLD, -1, 0)).astype(np.int8)
+
+
+def sma_crossover_signals(close: np.ndarray) -> np.ndarray:
+    return crossovers(sma(close, SMA_FAST), sma(close, SMA_SLOW))
+
+
+# Entry (+1) / exit (-1) signals per bar for each STRATEGY_MAP strategy that can be replayed.
+SIGNAL_RULES = {
+    "RSI_DIP": rsi_dip_signals,
+    "SMA_CROSSOVER": sma_crossover_signals,
+}
+
+
+def align_on_dates(series: dict[str, dict]) -> tuple[list[str], list[str], np.ndarray]:
+    """
+    Put oldest-first ``{"datetime", "close"}`` columns for each symbol on the
+    union of their dates. Gaps inside a symbol's history carry the previous
+    close forward; dates before it listed stay NaN.
+    """
+    symbols = list(series)
+    dates = sorted(set().union(*(s["datetime"] for s in series.values()))) if series else []
+    column = {d: i for i, d in enumerate(dates)}
+    close = np.full((len(symbols), len(dates)), np.nan)
+    for row, symbol in enumerate(symbols):
+        close[row, [column[d] for d in series[symbol]["datetime"]]] = series[symbol]["close"]
+
+    # Forward fill along time.
+    index = np.where(np.isnan(close), 0, np.arange(len(dates)))
+    np.maximum.accumulate(index, axis=1, out=index)
+    close = np.take_along_axis(close, index, axis=1)
+    return symbols, dates, close
+
+
+def positions(signals: np.ndarray) -> np.ndarray:
+    """Long from an entry signal until the next exit signal."""
+    index = np.where(signals != 0, np.arange(signals.shape[1]), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    return np.take_along_axis(signals, index, axis=1) == 1
+
+
+def summarize(returns: np.ndarray) -> dict:
+    """Total return, CAGR, annualized volatility, Sharpe (zero risk-free rate) and max drawdown."""
+    if len(returns) == 0:
+        return {"total_return": 0.0, "cagr": 0.0, "volatility": 0.0, "sharpe": 0.0, "max_drawdown": 0.0}
+    equity = np.cumprod(1 + returns)
+    years = len(returns) / TRADING_DAYS
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+    return {
+        "total_return": round(float(equity[-1] - 1), 6),
+        "cagr": round(float(equity[-1] ** (1 / years) - 1), 6) if equity[-1] > 0 else -1.0,
+        "volatility": round(float(std * math.sqrt(TRADING_DAYS)), 6),
+        "sharpe": round(float(returns.mean() / std * math.sqrt(TRADING_DAYS)), 4) if std > 0 else 0.0,
+        "max_drawdown": round(float(drawdown.min()), 6),
+    }
+
+
+def backtest_block(strategy_code: str, close: np.ndarray, cost_bps: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Replay a strategy over a (symbols, bars) close array. Signals act on a
+    bar's close; the position earns from the next bar on. Returns the
+    per-bar strategy returns and the position held at each close.
+    """
+    held = positions(SIGNAL_RULES[strategy_code](close))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        asset = np.diff(close, axis=1, prepend=np.nan) / np.roll(close, 1, axis=1)
+    asset = np.nan_to_num(asset, nan=0.0)
+    previous = np.pad(held[:, :-1], ((0, 0), (1, 0)))
+    cost = (held != previous) * cost_bps / 10_000
+    return previous * asset - cost, held
+
+
+def trades_for(symbol: str, dates: list[str], close: np.ndarray, held: np.ndarray, cost_bps: float) -> list[dict]:
+    changes = np.diff(held.astype(np.int8), prepend=0)
+    entries = np.flatnonzero(changes == 1)
+    exits = np.flatnonzero(changes == -1)
+    trades = []
+    for k, entry in enumerate(entries):
+        closed = k < len(exits)
+        exit_ = exits[k] if closed else len(dates) - 1
+        gross = close[exit_] / close[entry] - 1
+        trades.append({
+            "symbol": symbol,
+            "entry_date": dates[entry],
+            "entry_price": round(float(close[entry]), 4),
+            "exit_date": dates[exit_] if closed else None,
+            "exit_price": round(float(close[exit_]), 4),
+            "return": round(float(gross - (2 if closed else 1) * cost_bps / 10_000), 6),
+        })
+    return trades
+
+
+def _run_chunk(strategy_code: str, symbols: list[str], dates: list[str], close: np.ndarray, cost_bps: float) -> tuple[dict, np.ndarray]:
+    returns, held = backtest_block(strategy_code, close, cost_bps)
+    results = {}
+    for row, symbol in enumerate(symbols):
+        listed = np.flatnonzero(~np.isnan(close[row]))
+        start = listed[0] if len(listed) else len(dates)
+        active = returns[row, start:]
+        trades = trades_for(symbol, dates, close[row], held[row], cost_bps)
+        closed = [t for t in trades if t["exit_date"] is not None]
+        results[symbol] = {
+            "stats": summarize(active) | {
+                "trades": len(trades),
+                "win_rate": round(sum(t["return"] > 0 for t in closed) / len(closed), 4) if closed else None,
+                "exposure": round(float(held[row, start:].mean()), 4) if len(active) else 0.0,
+            },
+            "trades": trades,
+            "equity": np.round(np.cumprod(1 + returns[row]), 6).tolist(),
+        }
+    return results, returns
+
+
+def run_backtest(
+    series: dict[str, dict],
+    strategy_code: str,
+    cost_bps: float = DEFAULT_COST_BPS,
+    workers: int | None = None,
+) -> dict:
+    """
+    Backtest ``strategy_code`` over daily ``series`` (symbol -> oldest-first
+    ``{"datetime", "close"}`` columns, as returned by get_ohlcv).
+
+    Symbols are split into blocks that are replayed in parallel on a process
+    pool, each block vectorized over its symbols. Returns per-symbol trades,
+    equity curves and statistics, plus an equal-weight portfolio of all
+    symbols that were listed on each day.
+    """
+    if strategy_code not in SIGNAL_RULES:
+        raise ValueError(f"Unsupported strategy: {strategy_code}")
+
+    if not series:
+        raise ValueError("No price data to backtest")
+
+    symbols, dates, close = align_on_dates(series)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(symbols)))
+    size = math.ceil(len(symbols) / workers)
+    blocks = [slice(i, i + size) for i in range(0, len(symbols), size)]
+
+    if workers == 1:
+        outputs = [_run_chunk(strategy_code, symbols[b], dates, close[b], cost_bps) for b in blocks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_chunk, strategy_code, symbols[b], dates, close[b], cost_bps) for b in blocks]
+            outputs = [f.result() for f in futures]
+
+    per_symbol = {}
+    for results, _ in outputs:
+        per_symbol.update(results)
+    returns = np.vstack([r for _, r in outputs])
+
+    # Equal weight across symbols that had a price on the previous day.
+    listed = ~np.isnan(np.roll(close, 1, axis=1))
+    listed[:, :1] = False
+    counts = listed.sum(axis=0)
+    portfolio = np.divide((returns * listed).sum(axis=0), counts, out=np.zeros(len(dates)), where=counts > 0)
+
+    return {
+        "strategy": strategy_code,
+        "start": dates[0],
+        "end": dates[-1],
+        "dates": dates,
+        "portfolio": {
+            "stats": summarize(portfolio),
+            "equity": np.round(np.cumprod(1 + portfolio), 6).tolist(),
+        },
+        "symbols": per_symbol,
+    }
+
+
+def load_daily(symbols: list[str], years: int) -> dict[str, dict]:
+    """Daily columns per symbol through the OHLCV cache; symbols that fail are skipped."""
+    from get_ohlcv import MAX_OUTPUTSIZE, get_api_key, get_batch, to_columns
+
+    bars = min(years * TRADING_DAYS + SMA_SLOW, MAX_OUTPUTSIZE)
+    responses, _ = get_batch(symbols, "1day", bars, get_api_key)
+    series = {}
+    for symbol in symbols:
+        columns = to_columns(responses[symbol])
+        if "error" in columns:
+            print(f"Skipping {symbol}: {columns['error']}")
+        else:
+            series[symbol] = columns
+    return series
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backtest a STRATEGY_MAP strategy over stored daily OHLCV")
+    parser.add_argument("--strategy", required=True, choices=sorted(SIGNAL_RULES))
+    parser.add_argument("--symbols", help="comma-separated symbols")
+    parser.add_argument("--index", help="index name from us_index_constituents.json, e.g. 'S&P 500'")
+    parser.add_argument("--constituents", default="us_index_constituents.json")
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--cost-bps", type=float, default=DEFAULT_COST_BPS)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--output", help="write the full result as JSON here")
+    args = parser.parse_args()
+
+    if args.index:
+        with open(args.constituents) as f:
+            companies = json.load(f)["companies"]
+        symbols = [c["Symbol"] for c in companies if args.index in c.get("indexes", [])]
+    else:
+        symbols = [s.strip().upper() for s in (args.symbols or "").split(",") if s.strip()]
+    if not symbols:
+        parser.error("give --symbols or --index")
+
+    result = run_backtest(load_daily(symbols, args.years), args.strategy, args.cost_bps, args.workers)
+    print(json.dumps({"strategy": result["strategy"], "start": result["start"], "end": result["end"],
+                      "portfolio": result["portfolio"]["stats"]}, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,5 @@
 import json
-from evaluate_strategy import evaluate_strategy
-import os
-
-API_KEY = os.environ['ALPHA_VANTAGE_KEY']
+from evaluation_executor import evaluate_all, request_deadline
 
 def lambda_handler(event, context):
     try:
@@ -10,27 +7,24 @@ def lambda_handler(event, context):
         tickers = body.get("tickers", [])
         strategies = body.get("strategies", [])
 
-        results = []
+        if body.get("engine") == "vectorized":
+            # Whole universe from cached daily OHLCV in one pass, no per-ticker indicator calls.
+            # Same response schema as below; one pass has no deadline, so it is always complete.
+            from strategy_engine import screen
+            return {
+                "statusCode": 200,
+                "body": json.dumps({"results": screen(tickers, strategies), "complete": True}),
+                "headers": {
+                    "Access-Control-Allow-Origin": "*"
+                }
+            }
 
-        for ticker in tickers:
-            try:
-                evaluations = []
-                for strategy_code in strategies:
-                    evaluation = evaluate_strategy(ticker, strategy_code)
-                    evaluations.append(evaluation)
-                results.append({
-                    "ticker": ticker,
-                    "evaluations": evaluations
-                })
-            except Exception as e:
-                results.append({
-                    "ticker": ticker,
-                    "error": str(e)
-                })
+        # Concurrent, with errors isolated per (ticker, strategy); partial results at the deadline.
+        results, complete = evaluate_all(tickers, strategies, deadline_seconds=request_deadline(context))
 
         return {
             "statusCode": 200,
-            "body": json.dumps({"results": results}),
+            "body": json.dumps({"results": results, "complete": complete}),
             "headers": {
                 "Access-Control-Allow-Origin": "*"
             }
@@ -1,29 +1,16 @@
 import json
-from evaluate_strategy import evaluate_strategy
+from evaluation_executor import evaluate_all, request_deadline
 
 def lambda_handler(event, context):
     body = json.loads(event.get("body", "{}"))
     tickers = body.get("tickers", [])
     strategies = body.get("strategies", [])
 
-    results = []
-
-    for ticker in tickers:
-        try:
-            ticker_result = {"ticker": ticker, "evaluations": []}
-            for strategy_code in strategies:
-                evaluation = evaluate_strategy(ticker, strategy_code)
-                ticker_result["evaluations"].append(evaluation)
-            results.append(ticker_result)
-        except Exception as e:
-            results.append({
-                "ticker": ticker,
-                "error": str(e)
-            })
+    results, complete = evaluate_all(tickers, strategies, deadline_seconds=request_deadline(context))
 
     return {
         "statusCode": 200,
-        "body": json.dumps({"results": results}),
+        "body": json.dumps({"results": results, "complete": complete}),
         "headers": {
             "Access-Control-Allow-Origin": "*"
         }
@@ -1,7 +1,21 @@
+import os
+
+from result_cache import StrategyResultCache, result_key
 from strategies import STRATEGY_MAP
 
+# Module-level so warm containers reuse results; S3 shares them across containers and cold starts.
+result_cache = StrategyResultCache(
+    max_entries=int(os.environ.get("STRATEGY_CACHE_MAX_ENTRIES", "1024")),
+    bucket=os.environ.get("STRATEGY_CACHE_S3_BUCKET", ""),
+)
+
 def evaluate_strategy(ticker: str, strategy_code: str) -> dict:
     strategy_fn = STRATEGY_MAP.get(strategy_code)
     if not strategy_fn:
         raise ValueError(f"Unsupported strategy: {strategy_code}")
-    return strategy_fn(ticker)
+    # Same answer until the next daily bar, so concurrent and repeat requests share one evaluation.
+    data, _ = result_cache.get_or_fetch(
+        result_key(ticker, strategy_code),
+        lambda: strategy_fn(ticker),
+    )
+    return data
@@ -0,0 +1,76 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable
+
+# Evaluations in flight at once; each is mostly waiting on a remote API.
+EVALUATION_CONCURRENCY = int(os.environ.get("EVALUATION_CONCURRENCY", "8"))
+# Upper bound on a request's evaluation time; partial results are returned after it.
+EVALUATION_DEADLINE_SECONDS = float(os.environ.get("EVALUATION_DEADLINE_SECONDS", "20"))
+# Time kept back from the Lambda's own timeout for serializing the response.
+RESPONSE_MARGIN_SECONDS = 1.0
+
+
+def request_deadline(context, deadline_seconds: float = EVALUATION_DEADLINE_SECONDS) -> float:
+    """Seconds this request may spend evaluating, capped by the Lambda's remaining time."""
+    if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+        remaining = context.get_remaining_time_in_millis() / 1000 - RESPONSE_MARGIN_SECONDS
+        return max(0.0, min(deadline_seconds, remaining))
+    return deadline_seconds
+
+
+def _timed(evaluate: Callable[[str, str], dict], ticker: str, strategy_code: str) -> dict:
+    started = time.perf_counter()
+    try:
+        result = dict(evaluate(ticker, strategy_code))
+    except Exception as e:
+        # One failing strategy must not take the ticker's other evaluations with it.
+        result = {"strategy": strategy_code, "error": str(e)}
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def evaluate_all(
+    tickers: list[str],
+    strategies: list[str],
+    evaluate: Callable[[str, str], dict] | None = None,
+    max_workers: int = EVALUATION_CONCURRENCY,
+    deadline_seconds: float = EVALUATION_DEADLINE_SECONDS,
+) -> tuple[list[dict], bool]:
+    """
+    Run every (ticker, strategy) evaluation (``evaluate_strategy`` unless
+    ``evaluate`` is given) concurrently on at most
+    ``max_workers`` threads and return ``(results, complete)``.
+
+    Results keep the handlers' shape, ``{"ticker", "evaluations"}`` in
+    request order, with ``elapsed_ms`` on each evaluation. A failed
+    evaluation becomes ``{"strategy", "error"}`` in its slot. Anything still
+    running at the deadline is reported as ``{"strategy", "error",
+    "timed_out": True}`` and ``complete`` is False.
+    """
+    if evaluate is None:
+        # Imported on first use, so callers passing their own ``evaluate`` never load the strategies.
+        from evaluate_strategy import evaluate_strategy as evaluate
+
+    tickers = list(dict.fromkeys(tickers))
+    pairs = [(ticker, code) for ticker in tickers for code in strategies]
+    if not pairs:
+        return [{"ticker": ticker, "evaluations": []} for ticker in tickers], True
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pairs))))
+    try:
+        futures = [pool.submit(_timed, evaluate, ticker, code) for ticker, code in pairs]
+        done, _ = wait(futures, timeout=deadline_seconds)
+    finally:
+        # Don't wait for stragglers; queued evaluations are dropped.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    evaluations: dict[str, list[dict]] = {ticker: [] for ticker in tickers}
+    for (ticker, code), future in zip(pairs, futures):
+        if future in done:
+            evaluations[ticker].append(future.result())
+        else:
+            evaluations[ticker].append({"strategy": code, "error": "Deadline exceeded", "timed_out": True})
+
+    results = [{"ticker": ticker, "evaluations": evaluations[ticker]} for ticker in tickers]
+    return results, len(done) == len(futures)
@@ -1,10 +1,17 @@
 import os
 import json
+import hashlib
+import random
 import time
 import requests
 import boto3
 import botocore.exceptions
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import TokenBucket
+from refresh_scheduler import decay_views, is_recently_added, parse_timestamp, select_due
 
 try:
     from dotenv import load_dotenv
@@ -16,15 +23,65 @@ except ImportError:
 FINNHUB_API_KEY = os.environ.get("FINNHUB_API_KEY")
 S3_BUCKET = os.environ.get("FUNDAMENTALS_S3_BUCKET_NAME", "tickerquote-fundamentals-bucket")
 AWS_REGION = os.environ.get("AWS_REGION", "us-east-1")
+# Finnhub free tier allows 60 calls/min; stay just under it.
+FINNHUB_CALLS_PER_MINUTE = int(os.environ.get("FINNHUB_CALLS_PER_MINUTE", "55"))
+FETCH_CONCURRENCY = int(os.environ.get("FUNDAMENTALS_FETCH_CONCURRENCY", "8"))
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 2.0
+REQUEST_TIMEOUT_SECONDS = 10
+# Upper bound on symbols refreshed per run; the Lambda's remaining time also caps it.
+REFRESH_BATCH_SIZE = int(os.environ.get("FUNDAMENTALS_REFRESH_BATCH", "300"))
+# Every symbol in the universe is refreshed at least once per cycle.
+REFRESH_CYCLE_HOURS = float(os.environ.get("FUNDAMENTALS_REFRESH_CYCLE_HOURS", "24"))
+# Indexes whose constituents make up the refresh universe.
+REFRESH_INDEXES = {i.strip() for i in os.environ.get("FUNDAMENTALS_INDEXES", "S&P 500,NASDAQ-100,Dow Jones").split(",")}
+# Leave time at the end of an invocation for the S3 writes.
+RUN_TIME_MARGIN_SECONDS = 30
+
+# Per-symbol shards plus a small manifest readers can poll for changes.
+SHARD_PREFIX = "fundamentals/"
+MANIFEST_KEY = f"{SHARD_PREFIX}manifest.json"
+# Combined file the frontend still reads; patched with changed symbols only.
+LEGACY_KEY = "djia_fundamentals.json"
+# Scheduler state (view counts, last run) carried between invocations.
+STATE_KEY = f"{SHARD_PREFIX}_scheduler_state.json"
+
+# S3 client, created on first use rather than at import.
+_s3 = None
 
-# S3 client
-s3 = boto3.client("s3", region_name=AWS_REGION)
+def get_s3():
+    global _s3
+    if _s3 is None:
+        _s3 = boto3.client("s3", region_name=AWS_REGION)
+    return _s3
 
-def fetch_fundamentals(symbol: str):
+def make_session(pool_size: int = FETCH_CONCURRENCY) -> requests.Session:
+    # One pooled session so worker threads reuse TLS connections to Finnhub.
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+    return session
+
+def fetch_fundamentals(symbol: str, session=None, limiter: TokenBucket | None = None):
     # Fetch all available metrics for a given symbol to minimize API calls and ensure comprehensive snapshots.
     url = "https://finnhub.io/api/v1/stock/metric"
     params = {"symbol": symbol, "metric": "all", "token": FINNHUB_API_KEY}
-    response = requests.get(url, params=params)
+    http = session or requests
+
+    for attempt in range(MAX_RETRIES + 1):
+        # Every attempt, retries included, spends a token from the shared budget.
+        if limiter:
+            limiter.acquire()
+        response = http.get(url, params=params, timeout=REQUEST_TIMEOUT_SECONDS)
+        if response.status_code == 429 and attempt < MAX_RETRIES:
+            # Rate limited anyway (e.g. another consumer of the same key): back off with jitter.
+            retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else BACKOFF_SECONDS * 2 ** attempt
+            delay += random.uniform(0, delay / 2)
+            print(f"Rate limited on {symbol}; retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+        break
+
     if response.status_code != 200:
         print(f"Error fetching data for {symbol}: {response.text}")
         return None
@@ -34,49 +91,154 @@ def fetch_fundamentals(symbol: str):
     data["updated"] = datetime.utcnow().isoformat()
     return data
 
+def fetch_all_fundamentals(symbols: list[str]) -> dict:
+    # Overlap request latency across a small thread pool while a shared token
+    # bucket keeps the combined call rate under the Finnhub budget.
+    limiter = TokenBucket(FINNHUB_CALLS_PER_MINUTE / 60)
+    results = {}
+    with make_session() as session, ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY) as pool:
+        futures = {pool.submit(fetch_fundamentals, symbol, session, limiter): symbol for symbol in symbols}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                results[symbol] = future.result()
+            except Exception as e:
+                # One failed symbol (timeout, connection reset) shouldn't sink the whole run.
+                print(f"Error fetching data for {symbol}: {e}")
+                results[symbol] = None
+    return {symbol: results[symbol] for symbol in symbols}
+
+def shard_key(symbol: str) -> str:
+    return f"{SHARD_PREFIX}{symbol}.json"
+
+def content_hash(data: dict) -> str:
+    # Hash everything except our own metadata, so a refetch with identical metrics hashes the same.
+    content = {k: v for k, v in data.items() if k not in ("updated", "hash")}
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+def load_json_object(key: str, default):
+    try:
+        return json.load(get_s3().get_object(Bucket=S3_BUCKET, Key=key)["Body"])
+    except botocore.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+            return default
+        raise
+
+def put_json_object(key: str, data, cache_control: str | None = None) -> None:
+    extra = {"CacheControl": cache_control} if cache_control else {}
+    get_s3().put_object(
+        Bucket=S3_BUCKET,
+        Key=key,
+        Body=json.dumps(data),
+        ContentType="application/json",
+        **extra)
+
+def run_budget(context=None) -> int:
+    # Calls this invocation can afford: the rate limit times the Lambda time left, capped by the batch size.
+    if context is None:
+        return REFRESH_BATCH_SIZE
+    usable_seconds = context.get_remaining_time_in_millis() / 1000 - RUN_TIME_MARGIN_SECONDS
+    return max(0, min(REFRESH_BATCH_SIZE, int(usable_seconds / 60 * FINNHUB_CALLS_PER_MINUTE)))
+
+def refresh_fundamentals(symbols: list[str], manifest: dict, selected: list[str]) -> dict:
+    """
+    Refetch the ``selected`` symbols and write shards whose content changed.
+
+    Updates ``manifest`` in place and returns ``{symbol: data}`` for changed
+    symbols. Failed fetches leave the previous shard and manifest entry
+    alone, so they stay overdue and are retried first next run.
+    """
+    entries = manifest.setdefault("symbols", {})
+    print(f"Refreshing {len(selected)} of {len(symbols)} symbols")
+    fetched = fetch_all_fundamentals(selected)
+
+    checked = datetime.utcnow().isoformat()
+    changed = {}
+    for symbol, data in fetched.items():
+        if data is None:
+            continue
+
+        entry = entries.get(symbol, {})
+        digest = content_hash(data)
+        if entry.get("hash") != digest:
+            data["hash"] = digest
+            put_json_object(shard_key(symbol), data)
+            entry = {"key": shard_key(symbol), "hash": digest, "updated": data["updated"]}
+            changed[symbol] = data
+        entry["checked"] = checked
+        entries[symbol] = entry
+
+    # Drop symbols that left the universe; their shards are left in place. An
+    # empty universe means the constituents couldn't be read, not that every
+    # symbol left, so nothing is pruned then.
+    if symbols:
+        for symbol in set(entries) - set(symbols):
+            del entries[symbol]
+    manifest["updated"] = checked
+    return changed
+
 def handler(event=None, context=None):
     US_INDEX_CONSTITUENTS_FILE='us_index_constituents.json'
     try:
         # The index constituent file is stored in S3 to decouple symbol lists from code deployments.
         # This enables index updates without redeploying Lambda.
-        # May expand to other markets later but gotta keep it low-cost for now.
-        boto3data = s3.get_object(Bucket=S3_BUCKET, Key=US_INDEX_CONSTITUENTS_FILE)
+        boto3data = get_s3().get_object(Bucket=S3_BUCKET, Key=US_INDEX_CONSTITUENTS_FILE)
         constituents = json.load(boto3data['Body'])
         companies = constituents['companies']
-        # Only process Dow Jones symbols for now, to keep API usage within free tier and focus on core index.
-        djia_symbols = [c['Symbol'] for c in companies if 'Dow Jones' in c.get('indexes', [])]
 
     except botocore.exceptions.ClientError as e:
         # Logging and fallback: If the constituent file is missing or access fails, the function should not crash.
         print(f"S3 access error: {e.response['Error']['Message']}")
-        djia_symbols = []
+        companies = []
 
     except json.JSONDecodeError:
         # Defensive: The file on S3 could be corrupted, so fail gracefully.
         print("Failed to decode JSON from S3 object body.")
-        djia_symbols = []
+        companies = []
 
     except Exception as e:
         # Catch-all for any unexpected issues to avoid Lambda failures.
         print(f"Unexpected error: {e}")
-        djia_symbols = []
+        companies = []
+
+    # The whole configured universe is spread over the refresh cycle instead of just the Dow.
+    universe = [c['Symbol'] for c in companies if REFRESH_INDEXES & set(c.get('indexes', []))]
+    djia_symbols = [c['Symbol'] for c in companies if 'Dow Jones' in c.get('indexes', [])]
+    if not universe:
+        # Never write a manifest from an empty universe; it would drop every entry.
+        print("No constituents loaded; skipping refresh")
+        return {"statusCode": 500, "body": "Constituents unavailable"}
 
-    fundamentals = {}
-    for symbol in djia_symbols:
-        print(f"Fetching {symbol}")
-        fundamentals[symbol] = fetch_fundamentals(symbol)
-        # Finnhub free tier enforces a rate limit; this sleep ensures we stay under 60 requests/min.
-        time.sleep(1.2)
+    now = datetime.utcnow()
+    recent = {c['Symbol'] for c in companies if is_recently_added(c.get('Date added'), now.date())}
 
     try:
-        # Store the full result set in S3 as a single JSON for efficient downstream access and atomic updates.
-        s3.put_object(
-            Bucket=S3_BUCKET,
-            Key='djia_fundamentals.json',
-            Body=json.dumps(fundamentals),
-            ContentType='application/json')
-        print(f"Uploaded djia_fundamentals.json with {len(fundamentals)} entries")
-        return {"statusCode": 200, "body": f"{len(fundamentals)} symbols uploaded"}
+        manifest = load_json_object(MANIFEST_KEY, {"symbols": {}})
+        state = load_json_object(STATE_KEY, {})
+        cycle_seconds = REFRESH_CYCLE_HOURS * 3600
+
+        last_run = parse_timestamp(state.get("last_run"))
+        elapsed = (now - last_run).total_seconds() if last_run else 0
+        views = decay_views(state.get("views", {}), elapsed, cycle_seconds)
+        # Callers can report symbol views, e.g. {"viewed": {"AAPL": 3}}, to raise their priority.
+        for symbol, count in ((event or {}).get("viewed") or {}).items():
+            views[symbol.upper()] = views.get(symbol.upper(), 0.0) + float(count)
+
+        due = select_due(universe, manifest.get("symbols", {}), now, cycle_seconds, run_budget(context), views, recent)
+        changed = refresh_fundamentals(universe, manifest, due)
+
+        # Manifest is polled by readers, so it must not be cached; shards are fetched only when their hash changes.
+        put_json_object(MANIFEST_KEY, manifest, cache_control="no-cache")
+        put_json_object(STATE_KEY, {"last_run": now.isoformat(), "views": views})
+
+        djia_changed = {s: changed[s] for s in djia_symbols if s in changed}
+        if djia_changed:
+            legacy = load_json_object(LEGACY_KEY, {})
+            legacy = {symbol: legacy.get(symbol) for symbol in djia_symbols}
+            legacy.update(djia_changed)
+            put_json_object(LEGACY_KEY, legacy)
+        print(f"Uploaded {len(changed)} changed shards and {MANIFEST_KEY}")
+        return {"statusCode": 200, "body": f"{len(due)} symbols refreshed, {len(changed)} changed"}
 
     except Exception as e:
         # Defensive: S3 upload can fail (e.g., permissions, network); log errors for observability.
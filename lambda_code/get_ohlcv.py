@@ -1,54 +1,204 @@
 import os
 import json
-import requests
-import boto3
+from concurrent.futures import ThreadPoolExecutor
+
+import ssm_config
+from ohlcv_cache import MEMORY, MISS, S3, OhlcvCache
 
 # Use SSM Parameter Store instead of environment variables for the API key.
 # This allows for safer secrets management and enables key rotation without redeploying code.
-ssm = boto3.client('ssm')
+# ssm_config caches it across warm invocations and re-reads it in the background for rotation.
+API_KEY_PARAM = "TWELVE_DATA_API_KEY"
+ssm_config.register(API_KEY_PARAM)
 
-def lambda_handler(event, context):
-    # Extract symbol and interval from query parameters, using "1day" as a default interval.
-    symbol = event.get("queryStringParameters", {}).get("symbol")
-    interval = event.get("queryStringParameters", {}).get("interval", "1day")
+DEFAULT_OUTPUTSIZE = 100  # Limit to 100 data points for performance and rate limiting reasons.
+MAX_OUTPUTSIZE = 5000  # Twelve Data's upper bound for time_series.
+MAX_SYMBOLS = int(os.environ.get("OHLCV_MAX_SYMBOLS", "50"))  # Per batch request, to bound Lambda runtime.
+# Twelve Data accepts comma-separated symbols on time_series; each symbol still costs one credit.
+UPSTREAM_BATCH_SIZE = int(os.environ.get("TWELVE_DATA_BATCH_SIZE", "8"))
+UPSTREAM_CONCURRENCY = int(os.environ.get("TWELVE_DATA_CONCURRENCY", "4"))
+COLUMNS = ("open", "high", "low", "close")
 
-    if not symbol:
-        # Fast fail for missing required arguments, returning a clear error for easier client debugging.
-        return {
-            "statusCode": 400,
-            "body": json.dumps({"error": "Missing required parameter: symbol"})
-        }
+TIME_SERIES_URL = "https://api.twelvedata.com/time_series"
 
-    # Retrieve the API key securely from AWS SSM Parameter Store.
-    # This pattern avoids storing sensitive data in Lambda environment variables or code.
-    try:
-        api_key = ssm.get_parameter(Name="TWELVE_DATA_API_KEY", WithDecryption=True)["Parameter"]["Value"]
-    except Exception as e:
-        # If SSM is misconfigured or the key is missing, return a 500 to signal a server-side configuration issue.
-        return {"statusCode": 500, "body": json.dumps({"error": f"SSM error: {str(e)}"})}
+# One pooled session per container so batch chunks reuse keep-alive connections.
+# Created on the first upstream call; cache hits never import requests.
+session = None
+
+def get_session():
+    global session
+    if session is None:
+        import requests
+        session = requests.Session()
+        session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=UPSTREAM_CONCURRENCY))
+    return session
+
+# Module-level so warm containers keep serving from memory; S3 persists across cold starts when configured.
+ohlcv_cache = OhlcvCache(
+    max_entries=int(os.environ.get("OHLCV_CACHE_MAX_ENTRIES", "256")),
+    bucket=os.environ.get("OHLCV_CACHE_S3_BUCKET", ""),
+)
 
+def is_cacheable(data: dict) -> bool:
+    # Never cache provider errors (bad symbol, exhausted credits); those should be retried.
+    return data.get("status") == "ok"
+
+def fetch_time_series(symbol: str, interval: str, outputsize: int, api_key: str) -> dict:
     # Prepare the request to the external OHLCV data provider.
     # Parameters are kept minimal to avoid hitting API rate limits and to simplify downstream parsing.
-    url = f"https://api.twelvedata.com/time_series"
     params = {
         "symbol": symbol,
         "interval": interval,
-        "outputsize": 100,  # Limit to 100 data points for performance and rate limiting reasons.
+        "outputsize": outputsize,
         "apikey": api_key,
     }
+    # Make the external API call. No retry logic here—fail fast and surface the error upstream.
+    response = get_session().get(TIME_SERIES_URL, params=params)
+    return response.json()
+
+def fetch_time_series_batch(symbols: list[str], interval: str, outputsize: int, api_key: str) -> dict[str, dict]:
+    """One upstream call for several symbols, returning each symbol's own time_series response."""
+    data = fetch_time_series(",".join(symbols), interval, outputsize, api_key)
+    if len(symbols) == 1:
+        # A single symbol comes back un-nested.
+        return {symbols[0]: data}
+    if data.get("status") == "error":
+        # The whole request was rejected (bad key, out of credits).
+        return {symbol: data for symbol in symbols}
+    missing = {"status": "error", "message": "Symbol missing from batch response"}
+    return {symbol: data.get(symbol, missing) for symbol in symbols}
+
+def parse_symbols(raw: str) -> list[str]:
+    # Normalize and de-duplicate while keeping the caller's order.
+    return list(dict.fromkeys(s.strip().upper() for s in raw.split(",") if s.strip()))
+
+def to_columns(data: dict) -> dict:
+    """
+    Turn a time_series response into oldest-first column arrays, e.g.
+    ``{"datetime": [...], "open": [...], ..., "volume": [...]}``, or
+    ``{"error": message}`` for a failed symbol.
+    """
+    if data.get("status") != "ok":
+        return {"error": data.get("message", "Unknown provider error")}
+
+    rows = data.get("values", [])[::-1]
+    columns = {"datetime": [row["datetime"] for row in rows]}
+    for name in COLUMNS:
+        columns[name] = [float(row[name]) for row in rows]
+    # Indices and forex pairs have no volume.
+    if rows and "volume" in rows[0]:
+        columns["volume"] = [int(float(row["volume"])) for row in rows]
+    return columns
+
+def get_batch(symbols: list[str], interval: str, outputsize: int, get_api_key) -> tuple[dict[str, dict], dict[str, int]]:
+    """
+    Resolve each symbol from the cache, then fetch the misses in comma-joined
+    chunks of ``UPSTREAM_BATCH_SIZE`` sent concurrently over the pooled session.
+    Symbols another request is already fetching are waited on, not refetched.
+    Returns raw responses per symbol and a count of symbols served by each tier.
+    """
+    def fetch_misses(keys: list[tuple]) -> dict[tuple, dict]:
+        api_key = get_api_key()
+        misses = [symbol for symbol, _, _ in keys]
+        chunks = [misses[i:i + UPSTREAM_BATCH_SIZE] for i in range(0, len(misses), UPSTREAM_BATCH_SIZE)]
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=min(UPSTREAM_CONCURRENCY, len(chunks))) as pool:
+            for batch in pool.map(lambda chunk: fetch_time_series_batch(chunk, interval, outputsize, api_key), chunks):
+                fetched.update(batch)
+        return {(symbol, interval, outputsize): fetched[symbol] for symbol in misses}
+
+    cached = ohlcv_cache.get_or_fetch_many(
+        [(symbol, interval, outputsize) for symbol in symbols], fetch_misses, cacheable=is_cacheable
+    )
+    results = {}
+    tiers = {MEMORY: 0, S3: 0, MISS: 0}
+    for symbol in symbols:
+        results[symbol], tier = cached[(symbol, interval, outputsize)]
+        tiers[tier] += 1
+    return results, tiers
+
+class ApiKeyUnavailable(Exception):
+    """The Twelve Data API key couldn't be read from SSM."""
+
+def get_api_key() -> str:
+    return ssm_config.get_parameter(API_KEY_PARAM)
+
+def batch_handler(symbols: list[str], interval: str, outputsize: int):
+    if len(symbols) > MAX_SYMBOLS:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": f"Too many symbols: at most {MAX_SYMBOLS} per request"})
+        }
+
+    try:
+        results, tiers = get_batch(symbols, interval, outputsize, get_api_key)
+    except Exception as e:
+        return {"statusCode": 500, "body": json.dumps({"error": f"API call failed: {str(e)}"})}
+
+    body = {
+        "interval": interval,
+        "symbols": {symbol: to_columns(results[symbol]) for symbol in symbols},
+    }
+    return {
+        "statusCode": 200,
+        # Compact separators: the column arrays are most of the payload.
+        "body": json.dumps(body, separators=(",", ":")),
+        "headers": {"X-Cache": ",".join(f"{tier}={count}" for tier, count in tiers.items())}
+    }
+
+def lambda_handler(event, context):
+    # Extract symbol and interval from query parameters, using "1day" as a default interval.
+    query = event.get("queryStringParameters") or {}
+    # ``symbols=AAPL,MSFT,...`` returns column arrays for all of them in one call;
+    # ``symbol`` keeps returning the provider's response unchanged.
+    symbol = query.get("symbol")
+    symbols = parse_symbols(query.get("symbols", ""))
+    interval = query.get("interval", "1day")
+
+    if not (symbol or symbols):
+        # Fast fail for missing required arguments, returning a clear error for easier client debugging.
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "Missing required parameter: symbol or symbols"})
+        }
 
     try:
-        # Make the external API call. No retry logic here—fail fast and surface the error upstream.
-        response = requests.get(url, params=params)
-        data = response.json()
+        outputsize = min(max(int(query.get("outputsize", DEFAULT_OUTPUTSIZE)), 1), MAX_OUTPUTSIZE)
+    except ValueError:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "Invalid parameter: outputsize"})
+        }
+
+    if symbols:
+        return batch_handler(symbols, interval, outputsize)
+
+    key = (symbol.upper(), interval, outputsize)
+
+    def fetch() -> dict:
+        # Retrieve the API key securely from AWS SSM Parameter Store, only when we actually need to call upstream.
+        # This pattern avoids storing sensitive data in Lambda environment variables or code.
+        try:
+            api_key = get_api_key()
+        except Exception as e:
+            raise ApiKeyUnavailable(str(e)) from e
+        return fetch_time_series(key[0], interval, outputsize, api_key)
+
+    try:
+        # One lookup per tier; only a miss calls fetch.
+        data, tier = ohlcv_cache.get_or_fetch(key, fetch, cacheable=is_cacheable)
         # Always return the full response, even on API error; downstream handling can decide what to do.
         return {
             "statusCode": 200,
-            "body": json.dumps(data)
+            "body": json.dumps(data),
+            "headers": {"X-Cache": tier}
         }
+    except ApiKeyUnavailable as e:
+        # If SSM is misconfigured or the key is missing, return a 500 to signal a server-side configuration issue.
+        return {"statusCode": 500, "body": json.dumps({"error": f"SSM error: {str(e)}"})}
     except Exception as e:
         # Catch network or unexpected issues separately for observability.
         return {
             "statusCode": 500,
             "body": json.dumps({"error": f"API call failed: {str(e)}"})
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,227 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Hashable
+from zoneinfo import ZoneInfo
+
+NY_TZ = ZoneInfo("America/New_York")
+SESSION_CLOSE_HOUR = 16
+# Give the provider a few minutes after the close to publish the final daily bar.
+SETTLE_SECONDS = 15 * 60
+
+# Twelve Data intraday intervals; a cached series is good until the next bar opens.
+INTRADAY_SECONDS = {
+    "1min": 60,
+    "5min": 300,
+    "15min": 900,
+    "30min": 1800,
+    "45min": 2700,
+    "1h": 3600,
+    "2h": 7200,
+    "4h": 14400,
+}
+
+# Cache tier that answered a lookup.
+MEMORY = "memory"
+S3 = "s3"
+MISS = "miss"
+
+
+def next_session_close(now: datetime) -> datetime:
+    """The next 16:00 New York close on a weekday strictly after ``now`` (holidays not considered)."""
+    ny_now = now.astimezone(NY_TZ)
+    close = ny_now.replace(hour=SESSION_CLOSE_HOUR, minute=0, second=0, microsecond=0)
+    while close <= ny_now or close.weekday() >= 5:
+        close = (close + timedelta(days=1)).replace(hour=SESSION_CLOSE_HOUR)
+    return close
+
+
+def last_session_date(now: datetime | None = None) -> str:
+    """New York date of the latest weekday session whose daily bar has settled (holidays not considered)."""
+    now = now or datetime.now(timezone.utc)
+    settled = now.astimezone(NY_TZ) - timedelta(seconds=SETTLE_SECONDS)
+    close = settled.replace(hour=SESSION_CLOSE_HOUR, minute=0, second=0, microsecond=0)
+    while close > settled or close.weekday() >= 5:
+        close = (close - timedelta(days=1)).replace(hour=SESSION_CLOSE_HOUR)
+    return close.date().isoformat()
+
+
+def expires_at(interval: str, now: datetime | None = None) -> float:
+    """Epoch seconds until which a series for ``interval`` fetched at ``now`` stays valid."""
+    now = now or datetime.now(timezone.utc)
+    seconds = INTRADAY_SECONDS.get(interval)
+    if seconds:
+        epoch = now.timestamp()
+        return epoch - epoch % seconds + seconds
+    # Daily and longer bars only change when a session closes. Measured from
+    # SETTLE_SECONDS ago, so a fetch between the close and the settle delay
+    # (whose bar may not be final yet) expires once it has settled.
+    settling_since = now - timedelta(seconds=SETTLE_SECONDS)
+    return next_session_close(settling_since).timestamp() + SETTLE_SECONDS
+
+
+class OhlcvCache:
+    """
+    Two-tier cache for OHLCV series keyed by (symbol, interval, outputsize).
+
+    The first tier is an in-process LRU that survives between invocations of
+    a warm Lambda container; the optional second tier is S3, which survives
+    cold starts and is shared by all containers. Entries carry an absolute
+    expiry from ``expires_at``. Concurrent misses for the same key within a
+    process are coalesced so only one caller hits the upstream API.
+    """
+
+    def __init__(self, max_entries: int = 256, s3_client=None, bucket: str = "", prefix: str = "ohlcv-cache/"):
+        self.max_entries = max_entries
+        self._s3 = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self._entries: OrderedDict[Hashable, tuple[float, dict]] = OrderedDict()
+        self._inflight: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def s3(self):
+        # Created on first use, and only when a bucket is configured, to keep boto3 off the cold-start path.
+        if self._s3 is None and self.bucket:
+            import boto3
+            self._s3 = boto3.client("s3")
+        return self._s3
+
+    def _s3_key(self, key: tuple) -> str:
+        symbol, interval, outputsize = key
+        return f"{self.prefix}{interval}/{outputsize}/{symbol}.json"
+
+    def _get_memory(self, key: Hashable) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def _put_memory(self, key: Hashable, expiry: float, data: dict) -> None:
+        with self._lock:
+            self._entries[key] = (expiry, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_s3(self, key: tuple) -> tuple[float, dict] | None:
+        if not (self.s3 and self.bucket):
+            return None
+        try:
+            body = json.load(self.s3.get_object(Bucket=self.bucket, Key=self._s3_key(key))["Body"])
+        except Exception:
+            # Missing object or S3 trouble: treat as a miss rather than failing the request.
+            return None
+        if body.get("expires_at", 0) <= time.time():
+            return None
+        return body["expires_at"], body["data"]
+
+    def _put_s3(self, key: tuple, expiry: float, data: dict) -> None:
+        if not (self.s3 and self.bucket):
+            return
+        try:
+            self.s3.put_object(
+                Bucket=self.bucket,
+                Key=self._s3_key(key),
+                Body=json.dumps({"expires_at": expiry, "data": data}),
+                ContentType="application/json")
+        except Exception as e:
+            print(f"OHLCV cache write failed for {key}: {e}")
+
+    def lookup(self, key: tuple) -> tuple[dict, str] | None:
+        """Return ``(data, tier)`` from memory or S3, or None on a miss."""
+        data = self._get_memory(key)
+        if data is not None:
+            return data, MEMORY
+
+        stored = self._get_s3(key)
+        if stored is not None:
+            expiry, data = stored
+            self._put_memory(key, expiry, data)
+            return data, S3
+        return None
+
+    def _expiry(self, key: tuple) -> float:
+        return expires_at(key[1])
+
+    def store(self, key: tuple, data: dict) -> None:
+        """Write ``data`` to both tiers, valid until the next bar for the key's interval."""
+        expiry = self._expiry(key)
+        self._put_memory(key, expiry, data)
+        self._put_s3(key, expiry, data)
+
+    def get_or_fetch(
+        self,
+        key: tuple,
+        fetch: Callable[[], dict],
+        cacheable: Callable[[dict], bool] = lambda data: True,
+    ) -> tuple[dict, str]:
+        """
+        Return ``(data, tier)``, calling ``fetch`` at most once per key across
+        concurrent callers. Results that aren't ``cacheable`` (provider
+        errors) are returned but not stored.
+        """
+        return self.get_or_fetch_many([key], lambda keys: {key: fetch()}, cacheable)[key]
+
+    def get_or_fetch_many(
+        self,
+        keys: list[tuple],
+        fetch: Callable[[list[tuple]], dict[tuple, dict]],
+        cacheable: Callable[[dict], bool] = lambda data: True,
+    ) -> dict[tuple, tuple[dict, str]]:
+        """
+        Batch form of ``get_or_fetch``: returns ``{key: (data, tier)}``.
+        ``fetch`` is called once with the missed keys no other caller is
+        already fetching and returns data for each; keys in flight elsewhere
+        wait for that caller's result instead of being fetched again.
+        """
+        results = {}
+        misses = []
+        for key in keys:
+            hit = self.lookup(key)
+            if hit is None:
+                misses.append(key)
+            else:
+                results[key] = hit
+
+        led: dict[tuple, Future] = {}
+        waiting: dict[tuple, Future] = {}
+        with self._lock:
+            for key in misses:
+                future = self._inflight.get(key)
+                if future is None:
+                    led[key] = self._inflight[key] = Future()
+                else:
+                    waiting[key] = future
+
+        if led:
+            try:
+                fetched = fetch(list(led))
+                for key, future in led.items():
+                    data = fetched[key]
+                    if cacheable(data):
+                        self.store(key, data)
+                    future.set_result(data)
+                    results[key] = data, MISS
+            except BaseException as e:
+                for future in led.values():
+                    if not future.done():
+                        future.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    for key in led:
+                        self._inflight.pop(key, None)
+
+        for key, future in waiting.items():
+            results[key] = future.result(), MISS
+        return results
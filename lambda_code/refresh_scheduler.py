@@ -0,0 +1,74 @@
+import math
+from datetime import date, datetime
+
+# Symbols added to an index within this many days get a priority boost.
+RECENTLY_ADDED_DAYS = 90
+RECENTLY_ADDED_BOOST = 1.0
+
+
+def parse_timestamp(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def is_recently_added(date_added: str | None, today: date, days: int = RECENTLY_ADDED_DAYS) -> bool:
+    # Constituent "Date added" values are mostly YYYY-MM-DD; anything else is treated as old.
+    try:
+        added = date.fromisoformat(str(date_added)[:10])
+    except ValueError:
+        return False
+    return 0 <= (today - added).days <= days
+
+
+def decay_views(views: dict[str, float], elapsed_seconds: float, cycle_seconds: float) -> dict[str, float]:
+    """Halve view counts once per refresh cycle so popularity reflects recent interest."""
+    if elapsed_seconds <= 0:
+        return dict(views)
+    factor = 0.5 ** (elapsed_seconds / cycle_seconds)
+    return {s: v * factor for s, v in views.items() if v * factor >= 0.01}
+
+
+def priority_weight(views: float, recently_added: bool) -> float:
+    """How many times per cycle a symbol should be refreshed; 1.0 for an ordinary symbol."""
+    weight = 1.0 + math.log1p(max(views, 0.0))
+    if recently_added:
+        weight += RECENTLY_ADDED_BOOST
+    return weight
+
+
+def select_due(
+    symbols: list[str],
+    entries: dict[str, dict],
+    now: datetime,
+    cycle_seconds: float,
+    budget: int,
+    views: dict[str, float] | None = None,
+    recent: set[str] | None = None,
+) -> list[str]:
+    """
+    Pick up to ``budget`` symbols whose refresh is due, most overdue first.
+
+    Each symbol is due every ``cycle_seconds / weight`` since its last
+    successful check, so the whole universe is covered once per cycle and
+    popular or newly listed symbols more often. Never-fetched symbols come
+    first (recently added before the rest), then by how overdue they are.
+    """
+    views = views or {}
+    recent = recent or set()
+    ranked = []
+    for symbol in symbols:
+        weight = priority_weight(views.get(symbol, 0.0), symbol in recent)
+        checked = parse_timestamp(entries.get(symbol, {}).get("checked"))
+        if checked is None:
+            overdue = math.inf
+        else:
+            overdue = (now - checked).total_seconds() / (cycle_seconds / weight)
+        if overdue >= 1:
+            ranked.append((overdue, weight, symbol))
+
+    ranked.sort(key=lambda r: (r[0], r[1]), reverse=True)
+    return [symbol for _, _, symbol in ranked[:max(budget, 0)]]
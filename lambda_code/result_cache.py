@@ -0,0 +1,30 @@
+from ohlcv_cache import OhlcvCache, expires_at, last_session_date
+
+
+def result_key(ticker: str, strategy_code: str, bar_date: str | None = None) -> tuple:
+    """Cache key ``(ticker, strategy_code, last_bar_date)``."""
+    return ticker.upper(), strategy_code, bar_date or last_session_date()
+
+
+class StrategyResultCache(OhlcvCache):
+    """
+    Memoized daily strategy results.
+
+    A daily strategy's answer only changes when a new daily bar settles, so
+    results are keyed by the last settled session date and shared by every
+    caller until then. Uses the same bounded in-memory LRU and optional S3
+    tier as the OHLCV cache; S3 objects are grouped by date
+    (``prefix/<date>/<strategy>/<TICKER>.json``) so old days can be
+    removed with a lifecycle rule on the prefix.
+    """
+
+    def __init__(self, max_entries: int = 1024, s3_client=None, bucket: str = "", prefix: str = "strategy-results/"):
+        super().__init__(max_entries=max_entries, s3_client=s3_client, bucket=bucket, prefix=prefix)
+
+    def _s3_key(self, key: tuple) -> str:
+        ticker, strategy_code, bar_date = key
+        return f"{self.prefix}{bar_date}/{strategy_code}/{ticker}.json"
+
+    def _expiry(self, key: tuple) -> float:
+        # Valid until the next daily bar settles, when the key's date moves on anyway.
+        return expires_at("1day")
@@ -0,0 +1,142 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+AWS_REGION = os.environ.get("AWS_REGION", "us-east-1")
+# How long a value is served before it is re-read; rotated keys are picked up within this window.
+TTL_SECONDS = float(os.environ.get("SSM_CONFIG_TTL_SECONDS", "300"))
+# SSM's limit on names per GetParameters call.
+GET_PARAMETERS_BATCH = 10
+
+
+class ParameterStore:
+    """
+    TTL cache over SSM Parameter Store, shared by the Lambdas and the EC2 streamer.
+
+    Modules ``register`` the parameters they will need at import time, and the
+    first ``get`` (or an explicit ``prefetch``) loads all of them with bulk
+    ``GetParameters`` calls, so a cold start pays one round trip instead of
+    one per key. Once loaded a value is served from memory; after ``ttl`` it
+    is still served while a background thread re-reads it, so requests never
+    wait on SSM for a value that has been seen before. Long-running
+    processes can also call ``start_refresh`` to re-read everything on a
+    timer. If a refresh fails the last good value keeps being served.
+    """
+
+    def __init__(
+        self,
+        ttl: float = TTL_SECONDS,
+        client_factory: Callable[[], object] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self._client_factory = client_factory
+        self._client = None
+        self._clock = clock
+        self._registered: set[str] = set()
+        self._values: dict[str, tuple[float, str]] = {}
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._refresh_thread: threading.Thread | None = None
+
+    @property
+    def client(self):
+        # Created (and boto3 imported) on first use so importing this module costs nothing.
+        if self._client is None:
+            if self._client_factory is None:
+                import boto3
+                self._client = boto3.client("ssm", region_name=AWS_REGION)
+            else:
+                self._client = self._client_factory()
+        return self._client
+
+    def reset_client(self) -> None:
+        """Drop the client so the next call creates a new one, e.g. in a forked worker (boto3 clients aren't fork-safe)."""
+        self._client = None
+
+    def register(self, *names: str) -> None:
+        with self._lock:
+            self._registered.update(names)
+
+    def prefetch(self, names: Iterable[str] | None = None) -> None:
+        """Load ``names`` (default: every registered name) with bulk GetParameters calls."""
+        with self._lock:
+            names = sorted(set(names if names is not None else self._registered))
+            self._registered.update(names)
+
+        for i in range(0, len(names), GET_PARAMETERS_BATCH):
+            batch = names[i:i + GET_PARAMETERS_BATCH]
+            response = self.client.get_parameters(Names=batch, WithDecryption=True)
+            expires = self._clock() + self.ttl
+            with self._lock:
+                for parameter in response.get("Parameters", []):
+                    self._values[parameter["Name"]] = (expires, parameter["Value"])
+            if response.get("InvalidParameters"):
+                logger.warning(f"SSM parameters not found: {response['InvalidParameters']}")
+
+    def get(self, name: str) -> str:
+        """Return the parameter's value, raising KeyError if SSM doesn't have it."""
+        with self._lock:
+            entry = self._values.get(name)
+            # Load everything registered but not yet seen along with this one.
+            missing = [n for n in self._registered if n not in self._values]
+
+        if entry is not None:
+            expires, value = entry
+            if expires <= self._clock():
+                self._refresh_in_background()
+            return value
+
+        self.prefetch(missing + [name])
+        with self._lock:
+            entry = self._values.get(name)
+        if entry is None:
+            raise KeyError(f"SSM parameter not found: {name}")
+        return entry[1]
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_stale, name="ssm-config-refresh", daemon=True).start()
+
+    def _refresh_stale(self) -> None:
+        try:
+            now = self._clock()
+            with self._lock:
+                stale = [name for name, (expires, _) in self._values.items() if expires <= now]
+            self.prefetch(stale)
+        except Exception as e:
+            logger.warning(f"SSM refresh failed, serving cached values: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def start_refresh(self, interval: float | None = None) -> None:
+        """Re-read every known parameter every ``interval`` seconds (default: the TTL) on a daemon thread."""
+        if self._refresh_thread is not None:
+            return
+        interval = interval or self.ttl
+
+        def loop() -> None:
+            while True:
+                time.sleep(interval)
+                try:
+                    self.prefetch()
+                except Exception as e:
+                    logger.warning(f"SSM refresh failed, serving cached values: {e}")
+
+        self._refresh_thread = threading.Thread(target=loop, name="ssm-config-refresh-timer", daemon=True)
+        self._refresh_thread.start()
+
+
+# One store per process so every caller shares the cache.
+parameters = ParameterStore()
+register = parameters.register
+prefetch = parameters.prefetch
+get_parameter = parameters.get
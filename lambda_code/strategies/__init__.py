@@ -1,7 +1,35 @@
-from .rsi_dip import evaluate as evaluate_rsi_dip
-from .sma_crossover import evaluate as evaluate_sma_crossover
+import importlib
+from collections.abc import Mapping
+from typing import Callable
 
-STRATEGY_MAP = {
-    "RSI_DIP": evaluate_rsi_dip,
-    "SMA_CROSSOVER": evaluate_sma_crossover
+# Strategy code -> module defining ``evaluate(ticker)``. Modules are imported
+# the first time their strategy is used, so a cold start pays only for the
+# strategies a request actually asks for.
+STRATEGY_MODULES = {
+    "RSI_DIP": ".rsi_dip",
+    "SMA_CROSSOVER": ".sma_crossover",
 }
+
+
+class LazyStrategyMap(Mapping):
+    """Read-only ``{code: evaluate}`` mapping that imports each strategy module on first lookup."""
+
+    def __init__(self, modules: dict[str, str]):
+        self._modules = modules
+        self._loaded: dict[str, Callable[[str], dict]] = {}
+
+    def __getitem__(self, code: str) -> Callable[[str], dict]:
+        evaluate = self._loaded.get(code)
+        if evaluate is None:
+            module = importlib.import_module(self._modules[code], __name__)
+            evaluate = self._loaded[code] = module.evaluate
+        return evaluate
+
+    def __iter__(self):
+        return iter(self._modules)
+
+    def __len__(self) -> int:
+        return len(self._modules)
+
+
+STRATEGY_MAP = LazyStrategyMap(STRATEGY_MODULES)
@@ -1,11 +1,12 @@
 import requests
 import os
 
-API_KEY = os.environ["ALPHA_VANTAGE_KEY"]
 BASE_URL = "https://www.alphavantage.co/query"
 
 def evaluate(ticker: str) -> dict:
-    url = f"{BASE_URL}?function=RSI&symbol={ticker}&interval=daily&time_period=14&series_type=close&apikey={API_KEY}"
+    # Read per call rather than at import, so importing the strategy never fails on configuration.
+    api_key = os.environ["ALPHA_VANTAGE_KEY"]
+    url = f"{BASE_URL}?function=RSI&symbol={ticker}&interval=daily&time_period=14&series_type=close&apikey={api_key}"
     response = requests.get(url)
     data = response.json()
 
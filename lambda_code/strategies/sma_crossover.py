@@ -1,9 +1,3 @@
-import requests
-import os
-
-API_KEY = os.environ['ALPHA_VANTAGE_KEY']
-BASE_URL = "https://www.alphavantage.co/query"
-
 def evaluate(ticker: str) -> dict:
     # Placeholder logic
     return {
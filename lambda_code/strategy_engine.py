@@ -0,0 +1,200 @@
+import numpy as np
+
+# Same parameters as the per-ticker strategies and the streamer's live indicators.
+RSI_PERIOD = 14
+RSI_BUY_THRESHOLD = 30
+SMA_FAST = 50
+SMA_SLOW = 200
+EMA_PERIOD = 20
+# Daily bars loaded per ticker: enough for SMA_SLOW plus a crossover and a settled RSI.
+LOOKBACK_BARS = 300
+
+
+def align_closes(series: dict[str, list[float]]) -> tuple[list[str], np.ndarray]:
+    """
+    Stack oldest-first close series into a (tickers, bars) array.
+
+    Shorter histories are right-aligned and left-padded with NaN, so the
+    last column is every ticker's latest bar. Indicators are computed per
+    row, so tickers never need to share dates.
+    """
+    symbols = list(series)
+    width = max((len(closes) for closes in series.values()), default=0)
+    close = np.full((len(symbols), width), np.nan)
+    for row, symbol in enumerate(symbols):
+        values = series[symbol]
+        if values:
+            close[row, width - len(values):] = values
+    return symbols, close
+
+
+def sma(values: np.ndarray, period: int) -> np.ndarray:
+    """Rolling mean along axis 1; NaN until a row has ``period`` samples."""
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=1)
+    counts = np.cumsum(valid, axis=1)
+    sums = np.pad(sums, ((0, 0), (1, 0)))
+    counts = np.pad(counts, ((0, 0), (1, 0)))
+
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] >= period:
+        total = sums[:, period:] - sums[:, :-period]
+        full = counts[:, period:] - counts[:, :-period] == period
+        out[:, period - 1:] = np.where(full, total / period, np.nan)
+    return out
+
+
+def _smooth(values: np.ndarray, seed: np.ndarray, step) -> np.ndarray:
+    """
+    Run a recursive average along axis 1 for all rows at once: each row
+    starts from ``seed`` at its first non-NaN seed and then applies
+    ``step(previous, x)``.
+    """
+    out = np.full(values.shape, np.nan)
+    previous = np.full(values.shape[0], np.nan)
+    for t in range(values.shape[1]):
+        previous = np.where(np.isnan(previous), seed[:, t], step(previous, values[:, t]))
+        out[:, t] = previous
+    return out
+
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    """Exponential moving average seeded with the SMA of the first ``period`` samples."""
+    alpha = 2 / (period + 1)
+    return _smooth(values, sma(values, period), lambda prev, x: prev + alpha * (x - prev))
+
+
+def wilder_rsi(close: np.ndarray, period: int = RSI_PERIOD) -> np.ndarray:
+    """RSI with Wilder smoothing after a plain mean of the first ``period`` changes."""
+    change = np.diff(close, axis=1, prepend=np.nan)
+    gain = np.where(np.isnan(change), np.nan, np.maximum(change, 0.0))
+    loss = np.where(np.isnan(change), np.nan, np.maximum(-change, 0.0))
+
+    def wilder(prev, x):
+        return (prev * (period - 1) + x) / period
+
+    avg_gain = _smooth(gain, sma(gain, period), wilder)
+    avg_loss = _smooth(loss, sma(loss, period), wilder)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    flat = avg_loss == 0
+    rsi[flat] = np.where(avg_gain[flat] > 0, 100.0, 50.0)
+    return rsi
+
+
+def crossovers(fast: np.ndarray, slow: np.ndarray) -> np.ndarray:
+    """+1 where fast crosses above slow, -1 where it crosses below, else 0."""
+    spread = fast - slow
+    above = ~np.signbit(spread)
+    crossed = np.zeros(spread.shape, dtype=np.int8)
+    known = ~np.isnan(spread[:, 1:]) & ~np.isnan(spread[:, :-1])
+    changed = known & (above[:, 1:] != above[:, :-1])
+    crossed[:, 1:] = np.where(changed, np.where(above[:, 1:], 1, -1), 0)
+    return crossed
+
+
+def rsi_dip_results(close: np.ndarray) -> list[dict | None]:
+    """``RSI_DIP`` result per row for its latest bar; None where RSI is still warming up."""
+    latest = wilder_rsi(close)[:, -1]
+    results = []
+    for rsi in latest.tolist():
+        if np.isnan(rsi):
+            results.append(None)
+            continue
+        buy = rsi < RSI_BUY_THRESHOLD
+        results.append({
+            "strategy": "RSI_DIP",
+            "signal": "BUY" if buy else "HOLD",
+            "confidence": round(max(0.5, (RSI_BUY_THRESHOLD - rsi) / RSI_BUY_THRESHOLD), 2) if buy else 0.5,
+            "indicators": {"rsi": round(rsi, 2)},
+        })
+    return results
+
+
+def sma_crossover_results(close: np.ndarray) -> list[dict | None]:
+    """``SMA_CROSSOVER`` result per row for its latest bar; None until SMA_SLOW bars exist."""
+    fast = sma(close, SMA_FAST)
+    slow = sma(close, SMA_SLOW)
+    crossed = crossovers(fast[:, -2:], slow[:, -2:])[:, -1] if close.shape[1] >= 2 else np.zeros(len(close))
+    trend = ema(close, EMA_PERIOD)[:, -1]
+
+    results = []
+    for f, s, c, e in zip(fast[:, -1].tolist(), slow[:, -1].tolist(), crossed.tolist(), trend.tolist()):
+        if np.isnan(f) or np.isnan(s):
+            results.append(None)
+            continue
+        signal = {1: "BUY", -1: "SELL"}.get(c, "HOLD")
+        confidence = round(min(1.0, 0.5 + abs(f - s) / s * 10), 2) if c else 0.5
+        results.append({
+            "strategy": "SMA_CROSSOVER",
+            "signal": signal,
+            "confidence": confidence,
+            "indicators": {
+                f"sma_{SMA_FAST}": round(f, 4),
+                f"sma_{SMA_SLOW}": round(s, 4),
+                f"ema_{EMA_PERIOD}": None if np.isnan(e) else round(e, 4),
+            },
+        })
+    return results
+
+
+# Vectorized counterparts of strategies.STRATEGY_MAP, computed for every row at once.
+VECTOR_STRATEGIES = {
+    "RSI_DIP": rsi_dip_results,
+    "SMA_CROSSOVER": sma_crossover_results,
+}
+
+
+def evaluate_universe(series: dict[str, list[float]], strategies: list[str]) -> list[dict]:
+    """
+    Evaluate ``strategies`` for every ticker in ``series`` (ticker -> oldest-first
+    closes) and return entries shaped like ``evaluation_executor.evaluate_all``'s:
+    ``{"ticker", "evaluations"}``, where a strategy that is unknown or lacks the
+    history it needs becomes ``{"strategy", "error"}`` in its slot.
+    """
+    symbols, close = align_closes(series)
+    columns = {
+        code: VECTOR_STRATEGIES[code](close)
+        # No tickers, or none with any closes: nothing to vectorize over.
+        for code in strategies if code in VECTOR_STRATEGIES and close.size
+    }
+
+    def evaluation(code: str, row: int) -> dict:
+        if code not in VECTOR_STRATEGIES:
+            return {"strategy": code, "error": f"Unsupported strategy: {code}"}
+        result = columns[code][row] if code in columns else None
+        if result is None:
+            return {"strategy": code, "error": "Not enough price history"}
+        return result
+
+    return [
+        {"ticker": symbol, "evaluations": [evaluation(code, row) for code in strategies]}
+        for row, symbol in enumerate(symbols)
+    ]
+
+
+def load_closes(tickers: list[str], bars: int = LOOKBACK_BARS) -> tuple[dict[str, list[float]], dict[str, str]]:
+    """Daily closes per ticker through the OHLCV cache, plus an error message per ticker that failed."""
+    # Imported here so the engine itself doesn't need boto3/requests.
+    from get_ohlcv import get_api_key, get_batch, to_columns
+
+    responses, _ = get_batch(tickers, "1day", bars, get_api_key)
+    closes, errors = {}, {}
+    for ticker in tickers:
+        columns = to_columns(responses[ticker])
+        if "error" in columns:
+            errors[ticker] = columns["error"]
+        else:
+            closes[ticker] = columns["close"]
+    return closes, errors
+
+
+def screen(tickers: list[str], strategies: list[str]) -> list[dict]:
+    """Load cached daily OHLCV for ``tickers`` and evaluate them together, preserving ticker order."""
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    closes, errors = load_closes(tickers)
+    evaluated = {r["ticker"]: r for r in evaluate_universe(closes, strategies)}
+    for ticker, error in errors.items():
+        # A ticker without data fails each of its evaluations, as the executor path reports it.
+        evaluated[ticker] = {"ticker": ticker, "evaluations": [{"strategy": code, "error": error} for code in strategies]}
+    return [evaluated[t] for t in tickers]
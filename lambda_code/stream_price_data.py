@@ -1,12 +1,14 @@
 import asyncio
 import websockets
 import json
-import boto3
 import os
 
+import ssm_config
+
 # Use SSM Parameter Store for API keys to avoid hard-coding secrets
 # and to allow for secure, centralized management and rotation of sensitive credentials.
-ssm = boto3.client("ssm")
+# Cached by ssm_config so warm invocations skip the SSM round trip.
+ssm_config.register("TWELVE_DATA_API_KEY")
 
 async def stream_twelve_data_price(symbol, api_key):
     # Use Twelve Data's websocket endpoint for real-time price streaming.
@@ -36,11 +38,7 @@ async def stream_twelve_data_price(symbol, api_key):
 
 def lambda_handler(event, context):
     # Retrieve the API key securely at runtime to support credential rotation and avoid storing secrets in code.
-    response = ssm.get_parameter(
-        Name='TWELVE_DATA_API_KEY',
-        WithDecryption=True
-    )
-    api_key = response['Parameter']['Value']
+    api_key = ssm_config.get_parameter('TWELVE_DATA_API_KEY')
     
     # Lambda expects the symbol to be provided in the body for flexibility with API Gateway payloads.
     body = event.get('body')
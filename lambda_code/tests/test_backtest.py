@@ -0,0 +1,45 @@
+import numpy as np
+
+from backtest import align_on_dates, positions, run_backtest, trades_for
+
+
+def test_positions_hold_from_entry_until_exit():
+    signals = np.array([[0, 1, 0, 1, -1, 0, 1]], dtype=np.int8)
+    assert positions(signals).tolist() == [[False, True, True, True, False, False, True]]
+
+
+def test_gaps_carry_the_last_close_and_unlisted_days_stay_empty():
+    symbols, dates, close = align_on_dates({
+        "OLD": {"datetime": ["d1", "d2", "d3"], "close": [1.0, 2.0, 3.0]},
+        "NEW": {"datetime": ["d2", "d3"], "close": [5.0, 6.0]},
+        "GAP": {"datetime": ["d1", "d3"], "close": [7.0, 8.0]},
+    })
+    assert dates == ["d1", "d2", "d3"]
+    assert np.isnan(close[1, 0]) and close[1, 1:].tolist() == [5.0, 6.0]
+    assert close[2].tolist() == [7.0, 7.0, 8.0]
+
+
+def test_returns_start_the_bar_after_entry_and_pay_costs():
+    close = np.array([[100.0, 110.0, 121.0]])
+    held = np.array([[True, True, False]])
+    trades = trades_for("X", ["d1", "d2", "d3"], close[0], held[0], cost_bps=10)
+    assert trades == [{
+        "symbol": "X", "entry_date": "d1", "entry_price": 100.0,
+        "exit_date": "d3", "exit_price": 121.0, "return": round(0.21 - 0.002, 6),
+    }]
+
+
+def test_sma_crossover_backtest_is_the_same_on_a_process_pool():
+    rng = np.random.default_rng(7)
+    dates = [f"2020-{i:04d}" for i in range(600)]
+    series = {
+        f"S{i}": {"datetime": dates, "close": (100 * np.cumprod(1 + rng.normal(0, 0.02, 600))).tolist()}
+        for i in range(6)
+    }
+    inline = run_backtest(series, "SMA_CROSSOVER", workers=1)
+    pooled = run_backtest(series, "SMA_CROSSOVER", workers=3)
+
+    assert inline["portfolio"] == pooled["portfolio"]
+    assert inline["symbols"] == pooled["symbols"]
+    assert sum(len(s["trades"]) for s in inline["symbols"].values()) > 0
+    assert len(inline["portfolio"]["equity"]) == 600
@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+LAMBDA_DIR = Path(__file__).resolve().parent.parent
+
+# Heavy imports that handler modules must defer until a request needs them.
+DEFERRED = ("boto3", "botocore", "requests", "numpy", "strategies.rsi_dip")
+
+
+def imported_after(module: str) -> set[str]:
+    script = f"import sys, {module}; print(' '.join(sys.modules))"
+    # No ALPHA_VANTAGE_KEY: handlers must import without strategy configuration.
+    env = {k: v for k, v in os.environ.items() if k != "ALPHA_VANTAGE_KEY"}
+    env["PYTHONPATH"] = str(LAMBDA_DIR)
+    output = subprocess.run([sys.executable, "-c", script], env=env, cwd=LAMBDA_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    return set(output.split())
+
+
+def test_request_path_handlers_defer_heavy_imports():
+    for module in ("get_ohlcv", "evaluate_stock_strategy", "evaluate_stock_strategy_handler"):
+        loaded = imported_after(module)
+        assert not loaded & set(DEFERRED), f"{module} imports {sorted(loaded & set(DEFERRED))} at cold start"
+
+
+def test_strategies_register_without_importing_them():
+    loaded = imported_after("evaluate_strategy")
+    assert "strategies" in loaded
+    assert not {"strategies.rsi_dip", "strategies.sma_crossover", "requests", "boto3"} & loaded
@@ -0,0 +1,38 @@
+import threading
+import time
+
+from evaluation_executor import evaluate_all
+
+
+def test_evaluations_run_concurrently_and_errors_stay_isolated():
+    def evaluate(ticker, code):
+        time.sleep(0.1)
+        if code == "BROKEN":
+            raise ValueError("no data")
+        return {"strategy": code, "signal": "HOLD"}
+
+    started = time.perf_counter()
+    results, complete = evaluate_all(["AAPL", "MSFT"], ["RSI_DIP", "BROKEN"], evaluate=evaluate, max_workers=4)
+
+    assert complete
+    assert time.perf_counter() - started < 0.3
+    assert [r["ticker"] for r in results] == ["AAPL", "MSFT"]
+    ok, broken = results[0]["evaluations"]
+    assert ok["signal"] == "HOLD" and ok["elapsed_ms"] >= 100
+    assert broken["strategy"] == "BROKEN" and broken["error"] == "no data"
+
+
+def test_deadline_returns_partial_results():
+    release = threading.Event()
+
+    def evaluate(ticker, code):
+        if ticker == "SLOW":
+            release.wait(2)
+        return {"strategy": code}
+
+    results, complete = evaluate_all(["FAST", "SLOW"], ["RSI_DIP"], evaluate=evaluate, deadline_seconds=0.1)
+    release.set()
+
+    assert not complete
+    assert results[0]["evaluations"][0]["strategy"] == "RSI_DIP"
+    assert results[1]["evaluations"][0]["timed_out"] is True
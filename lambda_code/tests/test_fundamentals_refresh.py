@@ -0,0 +1,49 @@
+import get_fundamentals
+
+
+def test_refresh_writes_only_changed_shards(monkeypatch):
+    written = {}
+    monkeypatch.setattr(get_fundamentals, "put_json_object", lambda key, data, **kw: written.__setitem__(key, data))
+    monkeypatch.setattr(get_fundamentals, "fetch_all_fundamentals", lambda symbols: {
+        "AAPL": {"metric": {"peTTM": 30}, "symbol": "AAPL", "updated": "2025-01-05T00:00:00"},
+        "MSFT": {"metric": {"peTTM": 35}, "symbol": "MSFT", "updated": "2025-01-05T00:00:00"},
+        "IBM": None,
+    })
+    unchanged = {"metric": {"peTTM": 35}, "symbol": "MSFT"}
+    manifest = {"symbols": {
+        "MSFT": {"hash": get_fundamentals.content_hash(unchanged), "checked": "2025-01-01T00:00:00"},
+        "IBM": {"hash": "old", "checked": "2025-01-01T00:00:00"},
+    }}
+
+    changed = get_fundamentals.refresh_fundamentals(["AAPL", "MSFT", "IBM"], manifest, ["AAPL", "MSFT", "IBM"])
+
+    assert list(changed) == ["AAPL"]
+    assert list(written) == ["fundamentals/AAPL.json"]
+    assert manifest["symbols"]["MSFT"]["checked"] > "2025-01-01T00:00:00"
+    # A failed fetch keeps the previous entry untouched.
+    assert manifest["symbols"]["IBM"] == {"hash": "old", "checked": "2025-01-01T00:00:00"}
+
+
+def test_failed_constituents_read_skips_refresh_and_pruning(monkeypatch):
+    class ThrottledS3:
+        def get_object(self, **kwargs):
+            raise RuntimeError("SlowDown")
+
+    written = {}
+    monkeypatch.setattr(get_fundamentals, "get_s3", lambda: ThrottledS3())
+    monkeypatch.setattr(get_fundamentals, "put_json_object", lambda key, data, **kw: written.__setitem__(key, data))
+    monkeypatch.setattr(get_fundamentals, "fetch_all_fundamentals", lambda symbols: {})
+
+    response = get_fundamentals.handler({}, None)
+
+    assert response["statusCode"] == 500
+    assert written == {}
+
+
+def test_empty_universe_does_not_prune_manifest(monkeypatch):
+    monkeypatch.setattr(get_fundamentals, "fetch_all_fundamentals", lambda symbols: {})
+    manifest = {"symbols": {"IBM": {"hash": "old", "checked": "2025-01-01T00:00:00"}}}
+
+    get_fundamentals.refresh_fundamentals([], manifest, [])
+
+    assert "IBM" in manifest["symbols"]
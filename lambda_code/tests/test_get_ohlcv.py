@@ -0,0 +1,84 @@
+import json
+
+import get_ohlcv
+from ohlcv_cache import OhlcvCache
+
+
+def series(*closes):
+    # Twelve Data returns newest first, with every value as a string.
+    values = [
+        {"datetime": f"2025-01-0{i + 1}", "open": str(c), "high": str(c), "low": str(c), "close": str(c), "volume": "100"}
+        for i, c in enumerate(closes)
+    ]
+    return {"status": "ok", "values": values[::-1]}
+
+
+def test_batch_fetches_misses_in_one_call_and_returns_columns(monkeypatch):
+    calls = []
+
+    def fake_fetch(symbol, interval, outputsize, api_key):
+        calls.append(symbol)
+        return {"AAPL": series(1, 2), "BAD": {"status": "error", "message": "not found"}}
+
+    cache = OhlcvCache()
+    cache.store(("MSFT", "1day", 100), series(5))
+    monkeypatch.setattr(get_ohlcv, "ohlcv_cache", cache)
+    monkeypatch.setattr(get_ohlcv, "fetch_time_series", fake_fetch)
+    monkeypatch.setattr(get_ohlcv, "get_api_key", lambda: "key")
+
+    response = get_ohlcv.lambda_handler({"queryStringParameters": {"symbols": "aapl, msft,BAD,AAPL"}}, None)
+    body = json.loads(response["body"])
+
+    assert calls == ["AAPL,BAD"]
+    assert list(body["symbols"]) == ["AAPL", "MSFT", "BAD"]
+    assert body["symbols"]["AAPL"] == {
+        "datetime": ["2025-01-01", "2025-01-02"],
+        "open": [1.0, 2.0], "high": [1.0, 2.0], "low": [1.0, 2.0], "close": [1.0, 2.0],
+        "volume": [100, 100],
+    }
+    assert body["symbols"]["BAD"] == {"error": "not found"}
+    assert response["headers"]["X-Cache"] == "memory=1,s3=0,miss=2"
+    # Only the successful fetch was cached.
+    assert cache.lookup(("AAPL", "1day", 100)) is not None
+    assert cache.lookup(("BAD", "1day", 100)) is None
+
+
+def test_batch_rejects_too_many_symbols(monkeypatch):
+    monkeypatch.setattr(get_ohlcv, "MAX_SYMBOLS", 2)
+    response = get_ohlcv.lambda_handler({"queryStringParameters": {"symbols": "A,B,C"}}, None)
+    assert response["statusCode"] == 400
+
+
+class CountingS3:
+    def __init__(self):
+        self.gets = 0
+        self.puts = 0
+
+    def get_object(self, Bucket, Key):
+        self.gets += 1
+        raise KeyError(Key)
+
+    def put_object(self, **kwargs):
+        self.puts += 1
+
+
+def test_single_symbol_miss_reads_s3_once(monkeypatch):
+    s3 = CountingS3()
+    monkeypatch.setattr(get_ohlcv, "ohlcv_cache", OhlcvCache(s3_client=s3, bucket="cache"))
+    monkeypatch.setattr(get_ohlcv, "fetch_time_series", lambda symbol, interval, outputsize, api_key: series(1))
+    monkeypatch.setattr(get_ohlcv, "get_api_key", lambda: "key")
+
+    response = get_ohlcv.lambda_handler({"queryStringParameters": {"symbol": "aapl"}}, None)
+    assert response["headers"]["X-Cache"] == "miss"
+    assert (s3.gets, s3.puts) == (1, 1)
+
+
+def test_single_symbol_reports_a_missing_api_key(monkeypatch):
+    def no_key():
+        raise KeyError("TWELVE_DATA_API_KEY")
+
+    monkeypatch.setattr(get_ohlcv, "ohlcv_cache", OhlcvCache())
+    monkeypatch.setattr(get_ohlcv, "get_api_key", no_key)
+    response = get_ohlcv.lambda_handler({"queryStringParameters": {"symbol": "AAPL"}}, None)
+    assert response["statusCode"] == 500
+    assert json.loads(response["body"])["error"].startswith("SSM error")
@@ -0,0 +1,84 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+from ohlcv_cache import MEMORY, MISS, OhlcvCache, expires_at, next_session_close
+
+
+def test_daily_series_expire_after_next_session_close():
+    # Friday 2025-01-10 18:00 ET, after the close: next close is Monday 16:00 ET (21:00 UTC).
+    friday_evening = datetime(2025, 1, 10, 23, 0, tzinfo=timezone.utc)
+    close = next_session_close(friday_evening)
+    assert close.astimezone(timezone.utc) == datetime(2025, 1, 13, 21, 0, tzinfo=timezone.utc)
+    assert expires_at("1day", friday_evening) > close.timestamp()
+
+
+def test_intraday_series_expire_at_next_bar():
+    now = datetime(2025, 1, 13, 15, 2, 30, tzinfo=timezone.utc)
+    assert expires_at("5min", now) == datetime(2025, 1, 13, 15, 5, tzinfo=timezone.utc).timestamp()
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = OhlcvCache()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"status": "ok", "values": []}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_fetch(("AAPL", "1day", 100), fetch)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(tier == MISS for _, tier in results)
+    assert cache.lookup(("AAPL", "1day", 100))[1] == MEMORY
+
+
+def test_uncacheable_results_are_not_stored():
+    cache = OhlcvCache()
+    cache.get_or_fetch(("BAD", "1day", 100), lambda: {"status": "error"}, cacheable=lambda d: d["status"] == "ok")
+    assert cache.lookup(("BAD", "1day", 100)) is None
+
+
+def test_daily_series_fetched_before_settling_expire_once_settled():
+    # Monday 2025-01-13 16:05 ET: the close has passed but the bar may not be final.
+    settling = datetime(2025, 1, 13, 21, 5, tzinfo=timezone.utc)
+    assert expires_at("1day", settling) == datetime(2025, 1, 13, 21, 15, tzinfo=timezone.utc).timestamp()
+    # 16:20 ET: settled, so good until Tuesday's close has settled.
+    settled = datetime(2025, 1, 13, 21, 20, tzinfo=timezone.utc)
+    assert expires_at("1day", settled) == datetime(2025, 1, 14, 21, 15, tzinfo=timezone.utc).timestamp()
+
+
+def test_concurrent_batches_fetch_each_key_once():
+    cache = OhlcvCache()
+    cache.store(("MSFT", "1day", 100), {"status": "ok"})
+    fetched = []
+    started = threading.Event()
+
+    def fetch(keys):
+        fetched.append(sorted(keys))
+        started.set()
+        time.sleep(0.05)
+        return {key: {"status": "ok", "symbol": key[0]} for key in keys}
+
+    first = {}
+    leader = threading.Thread(target=lambda: first.update(
+        cache.get_or_fetch_many([("AAPL", "1day", 100), ("TSLA", "1day", 100)], fetch)
+    ))
+    leader.start()
+    started.wait()
+    second = cache.get_or_fetch_many([("AAPL", "1day", 100), ("MSFT", "1day", 100), ("NVDA", "1day", 100)], fetch)
+    leader.join()
+
+    assert fetched == [[("AAPL", "1day", 100), ("TSLA", "1day", 100)], [("NVDA", "1day", 100)]]
+    assert second[("AAPL", "1day", 100)] == ({"status": "ok", "symbol": "AAPL"}, MISS)
+    assert second[("MSFT", "1day", 100)][1] == MEMORY
+    assert first[("TSLA", "1day", 100)][1] == MISS
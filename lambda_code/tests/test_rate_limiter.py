@@ -0,0 +1,33 @@
+from rate_limiter import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket_paces_calls_to_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=1, clock=clock, sleep=clock.sleep)
+
+    for _ in range(5):
+        bucket.acquire()
+
+    # First token is available immediately, the other four refill at 2/sec.
+    assert clock.now == 2.0
+
+
+def test_token_bucket_reports_wait_without_consuming():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, capacity=1, clock=clock, sleep=clock.sleep)
+
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == 1.0
+    clock.now = 1.0
+    assert bucket.try_acquire() == 0.0
@@ -0,0 +1,33 @@
+from datetime import date, datetime
+
+from refresh_scheduler import decay_views, is_recently_added, select_due
+
+DAY = 24 * 3600
+NOW = datetime(2025, 1, 10, 12, 0, 0)
+
+
+def test_select_due_orders_never_fetched_then_most_overdue():
+    entries = {
+        "AAPL": {"checked": "2025-01-09T00:00:00"},  # 1.5 cycles ago
+        "MSFT": {"checked": "2025-01-08T00:00:00"},  # 2.5 cycles ago
+        "IBM": {"checked": "2025-01-10T06:00:00"},   # not due yet
+    }
+    due = select_due(["AAPL", "MSFT", "IBM", "NVDA"], entries, NOW, DAY, budget=10)
+    assert due == ["NVDA", "MSFT", "AAPL"]
+
+
+def test_select_due_respects_budget_and_priority():
+    entries = {s: {"checked": "2025-01-10T00:00:00"} for s in ("AAPL", "MSFT")}
+    # Half a cycle since the last check: only a popular symbol is due again.
+    due = select_due(["AAPL", "MSFT"], entries, NOW, DAY, budget=10, views={"AAPL": 5})
+    assert due == ["AAPL"]
+
+    never = select_due(["A", "B", "C"], {}, NOW, DAY, budget=2, recent={"C"})
+    assert never[0] == "C" and len(never) == 2
+
+
+def test_views_decay_and_recently_added():
+    assert decay_views({"AAPL": 8.0}, DAY, DAY) == {"AAPL": 4.0}
+    assert is_recently_added("2025-01-01", date(2025, 1, 10))
+    assert not is_recently_added("1999-05-01", date(2025, 1, 10))
+    assert not is_recently_added(None, date(2025, 1, 10))
@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+
+from ohlcv_cache import MEMORY, last_session_date
+from result_cache import StrategyResultCache, result_key
+
+
+def test_last_session_date_waits_for_the_daily_bar_to_settle():
+    # Monday 2025-01-13: 16:05 ET is before settling, 16:30 ET after.
+    assert last_session_date(datetime(2025, 1, 13, 21, 5, tzinfo=timezone.utc)) == "2025-01-10"
+    assert last_session_date(datetime(2025, 1, 13, 21, 30, tzinfo=timezone.utc)) == "2025-01-13"
+    # Weekends map back to Friday.
+    assert last_session_date(datetime(2025, 1, 12, 12, 0, tzinfo=timezone.utc)) == "2025-01-10"
+
+
+def test_results_are_keyed_by_bar_date():
+    assert result_key("aapl", "RSI_DIP", "2025-01-10") == ("AAPL", "RSI_DIP", "2025-01-10")
+    assert result_key("AAPL", "RSI_DIP", "2025-01-10") != result_key("AAPL", "SMA_CROSSOVER", "2025-01-10")
+    assert result_key("AAPL", "RSI_DIP", "2025-01-10") != result_key("AAPL", "RSI_DIP", "2025-01-13")
+
+
+def test_repeat_evaluations_are_served_from_memory_within_bounds():
+    cache = StrategyResultCache(max_entries=2)
+    calls = []
+
+    def evaluate():
+        calls.append(1)
+        return {"strategy": "RSI_DIP", "signal": "HOLD"}
+
+    key = result_key("AAPL", "RSI_DIP", "2025-01-10")
+    cache.get_or_fetch(key, evaluate)
+    assert cache.get_or_fetch(key, evaluate)[1] == MEMORY
+    assert len(calls) == 1
+    assert cache._s3_key(key) == "strategy-results/2025-01-10/RSI_DIP/AAPL.json"
+
+    for ticker in ("MSFT", "IBM"):
+        cache.get_or_fetch(result_key(ticker, "RSI_DIP", "2025-01-10"), evaluate)
+    assert cache.lookup(key) is None
+
+
+def test_evaluate_strategy_calls_the_strategy_with_the_ticker_only(monkeypatch):
+    import evaluate_strategy
+
+    seen = []
+    monkeypatch.setattr(evaluate_strategy, "result_cache", StrategyResultCache(max_entries=4))
+    monkeypatch.setattr(evaluate_strategy, "STRATEGY_MAP", {"SMA_CROSSOVER": lambda ticker: seen.append(ticker) or {"strategy": "SMA_CROSSOVER"}})
+
+    assert evaluate_strategy.evaluate_strategy("AAPL", "SMA_CROSSOVER") == {"strategy": "SMA_CROSSOVER"}
+    assert seen == ["AAPL"]
@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+from ssm_config import ParameterStore
+
+
+class FakeSsm:
+    def __init__(self, values):
+        self.values = values
+        self.calls = []
+
+    def get_parameters(self, Names, WithDecryption):
+        self.calls.append(list(Names))
+        return {
+            "Parameters": [{"Name": n, "Value": self.values[n]} for n in Names if n in self.values],
+            "InvalidParameters": [n for n in Names if n not in self.values],
+        }
+
+
+def test_first_get_loads_all_registered_names_in_one_call():
+    ssm = FakeSsm({"A": "1", "B": "2", "C": "3"})
+    store = ParameterStore(client_factory=lambda: ssm)
+    store.register("A", "B")
+
+    assert store.get("C") == "3"
+    assert store.get("A") == "1"
+    assert store.get("B") == "2"
+    assert len(ssm.calls) == 1 and sorted(ssm.calls[0]) == ["A", "B", "C"]
+
+
+def test_stale_value_is_served_while_refreshing_in_background():
+    now = [0.0]
+    ssm = FakeSsm({"KEY": "old"})
+    store = ParameterStore(ttl=60, client_factory=lambda: ssm, clock=lambda: now[0])
+    assert store.get("KEY") == "old"
+
+    ssm.values["KEY"] = "rotated"
+    now[0] = 61
+    assert store.get("KEY") == "old"
+    deadline = time.time() + 2
+    while store.get("KEY") != "rotated" and time.time() < deadline:
+        time.sleep(0.01)
+    assert store.get("KEY") == "rotated"
+
+
+def test_missing_parameter_raises_key_error():
+    store = ParameterStore(client_factory=lambda: FakeSsm({}))
+    with pytest.raises(KeyError):
+        store.get("NOPE")
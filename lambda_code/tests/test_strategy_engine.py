@@ -0,0 +1,88 @@
+import json
+import math
+
+import numpy as np
+
+import strategy_engine
+from strategy_engine import align_closes, ema, evaluate_universe, sma, wilder_rsi
+
+
+def naive_rsi(closes, period=14):
+    changes = [b - a for a, b in zip(closes, closes[1:])]
+    gains = [max(c, 0.0) for c in changes]
+    losses = [max(-c, 0.0) for c in changes]
+    avg_gain, avg_loss = sum(gains[:period]) / period, sum(losses[:period]) / period
+    for g, l in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + g) / period
+        avg_loss = (avg_loss * (period - 1) + l) / period
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def walk(n, seed):
+    rng = np.random.default_rng(seed)
+    return (100 * np.cumprod(1 + rng.normal(0, 0.02, n))).tolist()
+
+
+def test_indicators_match_per_ticker_calculation_with_ragged_histories():
+    series = {"LONG": walk(260, 1), "SHORT": walk(60, 2)}
+    symbols, close = align_closes(series)
+    assert symbols == ["LONG", "SHORT"]
+    assert np.isnan(close[1, 0]) and close[1, -1] == series["SHORT"][-1]
+
+    for row, closes in enumerate(series.values()):
+        assert math.isclose(sma(close, 50)[row, -1], sum(closes[-50:]) / 50)
+        assert math.isclose(wilder_rsi(close)[row, -1], naive_rsi(closes))
+
+        value = sum(closes[:20]) / 20
+        for x in closes[20:]:
+            value += 2 / 21 * (x - value)
+        assert math.isclose(ema(close, 20)[row, -1], value)
+
+
+def test_evaluate_universe_returns_strategy_map_shaped_results():
+    # Falling for 200 bars then a jump: the 50-bar SMA crosses above the 200-bar one on the last bar.
+    rising = [300 - i for i in range(200)] + [10000.0]
+    results = evaluate_universe({"UP": rising, "NEW": walk(30, 3)}, ["RSI_DIP", "SMA_CROSSOVER"])
+
+    up, new = results
+    assert [e["strategy"] for e in up["evaluations"]] == ["RSI_DIP", "SMA_CROSSOVER"]
+    assert up["evaluations"][1]["signal"] == "BUY"
+    assert set(up["evaluations"][1]["indicators"]) == {"sma_50", "sma_200", "ema_20"}
+    assert new["ticker"] == "NEW"
+    assert new["evaluations"][0]["strategy"] == "RSI_DIP" and "signal" in new["evaluations"][0]
+    assert new["evaluations"][1] == {"strategy": "SMA_CROSSOVER", "error": "Not enough price history"}
+
+
+def test_unknown_strategy_is_an_evaluation_error():
+    [result] = evaluate_universe({"AAPL": walk(40, 4)}, ["RSI_DIP", "NOPE"])
+    assert result["evaluations"][1] == {"strategy": "NOPE", "error": "Unsupported strategy: NOPE"}
+
+
+def test_screen_uses_cached_ohlcv(monkeypatch):
+    monkeypatch.setattr(strategy_engine, "load_closes", lambda tickers: ({"AAPL": walk(40, 4)}, {"BAD": "not found"}))
+    results = strategy_engine.screen(["aapl", "BAD"], ["RSI_DIP"])
+    assert results[0]["ticker"] == "AAPL" and results[0]["evaluations"][0]["strategy"] == "RSI_DIP"
+    assert results[1] == {"ticker": "BAD", "evaluations": [{"strategy": "RSI_DIP", "error": "not found"}]}
+
+
+def test_empty_universe_returns_per_evaluation_errors(monkeypatch):
+    assert evaluate_universe({}, ["RSI_DIP"]) == []
+
+    monkeypatch.setattr(strategy_engine, "load_closes", lambda tickers: ({}, {"BAD": "not found", "GONE": "not found"}))
+    assert strategy_engine.screen(["BAD", "GONE"], ["RSI_DIP"]) == [
+        {"ticker": "BAD", "evaluations": [{"strategy": "RSI_DIP", "error": "not found"}]},
+        {"ticker": "GONE", "evaluations": [{"strategy": "RSI_DIP", "error": "not found"}]},
+    ]
+
+
+def test_vectorized_handler_matches_the_executor_schema(monkeypatch):
+    import evaluate_stock_strategy
+
+    monkeypatch.setattr(strategy_engine, "load_closes", lambda tickers: ({"AAPL": walk(40, 4)}, {"BAD": "not found"}))
+    event = {"body": json.dumps({"tickers": ["AAPL", "BAD"], "strategies": ["RSI_DIP"], "engine": "vectorized"})}
+    body = json.loads(evaluate_stock_strategy.lambda_handler(event, None)["body"])
+
+    assert body["complete"] is True
+    assert [r["ticker"] for r in body["results"]] == ["AAPL", "BAD"]
+    assert all(set(r) == {"ticker", "evaluations"} for r in body["results"])
+    assert body["results"][1]["evaluations"] == [{"strategy": "RSI_DIP", "error": "not found"}]
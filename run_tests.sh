@@ -9,5 +9,14 @@ fi
 # Add lambda_code to PYTHONPATH
 export PYTHONPATH="$PYTHONPATH:$(pwd)/lambda_code"
 
-# Run pytest
-python3 -m pytest lambda_code/tests
+# Run both suites even if the first fails, then fail if either did.
+lambda_status=0
+python3 -m pytest lambda_code/tests || lambda_status=$?
+
+# The streaming server has its own flat module layout, so its tests run separately.
+stream_status=0
+PYTHONPATH="$(pwd)/ec2/stream_price_data" python3 -m pytest ec2/stream_price_data/tests || stream_status=$?
+
+if [ $lambda_status -ne 0 ] || [ $stream_status -ne 0 ]; then
+  exit 1
+fi
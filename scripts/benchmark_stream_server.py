@@ -0,0 +1,373 @@
+"""
+Load and latency benchmark for the streaming server.
+
+Starts ``stream_price_data_app`` with the synthetic provider, connects
+simulated clients from several processes with Zipf-distributed
+watchlists, and measures over a fixed window:
+
+- upstream ticks/s (from the workers' /metrics) and messages/s delivered to clients
+- tick-to-client latency percentiles, from the synthetic ``sent_us`` stamp
+- server RSS per connected client, and server CPU per upstream tick
+
+Results are written as JSON so runs can be compared between commits:
+
+    python scripts/benchmark_stream_server.py --clients 2000 --output after.json --compare before.json
+
+Linux only: server CPU and memory are read from /proc.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from array import array
+from pathlib import Path
+
+import websockets
+
+APP_DIR = Path(__file__).resolve().parent.parent / "ec2" / "stream_price_data"
+sys.path.insert(0, str(APP_DIR))
+
+from wire_protocol import FRAME_HEADER, TICK_BODY, TICK_HEADER  # noqa: E402
+
+# Latency samples kept per client process (reservoir sampled beyond this).
+MAX_SAMPLES = 200_000
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+
+
+def zipf_watchlists(clients: int, symbols: int, max_watchlist: int, skew: float, seed: int) -> list[list[str]]:
+    """Watchlists of 1..max_watchlist symbols; popular symbols are shared by many clients."""
+    rng = random.Random(seed)
+    universe = [f"SYM{i:04d}" for i in range(symbols)]
+    weights = [1 / (rank + 1) ** skew for rank in range(symbols)]
+    watchlists = []
+    for _ in range(clients):
+        size = min(rng.randint(1, max_watchlist), symbols)
+        chosen: dict[str, None] = {}
+        while len(chosen) < size:
+            chosen.update(dict.fromkeys(rng.choices(universe, weights, k=size - len(chosen))))
+        watchlists.append(list(chosen))
+    return watchlists
+
+
+def process_tree(pid: int) -> list[int]:
+    pids = [pid]
+    for p in pids:
+        try:
+            for tid in os.listdir(f"/proc/{p}/task"):
+                with open(f"/proc/{p}/task/{tid}/children") as f:
+                    pids.extend(int(c) for c in f.read().split())
+        except FileNotFoundError:
+            pass
+    return pids
+
+
+def server_usage(pid: int) -> tuple[float, int]:
+    """(CPU seconds, RSS bytes) summed over the server and its workers."""
+    cpu, rss = 0.0, 0
+    for p in process_tree(pid):
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu += (int(fields[11]) + int(fields[12])) / CLK_TCK
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss += int(line.split()[1]) * 1024
+        except FileNotFoundError:
+            pass
+    return cpu, rss
+
+
+class ClientStats:
+    def __init__(self, seed: int):
+        self.samples = array("d")
+        self.latency_count = 0
+        self.messages = 0
+        self.connected = 0
+        self.failed = 0
+        self._random = random.Random(seed)
+
+    def add_latency(self, ms: float) -> None:
+        self.latency_count += 1
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(ms)
+        else:
+            slot = self._random.randrange(self.latency_count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = ms
+
+
+async def run_client(url: str, watchlist: list[str], options: dict, stats: ClientStats, window: tuple[float, float], universe: list[str], seed: str) -> None:
+    measure_start, measure_end = window
+    rng = random.Random(seed)
+    try:
+        async with websockets.connect(url, max_size=None, ping_interval=None, close_timeout=1) as ws:
+            stats.connected += 1
+            await ws.send(json.dumps({"action": "subscribe", "symbols": watchlist, "format": options["format"]}))
+            if rng.random() < options["bar_fraction"]:
+                await ws.send(json.dumps({"action": "subscribe", "channel": "bars", "symbols": watchlist[:1], "intervals": ["1m"]}))
+
+            async def churn() -> None:
+                while True:
+                    await asyncio.sleep(rng.expovariate(1 / options["churn_seconds"]))
+                    old, new = rng.choice(watchlist), rng.choice(universe)
+                    await ws.send(json.dumps({"action": "unsubscribe", "symbols": [old]}))
+                    await ws.send(json.dumps({"action": "subscribe", "symbols": [new]}))
+                    watchlist[watchlist.index(old)] = new
+
+            churner = asyncio.create_task(churn()) if options["churn_seconds"] > 0 else None
+            try:
+                async for message in ws:
+                    now = time.time()
+                    if now >= measure_end:
+                        break
+                    if now < measure_start:
+                        continue
+                    if isinstance(message, bytes):
+                        # Binary ticks carry a millisecond timestamp only.
+                        _, count = FRAME_HEADER.unpack_from(message)
+                        offset = FRAME_HEADER.size
+                        for _ in range(count):
+                            offset += TICK_HEADER.size
+                            _, _, timestamp = TICK_BODY.unpack_from(message, offset)
+                            offset += TICK_BODY.size
+                            stats.messages += 1
+                            stats.add_latency(now * 1000 - timestamp)
+                        continue
+                    data = json.loads(message)
+                    sent_us = data.get("sent_us")
+                    if sent_us is None:
+                        continue  # control messages, bars, snapshots
+                    stats.messages += 1
+                    stats.add_latency(now * 1000 - sent_us / 1000)
+            finally:
+                if churner:
+                    churner.cancel()
+    except Exception:
+        stats.failed += 1
+
+
+def client_process(url: str, watchlists: list[list[str]], options: dict, ramp: tuple[float, float], window: tuple[float, float], universe: list[str], seed: int, results) -> None:
+    async def main() -> ClientStats:
+        stats = ClientStats(seed)
+        ramp_start, ramp_end = ramp
+        tasks = []
+        for i, watchlist in enumerate(watchlists):
+            # Spread connections evenly over the ramp.
+            delay = ramp_start + (ramp_end - ramp_start) * i / max(len(watchlists), 1) - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # String seeds are hashed deterministically, unlike hash() of a tuple.
+            client_seed = f"{seed}-{i}"
+            tasks.append(asyncio.create_task(run_client(url, watchlist, options, stats, window, universe, client_seed)))
+        try:
+            await asyncio.wait_for(asyncio.gather(*tasks), timeout=max(window[1] - time.time() + 5, 1))
+        except asyncio.TimeoutError:
+            pass
+        return stats
+
+    stats = asyncio.run(main())
+    results.put({
+        "samples": stats.samples.tobytes(),
+        "latency_count": stats.latency_count,
+        "messages": stats.messages,
+        "connected": stats.connected,
+        "failed": stats.failed,
+    })
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    if not sorted_values:
+        return None
+    return round(sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))], 3)
+
+
+def wait_for_port(port: int, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server did not open port {port} within {timeout}s")
+
+
+def scrape_counter(ports: list[int], name: str) -> int:
+    """Sum of an unlabeled counter over every worker's /metrics endpoint."""
+    total = 0
+    for port in ports:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            for line in response.read().decode().splitlines():
+                if line.startswith(name + " "):
+                    total += int(float(line.split()[1]))
+    return total
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> dict:
+    # Thousands of sockets on both ends; the server inherits the raised limit.
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    env = {
+        **os.environ,
+        "STREAM_PROVIDER": "Synthetic",
+        "STREAM_PORT": str(args.port),
+        "STREAM_SYNTHETIC_RATE": str(args.rate),
+        # Worker N serves /metrics on this port + N.
+        "STREAM_METRICS_PORT": str(args.metrics_port),
+    }
+    metrics_ports = [args.metrics_port + worker for worker in range(args.workers)]
+    server = subprocess.Popen(
+        [sys.executable, "stream_price_data_app.py", "--workers", str(args.workers)],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(args.port, 15)
+        for port in metrics_ports:
+            wait_for_port(port, 15)
+        time.sleep(0.5)
+        _, idle_rss = server_usage(server.pid)
+
+        watchlists = zipf_watchlists(args.clients, args.symbols, args.max_watchlist, args.skew, args.seed)
+        universe = [f"SYM{i:04d}" for i in range(args.symbols)]
+        options = {"format": args.format, "bar_fraction": args.bar_fraction, "churn_seconds": args.churn_seconds}
+        now = time.time() + 1
+        ramp = (now, now + args.ramp)
+        window = (ramp[1] + args.warmup, ramp[1] + args.warmup + args.duration)
+
+        results = multiprocessing.Queue()
+        procs = []
+        for i in range(args.client_procs):
+            share = watchlists[i::args.client_procs]
+            proc = multiprocessing.Process(target=client_process, args=(f"ws://127.0.0.1:{args.port}", share, options, ramp, window, universe, args.seed + i, results))
+            proc.start()
+            procs.append(proc)
+
+        time.sleep(max(window[0] - time.time(), 0))
+        cpu_start, rss_loaded = server_usage(server.pid)
+        ticks_start = scrape_counter(metrics_ports, "stream_ticks_total")
+        time.sleep(max(window[1] - time.time(), 0))
+        cpu_end, rss_end = server_usage(server.pid)
+        ticks_end = scrape_counter(metrics_ports, "stream_ticks_total")
+
+        outputs = [results.get(timeout=args.duration + 60) for _ in procs]
+        for proc in procs:
+            proc.join(timeout=10)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    samples = array("d")
+    for output in outputs:
+        samples.frombytes(output["samples"])
+    latencies = sorted(samples)
+    messages = sum(o["messages"] for o in outputs)
+    connected = sum(o["connected"] for o in outputs)
+    # Counted by the server, so it covers every worker and both wire formats.
+    upstream_ticks = ticks_end - ticks_start
+    cpu_seconds = cpu_end - cpu_start
+
+    return {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "results": {
+            "clients_connected": connected,
+            "clients_failed": sum(o["failed"] for o in outputs),
+            "upstream_ticks_per_s": round(upstream_ticks / args.duration, 1) if upstream_ticks else None,
+            "delivered_msgs_per_s": round(messages / args.duration, 1),
+            "latency_ms": {
+                "p50": percentile(latencies, 0.50),
+                "p99": percentile(latencies, 0.99),
+                "p999": percentile(latencies, 0.999),
+                "max": round(latencies[-1], 3) if latencies else None,
+                "samples": len(latencies),
+            },
+            "server_rss_mb": round(max(rss_loaded, rss_end) / 2**20, 1),
+            "memory_per_client_kb": round((rss_loaded - idle_rss) / max(connected, 1) / 1024, 2),
+            "server_cpu_percent": round(cpu_seconds / args.duration * 100, 1),
+            "cpu_us_per_tick": round(cpu_seconds / upstream_ticks * 1e6, 2) if upstream_ticks else None,
+            "cpu_us_per_delivered_msg": round(cpu_seconds / messages * 1e6, 3) if messages else None,
+        },
+    }
+
+
+# Metrics printed by --compare; True when higher is better.
+COMPARED = {
+    "delivered_msgs_per_s": True,
+    "latency_ms.p50": False,
+    "latency_ms.p99": False,
+    "latency_ms.p999": False,
+    "memory_per_client_kb": False,
+    "cpu_us_per_tick": False,
+}
+
+
+def lookup(results: dict, path: str):
+    for part in path.split("."):
+        results = results.get(part) if isinstance(results, dict) else None
+    return results
+
+
+def compare(baseline: dict, current: dict) -> None:
+    print(f"{'metric':<24}{'baseline':>12}{'current':>12}{'change':>10}")
+    for path, higher_is_better in COMPARED.items():
+        old, new = lookup(baseline["results"], path), lookup(current["results"], path)
+        if old in (None, 0) or new is None:
+            print(f"{path:<24}{str(old):>12}{str(new):>12}")
+            continue
+        change = (new - old) / old * 100
+        worse = change < 0 if higher_is_better else change > 0
+        print(f"{path:<24}{old:>12}{new:>12}{change:>+9.1f}%{' (worse)' if worse and abs(change) >= 5 else ''}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Streaming server load and latency benchmark")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--symbols", type=int, default=500, help="size of the symbol universe")
+    parser.add_argument("--max-watchlist", type=int, default=20)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of symbol popularity")
+    parser.add_argument("--rate", type=float, default=2000, help="synthetic upstream ticks/s (per server worker)")
+    parser.add_argument("--format", choices=("json", "binary"), default="json")
+    parser.add_argument("--bar-fraction", type=float, default=0.1, help="share of clients also subscribing to 1m bars")
+    parser.add_argument("--churn-seconds", type=float, default=30, help="mean seconds between watchlist changes per client; 0 disables")
+    parser.add_argument("--workers", type=int, default=1, help="server worker processes")
+    parser.add_argument("--client-procs", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--ramp", type=float, default=5, help="seconds to connect all clients")
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--duration", type=float, default=15, help="measurement window in seconds")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--metrics-port", type=int, default=19108, help="first worker's /metrics port")
+    parser.add_argument("--seed", type=int, default=1, help="seeds watchlists and churn")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    args = parser.parse_args()
+
+    result = run(args)
+    print(json.dumps(result["results"], indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+LAMBDA_DIR = Path(__file__).resolve().parent.parent / "lambda_code"
+
+# Handler module -> import-time budget in ms on a developer machine. Lambda
+# cold starts are slower in absolute terms, but regressions show up the same.
+BUDGETS_MS = {
+    "get_ohlcv": 60,
+    "evaluate_stock_strategy": 60,
+    "evaluate_stock_strategy_handler": 60,
+    "get_fundamentals": 350,
+    "stream_price_data": 120,
+}
+
+
+def profile(module: str) -> dict:
+    """Import ``module`` in a fresh interpreter with -X importtime and summarize the cost."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=LAMBDA_DIR,
+        env={**os.environ, "PYTHONPATH": str(LAMBDA_DIR)},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    total_us = 0
+    imports = []
+    children = []
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", children listed before their parent.
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 1:
+            children.append((name.strip(), int(cumulative)))
+        elif depth == 0:
+            if name.strip() == module:
+                total_us = int(cumulative)
+                imports = children
+            children = []
+
+    imports.sort(key=lambda item: item[1], reverse=True)
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 1),
+        "top": [{"import": name, "ms": round(us / 1000, 1)} for name, us in imports[:8]],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import-time profile of the Lambda handler modules")
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS_MS))
+    parser.add_argument("--runs", type=int, default=3, help="imports per module; the fastest is kept")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a module exceeds its budget")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = []
+    for module in args.modules:
+        # The first import also compiles .pyc files; keep the best of several runs.
+        best = min((profile(module) for _ in range(args.runs)), key=lambda r: r["total_ms"])
+        best["budget_ms"] = BUDGETS_MS.get(module)
+        results.append(best)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            print(f"{r['module']}: {r['total_ms']} ms (budget {r['budget_ms']} ms)")
+            for item in r["top"]:
+                print(f"    {item['ms']:>8} ms  {item['import']}")
+
+    over = [r for r in results if r["budget_ms"] is not None and r["total_ms"] > r["budget_ms"]]
+    if args.check and over:
+        for r in over:
+            print(f"Over budget: {r['module']} took {r['total_ms']} ms (budget {r['budget_ms']} ms)", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ export type Tick = {
   symbol: string;
   price: number;
   ts: number; // epoch milliseconds
+  snapshot?: boolean; // last cached value sent on subscribe, not a live trade
 };
 
 export type PriceStreamOptions = {
@@ -51,6 +51,7 @@ export class RealPriceStream implements PriceStream {
           symbol: data.symbol ?? data.s,
           price: Number(data.price ?? data.p),
           ts: Number(data.ts ?? data.t ?? Date.now()),
+          snapshot: data.snapshot === true,
         };
         if (tick.symbol && Number.isFinite(tick.price)) {
           this.listeners.forEach((cb) => cb(tick));